@@ -2,59 +2,50 @@
 
 from .config import AirforceConfig
 from .upload import AirforceAnonDropUpload
-from .params import (
-    AirforceNanoParams,
-    AirforceFluxProFlexParams,
-    AirforceFluxDevKleinParams,
-    AirforceZImageParams,
-    AirforceImagenParams,
-    AirforceSeedreamParams,
-    AirforceSunoParams,
-    AirforceGrokImagineVideoParams,
-    AirforceVeoParams,
-    AirforceWanParams,
-)
-from .generator import AirforceGeneratorModular
-from .download import AirforceDownload
+from .params import PARAMS_NODE_CLASSES, PARAMS_DISPLAY_NAMES
+from .generator import AirforceGeneratorModular, AirforceBatchGenerator
+from .jobs import AirforceSubmitJob, AirforceCollectJob
+from .download import AirforceBulkDownload, AirforceDownload
 from .preview import AirforceVideoPreview
+from .video import AirforceVideoFrames
+from .ledger import AirforceLedgerQuery
+from .media_proxy import register_routes
 
 NODE_CLASS_MAPPINGS = {
     "AirforceConfig": AirforceConfig,
     "AirforceAnonDropUpload": AirforceAnonDropUpload,
-    "AirforceNanoParams": AirforceNanoParams,
-    "AirforceFluxProFlexParams": AirforceFluxProFlexParams,
-    "AirforceFluxDevKleinParams": AirforceFluxDevKleinParams,
-    "AirforceZImageParams": AirforceZImageParams,
-    "AirforceImagenParams": AirforceImagenParams,
-    "AirforceSeedreamParams": AirforceSeedreamParams,
-    "AirforceSunoParams": AirforceSunoParams,
-    "AirforceGrokImagineVideoParams": AirforceGrokImagineVideoParams,
-    "AirforceVeoParams": AirforceVeoParams,
-    "AirforceWanParams": AirforceWanParams,
+    # Params nodes are generated from the model registry (params.py / config.MODEL_REGISTRY)
+    **PARAMS_NODE_CLASSES,
     "AirforceGeneratorModular": AirforceGeneratorModular,
+    "AirforceBatchGenerator": AirforceBatchGenerator,
+    "AirforceSubmitJob": AirforceSubmitJob,
+    "AirforceCollectJob": AirforceCollectJob,
     "AirforceDownload": AirforceDownload,
+    "AirforceBulkDownload": AirforceBulkDownload,
     "AirforceVideoPreview": AirforceVideoPreview,
+    "AirforceVideoFrames": AirforceVideoFrames,
+    "AirforceLedgerQuery": AirforceLedgerQuery,
 }
 
 # Params: 🎨 = image, 🎬 = video. Submit is generic (image/video depends on connected params).
 NODE_DISPLAY_NAME_MAPPINGS = {
     "AirforceConfig": "⚙️ Airforce: Config",
     "AirforceAnonDropUpload": "📤 Reference: AnonDrop Upload",
-    "AirforceNanoParams": "🎨 NanoBanana",
-    "AirforceFluxProFlexParams": "🎨 Flux Pro/Flex",
-    "AirforceFluxDevKleinParams": "🎨 Flux Dev/Klein",
-    "AirforceZImageParams": "🎨 Z-Image",
-    "AirforceImagenParams": "🎨 Imagen",
-    "AirforceSeedreamParams": "🎨 Seedream",
-    "AirforceSunoParams": "🎬 Suno",
-    "AirforceGrokImagineVideoParams": "🎬 Grok Imagine",
-    "AirforceVeoParams": "🎬 Veo",
-    "AirforceWanParams": "🎬 Wan",
+    **PARAMS_DISPLAY_NAMES,
     "AirforceGeneratorModular": "🎯 Airforce: Submit",
+    "AirforceBatchGenerator": "🎯 Airforce: Batch Submit",
+    "AirforceSubmitJob": "🎯 Airforce: Submit Job",
+    "AirforceCollectJob": "📥 Airforce: Collect Job",
     "AirforceDownload": "⬇️ Airforce: Download",
+    "AirforceBulkDownload": "⬇️ Airforce: Bulk Download",
     "AirforceVideoPreview": "📺 Airforce Previewer",
+    "AirforceVideoFrames": "🎞️ Airforce: Video Frames",
+    "AirforceLedgerQuery": "📒 Airforce: Ledger Query",
 }
 
+# Local media proxy for the Previewer (no-op outside ComfyUI)
+register_routes()
+
 WEB_DIRECTORY = "./web"
 
 __all__ = [
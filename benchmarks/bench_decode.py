@@ -0,0 +1,91 @@
+"""
+Decode microbenchmark: previous Submit decode path vs decode.decode_image_to_tensor.
+Reports time per megapixel and peak RSS growth; each path runs in a fresh process so peaks do not mix.
+
+Usage: python benchmarks/bench_decode.py [--megapixels 16] [--format png|jpeg|webp] [--repeat 5]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from io import BytesIO
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DECODE_PY = os.path.join(os.path.dirname(HERE), "decode.py")
+
+
+def _load_decode():
+    spec = importlib.util.spec_from_file_location("airforce_decode", DECODE_PY)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _make_image_bytes(megapixels, fmt):
+    import numpy as np
+    from PIL import Image
+    side = int((megapixels * 1e6) ** 0.5)
+    rng = np.random.default_rng(0)
+    # Smooth gradient plus noise: compresses like a photo rather than like pure noise
+    y, x = np.mgrid[0:side, 0:side]
+    base = ((x + y) * 255 // (2 * side)).astype(np.uint8)
+    arr = np.stack([base, base[::-1], base.T], axis=-1)
+    arr = (arr + rng.integers(0, 16, arr.shape, dtype=np.uint8)).astype(np.uint8)
+    buf = BytesIO()
+    Image.fromarray(arr).save(buf, format={"jpeg": "JPEG", "png": "PNG", "webp": "WEBP"}[fmt], quality=95)
+    return buf.getvalue(), side * side / 1e6
+
+
+def _worker(path, megapixels, fmt, repeat):
+    decode = _load_decode()
+    raw, mp = _make_image_bytes(megapixels, fmt)
+    fn = decode.decode_image_legacy if path == "legacy" else decode.decode_image_to_tensor
+    baseline = _peak_rss_mb()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tensor = fn(raw)
+        times.append(time.perf_counter() - start)
+        del tensor
+    best = min(times)
+    print(json.dumps({
+        "path": path,
+        "megapixels": round(mp, 2),
+        "format": fmt,
+        "best_seconds": round(best, 4),
+        "ms_per_megapixel": round(best * 1000 / mp, 2),
+        "peak_rss_growth_mb": round(_peak_rss_mb() - baseline, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--megapixels", type=float, default=16.0)
+    parser.add_argument("--format", choices=["png", "jpeg", "webp"], default="png")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--worker", choices=["legacy", "fused"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.worker, args.megapixels, args.format, args.repeat)
+        return
+
+    for path in ("legacy", "fused"):
+        cmd = [sys.executable, os.path.abspath(__file__), "--worker", path,
+               "--megapixels", str(args.megapixels), "--format", args.format, "--repeat", str(args.repeat)]
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout.strip()
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
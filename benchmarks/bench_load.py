@@ -0,0 +1,137 @@
+"""
+Load benchmark: drives the Submit, Upload and Download nodes against the local mock server
+(benchmarks/mock_server.py) at a chosen concurrency and reports throughput, p50/p99 latency, CPU and peak memory.
+Nothing goes to api.airforce; run it inside the ComfyUI Python environment (torch, numpy, Pillow, aiohttp, requests).
+
+Usage: python benchmarks/bench_load.py [--scenario submit|upload|download|all] [--requests 32] [--concurrency 8]
+       plus any mock server option (--latency-ms, --error-rate, --image-size, --video-mb, ...)
+"""
+import importlib.util
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+import mock_server  # noqa: E402
+
+
+def load_package():
+    """Import the node pack from its folder (its directory name is not a valid module name)."""
+    spec = importlib.util.spec_from_file_location(
+        "airforce_nodes", os.path.join(PACKAGE_DIR, "__init__.py"), submodule_search_locations=[PACKAGE_DIR])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["airforce_nodes"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(-(-pct * len(sorted_values) // 100)) - 1))
+    return sorted_values[k]
+
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_scenario(name, fn, total, concurrency):
+    """Call fn(i) total times on a pool of `concurrency` threads; fn returns True on success."""
+    latencies, failures = [], 0
+    cpu0, wall0 = _cpu_seconds(), time.perf_counter()
+
+    def timed(i):
+        start = time.perf_counter()
+        ok = fn(i)
+        return ok, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for ok, seconds in pool.map(timed, range(total)):
+            latencies.append(seconds)
+            failures += 0 if ok else 1
+    wall = time.perf_counter() - wall0
+    cpu = _cpu_seconds() - cpu0
+    latencies.sort()
+    return {
+        "scenario": name,
+        "requests": total,
+        "concurrency": concurrency,
+        "failures": failures,
+        "wall_seconds": round(wall, 3),
+        "throughput_per_s": round(total / wall, 2) if wall else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+        "cpu_seconds": round(cpu, 3),
+        "cpu_percent": round(100.0 * cpu / wall, 1) if wall else 0.0,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def main():
+    parser = mock_server.build_parser()
+    parser.description = __doc__.strip().splitlines()[0]
+    parser.set_defaults(port=0)
+    parser.add_argument("--scenario", choices=["submit", "upload", "download", "all"], default="all")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    server, state = mock_server.start_server(args)
+    host, port = server.server_address[:2]
+    base = f"http://{host}:{port}"
+    pkg = load_package()
+    nodes = pkg.NODE_CLASS_MAPPINGS
+    config = nodes["AirforceConfig"]().setup(
+        f"{base}/v1", "sk-bench", anondrop_key="bench", anondrop_base_url=base,
+        pool_size=max(10, args.concurrency), max_concurrency=args.concurrency)[0]
+    params = nodes["AirforceNanoParams"]().pack("nano-banana-pro", "1:1", "1k")[0]
+    results = []
+
+    if args.scenario in ("submit", "all"):
+        submit = nodes["AirforceGeneratorModular"]()
+
+        def do_submit(i):
+            return bool(submit.generate(config, params, f"bench prompt {i}", random_seed=True)[2])
+        results.append(run_scenario("submit", do_submit, args.requests, args.concurrency))
+
+    if args.scenario in ("upload", "all"):
+        import torch
+        upload = nodes["AirforceAnonDropUpload"]()
+
+        def do_upload(i):
+            # Distinct tensors so the dedup cache does not hide the upload cost
+            img = torch.rand((1, args.image_size, args.image_size, 3)) * 0.01 + (i % 97) / 100.0
+            return bool(upload.upload(config, image_1=img)[0])
+        results.append(run_scenario("upload", do_upload, args.requests, args.concurrency))
+
+    if args.scenario in ("download", "all"):
+        download = nodes["AirforceDownload"]()
+        out_dir = tempfile.mkdtemp(prefix="airforce_bench_")
+
+        def do_download(i):
+            url = f"{base}/cdn/bench{i}.{'mp4' if i % 2 else 'png'}"
+            return bool(download.download(url, out_dir, f"bench{i}")["result"][0])
+        results.append(run_scenario("download", do_download, args.requests, args.concurrency))
+
+    for r in results:
+        print(json.dumps(r))
+    print(json.dumps({"mock_server": state.counters}))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
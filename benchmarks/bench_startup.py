@@ -0,0 +1,106 @@
+"""
+Startup benchmark: cold import time and memory of the node pack alone (fresh interpreter per run, as ComfyUI
+loads it), which heavy libraries registration pulled in (should be none), the cost of compiling the params
+registry, and per-call INPUT_TYPES / pack() cost of the generated Params nodes. Registration needs only the
+standard library; run it inside the ComfyUI Python environment to compare against a full workflow import.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--calls 20000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(HERE)
+
+_COLD_IMPORT = r"""
+import importlib.util, json, os, resource, sys, time, tracemalloc
+package_dir = {package_dir!r}
+before = set(sys.modules)
+rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if {trace!r}:
+    tracemalloc.start()
+t0 = time.perf_counter()
+spec = importlib.util.spec_from_file_location("airforce_nodes", os.path.join(package_dir, "__init__.py"),
+                                              submodule_search_locations=[package_dir])
+pkg = importlib.util.module_from_spec(spec)
+sys.modules["airforce_nodes"] = pkg
+spec.loader.exec_module(pkg)
+seconds = time.perf_counter() - t0
+traced_peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+rss1 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+unit = 1 if sys.platform == "darwin" else 1024
+heavy = [m for m in ("torch", "numpy", "PIL", "requests", "aiohttp", "av") if m in sys.modules]
+print(json.dumps({{"seconds": seconds, "new_modules": len(set(sys.modules) - before), "nodes": len(pkg.NODE_CLASS_MAPPINGS),
+                  "traced_peak_kb": traced_peak / 1024, "rss_growth_kb": (rss1 - rss0) * unit / 1024, "heavy_loaded": heavy}}))
+"""
+
+
+def _import_once(trace):
+    code = _COLD_IMPORT.format(package_dir=PACKAGE_DIR, trace=trace)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def cold_import(runs):
+    """Import the pack in `runs` fresh interpreters (timing excludes interpreter start-up), plus one traced run for memory."""
+    samples = [_import_once(False) for _ in range(runs)]
+    seconds = sorted(s["seconds"] for s in samples)
+    last = samples[-1]
+    traced = _import_once(True)
+    return {
+        "bench": "cold_import",
+        "runs": runs,
+        "min_ms": round(seconds[0] * 1000, 1),
+        "median_ms": round(seconds[len(seconds) // 2] * 1000, 1),
+        "new_modules": last["new_modules"],
+        "nodes": last["nodes"],
+        "traced_peak_kb": round(traced["traced_peak_kb"], 1),
+        "rss_growth_kb": round(last["rss_growth_kb"], 1),
+        "heavy_loaded": last["heavy_loaded"],
+    }
+
+
+def registry_costs(calls):
+    sys.path.insert(0, HERE)
+    from bench_load import load_package
+    load_package()
+    params = sys.modules["airforce_nodes.params"]
+
+    t0 = time.perf_counter()
+    for _ in range(20):
+        params.build_params_nodes(params.load_registry())
+    compile_ms = (time.perf_counter() - t0) / 20 * 1000
+
+    results = [{"bench": "registry_compile", "series": len(params.PARAMS_NODE_CLASSES), "ms": round(compile_ms, 3)}]
+    for name, cls in params.PARAMS_NODE_CLASSES.items():
+        required = cls.INPUT_TYPES()["required"]
+        kwargs = {k: (opts.get("default") if isinstance(opts, dict) else None) for k, (_, opts) in required.items()}
+        node = cls()
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            cls.INPUT_TYPES()
+        input_types_us = (time.perf_counter() - t0) / calls * 1e6
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            node.pack(**kwargs)
+        pack_us = (time.perf_counter() - t0) / calls * 1e6
+        results.append({"bench": "params_node", "node": name, "input_types_us": round(input_types_us, 3), "pack_us": round(pack_us, 3)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh-interpreter imports")
+    parser.add_argument("--calls", type=int, default=20000, help="INPUT_TYPES / pack calls per Params node")
+    args = parser.parse_args()
+    print(json.dumps(cold_import(args.runs)))
+    for r in registry_costs(args.calls):
+        print(json.dumps(r))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Offline stand-in for api.airforce, AnonDrop and the CDN (stdlib only), for benchmarks and manual testing.
+
+  POST /v1/images/generations   SSE: keepalive frames, one data frame with data[0].url, then [DONE]
+  POST /upload?key=...          AnonDrop-style upload; JSON {"url": ...}
+  GET  /cdn/<id>.png|.mp4       Generated image / video payloads (Range supported)
+  GET  /files/<id>/<name>       Files received by /upload
+
+Latency, keepalive count, error rates and mid-stream disconnects are injectable. Run: python benchmarks/mock_server.py --port 8199
+Config node: base_url http://127.0.0.1:8199/v1, anondrop_base_url http://127.0.0.1:8199
+"""
+import argparse
+import json
+import os
+import random
+import re
+import struct
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+VIDEO_MODELS = ("veo", "wan", "grok-imagine-video", "suno")
+
+
+def make_png(width, height):
+    """Gradient RGB PNG built with zlib only (no Pillow needed)."""
+    rows = []
+    for y in range(height):
+        g = (y * 255 // max(1, height - 1)) & 0xFF
+        row = bytearray(b"\x00")
+        for x in range(width):
+            row += bytes(((x * 255 // max(1, width - 1)) & 0xFF, g, 128))
+        rows.append(bytes(row))
+    raw = b"".join(rows)
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IDAT", zlib.compress(raw, 1)) + chunk(b"IEND", b"")
+
+
+def make_fake_mp4(size_bytes):
+    """Bytes that sniff as MP4 (ftyp box) padded to size; enough for transfer benchmarks, not decodable."""
+    head = struct.pack(">I", 24) + b"ftypisom" + b"\x00\x00\x02\x00" + b"isomiso2"
+    return head + os.urandom(max(0, size_bytes - len(head)))
+
+
+def make_test_mp4(frames=24, fps=12, width=64, height=48, audio=False):
+    """
+    Small decodable MP4 built with PyAV (mpeg4 video, optional AAC audio track), for offline decode tests.
+    Frame i is a flat grey of value (i * 10) % 256, so tests can tell which frames were sampled.
+    """
+    from fractions import Fraction
+    from io import BytesIO
+
+    import av
+    import numpy as np
+
+    buf = BytesIO()
+    with av.open(buf, mode="w", format="mp4") as container:
+        vstream = container.add_stream("mpeg4", rate=fps)
+        vstream.width, vstream.height, vstream.pix_fmt = width, height, "yuv420p"
+        vstream.options = {"qscale": "2"}
+        astream = container.add_stream("aac", rate=44100) if audio else None
+        for i in range(frames):
+            rgb = np.full((height, width, 3), (i * 10) % 256, dtype=np.uint8)
+            for packet in vstream.encode(av.VideoFrame.from_ndarray(rgb, format="rgb24")):
+                container.mux(packet)
+        for packet in vstream.encode():
+            container.mux(packet)
+        if astream is not None:
+            samples = int(44100 * frames / fps)
+            for start in range(0, samples, 1024):
+                n = min(1024, samples - start)
+                frame = av.AudioFrame.from_ndarray(np.zeros((1, n), dtype=np.float32), format="fltp", layout="mono")
+                frame.sample_rate = 44100
+                frame.pts = start
+                frame.time_base = Fraction(1, 44100)
+                for packet in astream.encode(frame):
+                    container.mux(packet)
+            for packet in astream.encode():
+                container.mux(packet)
+    return buf.getvalue()
+
+
+class MockState:
+    def __init__(self, args):
+        self.args = args
+        self.image = make_png(args.image_size, args.image_size)
+        if args.video_file:
+            with open(args.video_file, "rb") as f:
+                self.video = f.read()
+        elif args.video_frames:
+            self.video = make_test_mp4(frames=args.video_frames)
+        else:
+            self.video = make_fake_mp4(int(args.video_mb * 1024 * 1024))
+        self.uploads = {}
+        self.lock = threading.Lock()
+        self.counters = {"generations": 0, "uploads": 0, "cdn": 0, "errors": 0, "cuts": 0}
+
+    def bump(self, key):
+        with self.lock:
+            self.counters[key] += 1
+
+    def cut(self):
+        if self.args.cut_rate and random.random() < self.args.cut_rate:
+            self.bump("cuts")
+            return True
+        return False
+
+    def delay(self, base_ms):
+        jitter = random.uniform(0, self.args.jitter_ms) if self.args.jitter_ms else 0
+        time.sleep((base_ms + jitter) / 1000.0)
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            if state.args.verbose:
+                super().log_message(fmt, *args)
+
+        def _base(self):
+            return f"http://{self.headers.get('Host') or '127.0.0.1'}"
+
+        def _read_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def _json(self, status, data):
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _maybe_fail(self):
+            if state.args.rate_limit_rate and random.random() < state.args.rate_limit_rate:
+                state.bump("errors")
+                self.send_response(429)
+                self.send_header("Retry-After", "1")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return True
+            if state.args.error_rate and random.random() < state.args.error_rate:
+                state.bump("errors")
+                self._json(500, {"error": "injected failure"})
+                return True
+            return False
+
+        def do_POST(self):
+            path = self.path.split("?")[0]
+            if path.endswith("/images/generations"):
+                return self._generation()
+            if path == "/upload":
+                return self._upload()
+            self._json(404, {"error": "not found"})
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path.startswith("/cdn/"):
+                return self._cdn(path)
+            if path.startswith("/files/"):
+                parts = path.split("/")
+                data = state.uploads.get(parts[2]) if len(parts) > 2 else None
+                if data is None:
+                    return self._json(404, {"error": "no such file"})
+                return self._send_bytes(data, "image/png")
+            self._json(404, {"error": "not found"})
+
+        def _generation(self):
+            payload = json.loads(self._read_body() or b"{}")
+            state.bump("generations")
+            if self._maybe_fail():
+                return
+            model = str(payload.get("model", ""))
+            ext = "mp4" if any(m in model for m in VIDEO_MODELS) else "png"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            keepalives = max(0, state.args.keepalives)
+            per_frame = state.args.latency_ms / (keepalives + 1)
+            for _ in range(keepalives):
+                state.delay(per_frame)
+                self.wfile.write(b"data: : keepalive\n\n")
+                self.wfile.flush()
+            if state.cut():
+                self.close_connection = True  # stream closed before the URL frame
+                return
+            state.delay(per_frame)
+            frame = {"created": int(time.time()), "data": [{"url": f"{self._base()}/cdn/{uuid.uuid4().hex}.{ext}", "b64_json": None}]}
+            self.wfile.write(b"data: " + json.dumps(frame).encode("utf-8") + b"\n\n")
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+        def _upload(self):
+            body = self._read_body()
+            state.bump("uploads")
+            if self._maybe_fail():
+                return
+            state.delay(state.args.upload_latency_ms)
+            # Keep the file part only roughly: everything between the first blank line and the closing boundary
+            m = re.search(rb"\r\n\r\n(.*)\r\n--", body, re.S)
+            file_id = uuid.uuid4().hex[:16]
+            state.uploads[file_id] = m.group(1) if m else body
+            self._json(200, {"url": f"{self._base()}/files/{file_id}"})
+
+        def _cdn(self, path):
+            state.bump("cdn")
+            state.delay(state.args.cdn_latency_ms)
+            if path.endswith(".mp4"):
+                return self._send_bytes(state.video, "video/mp4")
+            return self._send_bytes(state.image, "image/png")
+
+        def _send_bytes(self, data, content_type):
+            start, end = 0, len(data) - 1
+            rng = self.headers.get("Range")
+            m = re.match(r"bytes=(\d*)-(\d*)", rng or "")
+            if m and (m.group(1) or m.group(2)):
+                if m.group(1):
+                    start = int(m.group(1))
+                    end = int(m.group(2)) if m.group(2) else end
+                else:
+                    start = max(0, len(data) - int(m.group(2)))
+                if start >= len(data):
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{len(data)}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                end = min(end, len(data) - 1)
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+            view = memoryview(data)[start:end + 1]
+            if state.cut():
+                # Connection dropped halfway through the body; clients resume with Range
+                self.wfile.write(view[:len(view) // 2])
+                self.close_connection = True
+                return
+            for i in range(0, len(view), 256 * 1024):
+                self.wfile.write(view[i:i + 256 * 1024])
+
+    return Handler
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Mock Airforce / AnonDrop / CDN server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8199)
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="SSE time until the URL frame")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--keepalives", type=int, default=3, help="keepalive frames before the URL frame")
+    parser.add_argument("--cdn-latency-ms", type=float, default=20.0)
+    parser.add_argument("--upload-latency-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--cut-rate", type=float, default=0.0, help="fraction of SSE streams / CDN bodies cut off midway")
+    parser.add_argument("--image-size", type=int, default=1024)
+    parser.add_argument("--video-mb", type=float, default=8.0)
+    parser.add_argument("--video-file", default="", help="serve this file for video URLs (e.g. a real MP4 fixture)")
+    parser.add_argument("--video-frames", type=int, default=0, help="serve a decodable MP4 with this many frames (needs PyAV)")
+    parser.add_argument("--verbose", action="store_true")
+    return parser
+
+
+def start_server(args):
+    """Start in a daemon thread; returns (server, state). server.server_address has the bound port."""
+    state = MockState(args)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="airforce-mock", daemon=True).start()
+    return server, state
+
+
+def main():
+    args = build_parser().parse_args()
+    server, state = start_server(args)
+    host, port = server.server_address[:2]
+    print(f"Mock server on http://{host}:{port}  (base_url http://{host}:{port}/v1)")
+    try:
+        while True:
+            time.sleep(5)
+            if args.verbose:
+                print(json.dumps(state.counters))
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
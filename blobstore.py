@@ -0,0 +1,183 @@
+"""
+In-process blob store keyed by content URL, shared by Submit and Download so each generated file crosses the network once.
+Bounded memory LRU; entries evicted from memory spill to a temp directory (itself size-bounded) instead of being dropped.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+DEFAULT_MEMORY_MB = 512
+DEFAULT_DISK_MB = 4096
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def default_spill_dir():
+    """ComfyUI temp directory /airforce_blobs (cleared by ComfyUI on start); system temp outside ComfyUI."""
+    try:
+        import folder_paths
+        base = folder_paths.get_temp_directory()
+    except Exception:
+        base = tempfile.gettempdir()
+    return os.path.join(base, "airforce_blobs")
+
+
+class BlobStore:
+    def __init__(self, max_memory_bytes, max_disk_bytes, spill_dir):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.spill_dir = spill_dir
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # url -> bytes
+        self._disk = OrderedDict()  # url -> (path, size)
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _spill_path(self, url):
+        return os.path.join(self.spill_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".blob")
+
+    def _drop_disk(self, url):
+        path, size = self._disk.pop(url)
+        self._disk_bytes -= size
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _spill(self, url, data):
+        """Move one evicted entry to disk; dropped if it cannot fit the disk budget."""
+        if len(data) > self.max_disk_bytes:
+            return
+        while self._disk and self._disk_bytes + len(data) > self.max_disk_bytes:
+            self._drop_disk(next(iter(self._disk)))
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = self._spill_path(url)
+            with open(path, "wb") as f:
+                f.write(data)
+        except OSError:
+            return
+        self._disk[url] = (path, len(data))
+        self._disk_bytes += len(data)
+
+    def put(self, url, data):
+        if not url or data is None:
+            return
+        with self._lock:
+            if url in self._memory:
+                self._memory_bytes -= len(self._memory.pop(url))
+            if url in self._disk:
+                self._drop_disk(url)
+            if len(data) > self.max_memory_bytes:
+                self._spill(url, data)
+                return
+            self._memory[url] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes:
+                old_url, old_data = self._memory.popitem(last=False)
+                self._memory_bytes -= len(old_data)
+                self._spill(old_url, old_data)
+
+    def put_file(self, url, path):
+        """Adopt a downloaded file as a spilled entry: it is moved into the spill directory (same filesystem), never
+        read into memory. The file is removed when it does not fit the disk budget."""
+        size = os.path.getsize(path)
+        with self._lock:
+            if url in self._memory:
+                self._memory_bytes -= len(self._memory.pop(url))
+            if url in self._disk:
+                self._drop_disk(url)
+            if size <= self.max_disk_bytes:
+                while self._disk and self._disk_bytes + size > self.max_disk_bytes:
+                    self._drop_disk(next(iter(self._disk)))
+                try:
+                    os.makedirs(self.spill_dir, exist_ok=True)
+                    spill_path = self._spill_path(url)
+                    os.replace(path, spill_path)
+                except OSError:
+                    pass
+                else:
+                    self._disk[url] = (spill_path, size)
+                    self._disk_bytes += size
+                    return
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def contains(self, url):
+        with self._lock:
+            return url in self._memory or url in self._disk
+
+    def get(self, url):
+        """Bytes for url (from memory or the spill file), or None."""
+        with self._lock:
+            data = self._memory.get(url)
+            if data is not None:
+                self._memory.move_to_end(url)
+                self.hits += 1
+                return data
+            entry = self._disk.get(url)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._disk.move_to_end(url)
+            path = entry[0]
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def iter_chunks(self, url, chunk_size=READ_CHUNK_SIZE):
+        """Chunks of a stored blob without materialising spilled entries in memory; None if absent."""
+        with self._lock:
+            data = self._memory.get(url)
+            entry = self._disk.get(url) if data is None else None
+            if data is None and entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        if data is not None:
+            view = memoryview(data)
+            return (bytes(view[i:i + chunk_size]) for i in range(0, len(data), chunk_size))
+
+        def _read(path):
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+
+        return _read(entry[0])
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store():
+    """Process-wide BlobStore (created on first use)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BlobStore(DEFAULT_MEMORY_MB * 1024 * 1024, DEFAULT_DISK_MB * 1024 * 1024, default_spill_dir())
+        return _store
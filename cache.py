@@ -0,0 +1,194 @@
+"""
+Persistent on-disk result cache for Submit (used when Random seed is off).
+Key: canonical hash of base_url + payload + prompt. Value: content URL, downloaded bytes and decoded tensor metadata.
+Size-bounded LRU eviction plus a TTL (default matches typical CDN URL lifetime); hit/miss stats go to debug output.
+"""
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+DEFAULT_CACHE_MAX_MB = 1024
+DEFAULT_CACHE_TTL_HOURS = 24.0
+# Hits only touch access times in memory; the index is written on put / eviction, or at most this often on hits
+INDEX_FLUSH_SECONDS = 30.0
+
+
+def default_cache_dir():
+    """ComfyUI user directory /airforce_cache; ~/.cache/airforce_cache outside ComfyUI."""
+    try:
+        import folder_paths
+        base = folder_paths.get_user_directory()
+    except Exception:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "airforce_cache")
+
+
+def request_key(config, payload, prompt):
+    """Canonical sha256 of (base_url, payload, prompt); key order and whitespace do not matter."""
+    canon = json.dumps(
+        {"base_url": config.get("base_url", ""), "payload": payload, "prompt": prompt},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Directory of <key>.bin blobs plus an index.json with url, size, created/accessed times and metadata."""
+
+    def __init__(self, directory, max_bytes, ttl_seconds):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._index = None
+        self._dirty = False  # access times changed since the index was last written
+        self._saved = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _index_path(self):
+        return os.path.join(self.directory, "index.json")
+
+    def _blob_path(self, key):
+        return os.path.join(self.directory, key + ".bin")
+
+    def _load(self):
+        if self._index is None:
+            try:
+                with open(self._index_path(), "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except Exception:
+                self._index = {}
+        return self._index
+
+    def _save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self._index_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self._index_path())
+        self._dirty = False
+        self._saved = time.monotonic()
+
+    def flush(self):
+        """Write access times recorded by hits since the last save (also run at exit)."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _drop(self, key):
+        self._index.pop(key, None)
+        try:
+            os.remove(self._blob_path(key))
+        except OSError:
+            pass
+
+    def get(self, key):
+        """(url, raw_bytes, meta) for a live entry, else None. Expired or unreadable entries are dropped."""
+        with self._lock:
+            index = self._load()
+            entry = index.get(key)
+            now = time.time()
+            if entry is not None and now - entry["created"] > self.ttl_seconds:
+                self._drop(key)
+                self._save()
+                entry = None
+            raw_bytes = None
+            if entry is not None:
+                try:
+                    with open(self._blob_path(key), "rb") as f:
+                        raw_bytes = f.read()
+                except OSError:
+                    self._drop(key)
+                    self._save()
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            entry["accessed"] = now
+            self._dirty = True
+            if time.monotonic() - self._saved >= INDEX_FLUSH_SECONDS:
+                self._save()
+            self.hits += 1
+            return (entry["url"], raw_bytes, entry.get("meta") or {})
+
+    def put(self, key, url, raw_bytes, meta=None):
+        """Store an entry, then evict least recently used entries until the cache fits max_bytes."""
+        if len(raw_bytes) > self.max_bytes:
+            return
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = self._blob_path(key) + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(raw_bytes)
+            self._commit(key, url, tmp, len(raw_bytes), meta)
+
+    def put_file(self, key, url, path, meta=None):
+        """put() for content already on disk (e.g. a streamed video): the file is copied, not read into memory."""
+        size = os.path.getsize(path)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = self._blob_path(key) + ".tmp"
+            shutil.copyfile(path, tmp)
+            self._commit(key, url, tmp, size, meta)
+
+    def _commit(self, key, url, tmp, size, meta):
+        index = self._load()
+        os.replace(tmp, self._blob_path(key))
+        now = time.time()
+        index[key] = {"url": url, "size": size, "created": now, "accessed": now, "meta": meta or {}}
+        total = sum(e["size"] for e in index.values())
+        for old_key in sorted(index, key=lambda k: index[k]["accessed"]):
+            if total <= self.max_bytes:
+                break
+            if old_key == key:
+                continue
+            total -= index[old_key]["size"]
+            self._drop(old_key)
+            self.evictions += 1
+        self._save()
+
+    def stats(self):
+        with self._lock:
+            index = self._load()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(index),
+                "bytes": sum(e["size"] for e in index.values()),
+            }
+
+    def stats_line(self):
+        s = self.stats()
+        return f"Result cache: hits={s['hits']} misses={s['misses']} evictions={s['evictions']} entries={s['entries']} bytes={s['bytes']}"
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_result_cache(config):
+    """Process-wide ResultCache (one per directory) using the config's size/TTL; None when disabled (cache_max_mb = 0)."""
+    max_mb = config.get("cache_max_mb")
+    max_mb = DEFAULT_CACHE_MAX_MB if max_mb is None else int(max_mb)
+    if max_mb <= 0:
+        return None
+    ttl_hours = float(config.get("cache_ttl_hours") or DEFAULT_CACHE_TTL_HOURS)
+    directory = default_cache_dir()
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = ResultCache(directory, 0, 0)
+            _caches[directory] = cache
+            atexit.register(cache.flush)
+        cache.max_bytes = max_mb * 1024 * 1024
+        cache.ttl_seconds = ttl_hours * 3600
+    return cache
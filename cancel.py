@@ -0,0 +1,204 @@
+"""
+Cooperative cancellation: network stages run inside cancel_scope(stage). A watchdog thread polls ComfyUI's interrupt
+flag (Cancel button) while any scope is open and aborts the open scopes: SSE tasks are cancelled on the engine loop,
+blocked socket reads are shut down, and loops stop at their next chunk. The stage then raises ComfyUI's
+InterruptProcessingException, so the executor treats it like any interrupted node. Time from detecting the interrupt
+to the stage having closed its socket / removed its partial file is recorded per stage (cancellation latency).
+Outside ComfyUI nothing is ever interrupted.
+"""
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# How often the watchdog checks the interrupt flag (upper bound on detection delay), and how long a cancelled
+# SSE task may take to close before the caller stops waiting for it
+CANCEL_POLL_INTERVAL = 0.2
+CANCEL_GRACE = 5.0
+LATENCY_WINDOW = 200
+
+
+class Interrupted(Exception):
+    """Raised for a cancelled stage when ComfyUI's InterruptProcessingException is not available."""
+
+
+def _model_management():
+    # Only look at the module ComfyUI already imported; never import it (and torch) from here
+    return sys.modules.get("comfy.model_management")
+
+
+def interrupted():
+    """True while ComfyUI's interrupt flag is set (Cancel / Interrupt); False outside ComfyUI."""
+    mm = _model_management()
+    try:
+        return bool(mm is not None and mm.processing_interrupted())
+    except Exception:
+        return False
+
+
+def interrupt_exception_class():
+    mm = _model_management()
+    return getattr(mm, "InterruptProcessingException", None) or Interrupted
+
+
+def is_interrupt(exc):
+    return isinstance(exc, (Interrupted, interrupt_exception_class()))
+
+
+def raise_if_interrupted():
+    """Raise the interrupt exception now if the user cancelled (for loops outside a scope, e.g. before a request)."""
+    if interrupted():
+        raise interrupt_exception_class()()
+
+
+class CancelScope:
+    """One cancellable network stage. on_abort(fn) registers how to tear it down; check() raises once cancelled."""
+
+    def __init__(self, stage, enabled=True):
+        self.stage = stage
+        self.enabled = enabled
+        self.cancelled_at = None
+        self._lock = threading.Lock()
+        self._aborts = []
+
+    @property
+    def cancelled(self):
+        return self.cancelled_at is not None
+
+    def on_abort(self, fn):
+        """Call fn when the scope is cancelled (immediately if it already is). Returns a function that unregisters it."""
+        with self._lock:
+            run_now = self.cancelled
+            if not run_now:
+                self._aborts.append(fn)
+        if run_now:
+            _call_quietly(fn)
+
+        def remove():
+            with self._lock:
+                if fn in self._aborts:
+                    self._aborts.remove(fn)
+        return remove
+
+    def cancel(self):
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled_at = time.perf_counter()
+            aborts, self._aborts = self._aborts, []
+        for fn in aborts:
+            _call_quietly(fn)
+
+    def poll(self):
+        if self.enabled and not self.cancelled and interrupted():
+            self.cancel()
+        return self.cancelled
+
+    def check(self):
+        """Raise the interrupt exception if the user cancelled (polls the flag itself, so loops react within a chunk)."""
+        if self.poll():
+            raise interrupt_exception_class()()
+
+
+def _call_quietly(fn):
+    try:
+        fn()
+    except Exception:
+        pass
+
+
+class _Watchdog:
+    """Single daemon thread that polls the interrupt flag while any scope is open."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scopes = set()
+        self._thread = None
+
+    def add(self, scope):
+        with self._lock:
+            self._scopes.add(scope)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="airforce-cancel", daemon=True)
+                self._thread.start()
+
+    def discard(self, scope):
+        with self._lock:
+            self._scopes.discard(scope)
+
+    def _run(self):
+        while True:
+            time.sleep(CANCEL_POLL_INTERVAL)
+            with self._lock:
+                scopes = list(self._scopes)
+                if not scopes:
+                    self._thread = None
+                    return
+            if interrupted():
+                for scope in scopes:
+                    scope.poll()
+
+
+_watchdog = _Watchdog()
+
+
+class _CancelStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}  # stage -> deque of seconds
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self._samples.setdefault(stage, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def summary(self):
+        """{stage: {"count", "p50_s", "max_s"}} over the last LATENCY_WINDOW cancellations per stage."""
+        with self._lock:
+            out = {}
+            for stage, samples in self._samples.items():
+                ordered = sorted(samples)
+                out[stage] = {
+                    "count": len(ordered),
+                    "p50_s": round(ordered[len(ordered) // 2], 4),
+                    "max_s": round(ordered[-1], 4),
+                }
+            return out
+
+
+_stats = _CancelStats()
+
+
+def cancel_stats():
+    return _stats.summary()
+
+
+def stats_line():
+    parts = [f"{stage} n={s['count']} p50={s['p50_s']}s max={s['max_s']}s" for stage, s in cancel_stats().items()]
+    return "Cancellation latency: " + ("; ".join(parts) if parts else "none")
+
+
+@contextmanager
+def cancel_scope(stage, timer=None, enabled=True):
+    """
+    Run a network stage cancellably. Errors raised after the scope was cancelled (closed sockets, cancelled futures)
+    become the interrupt exception; on exit the cancellation latency goes to the per-stage stats and, with a
+    StageTimer, to its cancel_latency stage. enabled=False gives a scope that never cancels (background work).
+    """
+    scope = CancelScope(stage, enabled)
+    if enabled:
+        scope.check()
+        _watchdog.add(scope)
+    try:
+        yield scope
+    except BaseException as e:
+        if scope.cancelled and not is_interrupt(e):
+            raise interrupt_exception_class()() from e
+        raise
+    finally:
+        _watchdog.discard(scope)
+        if scope.cancelled:
+            latency = time.perf_counter() - scope.cancelled_at
+            _stats.record(stage, latency)
+            if timer is not None:
+                timer.add("cancel_latency", latency)
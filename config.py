@@ -1,5 +1,9 @@
 # Config and constants
 
+from .cache import DEFAULT_CACHE_MAX_MB, DEFAULT_CACHE_TTL_HOURS
+from .session import DEFAULT_POOL_SIZE, DEFAULT_MAX_RETRIES, DEFAULT_BACKOFF_FACTOR, DEFAULT_CONNECT_TIMEOUT
+from .sse import DEFAULT_FIRST_FRAME_TIMEOUT, DEFAULT_STALL_TIMEOUT
+
 # Aspect ratio presets shared by param nodes (width:height)
 ASPECT_RATIO_PRESETS = [
     "1:1",
@@ -13,20 +17,177 @@ ASPECT_RATIO_PRESETS = [
     "16:10", "10:16",
 ]
 
-# Per-series: models = allowed model names, payload_keys = fields exposed in nodes
+# Declarative params schema, one entry per Params node (compiled once by params.py into INPUT_TYPES, validators
+# and payload builders). fields: name (widget), type choice/int/bool/string, payload key ("key", default = name;
+# None = widget only), default, choices ("aspect_ratios" = ASPECT_RATIO_PRESETS), min/max/step (int, clamped and
+# snapped down to step), when (only sent if that bool field is on), empty (value sent for blank strings).
+# derived: payload values formatted from widget values. references: reference_urls input (max URLs, payload key,
+# single = first URL only). priority: scheduler class of the series' requests (default interactive; see scheduler.py).
+# More series / models can be added from JSON (see params.extra_model_files).
 MODEL_REGISTRY = {
     "nano": {
+        "class": "AirforceNanoParams",
+        "display": "🎨 NanoBanana",
         "models": ["nano-banana-pro"],
-        "payload_keys": ["model", "n", "size", "aspectRatio", "resolution"],
+        "fields": [
+            {"name": "aspectRatio", "type": "choice", "choices": "aspect_ratios", "default": "1:1"},
+            {"name": "resolution", "type": "choice", "choices": ["1k", "2k", "4k"], "default": "1k"},
+        ],
+        "references": {"max": 8, "key": "image_urls"},
+    },
+    "flux_pro_flex": {
+        "class": "AirforceFluxProFlexParams",
+        "display": "🎨 Flux Pro/Flex",
+        "doc": "Flux Pro / Flex: aspectRatio + resolution (1k/2k), reference images max 8.",
+        "models": ["flux-2-pro", "flux-2-flex"],
+        "fields": [
+            {"name": "aspectRatio", "type": "choice", "choices": "aspect_ratios", "default": "1:1"},
+            {"name": "resolution", "type": "choice", "choices": ["1k", "2k"], "default": "1k"},
+        ],
+        "references": {"max": 8, "key": "image_urls"},
+    },
+    "flux_dev_klein": {
+        "class": "AirforceFluxDevKleinParams",
+        "display": "🎨 Flux Dev/Klein",
+        "doc": "Flux Dev / Klein: width and height in pixels, reference images max 4.",
+        "models": ["flux-2-dev", "flux-2-klein-9b", "flux-2-klein-4b"],
+        "fields": [
+            {"name": "width", "type": "int", "key": None, "default": 1024, "min": 256, "max": 2048, "step": 8},
+            {"name": "height", "type": "int", "key": None, "default": 1024, "min": 256, "max": 2048, "step": 8},
+        ],
+        "derived": {"aspectRatio": "{width}:{height}"},
+        "references": {"max": 4, "key": "image_urls"},
+    },
+    "z_image": {
+        "class": "AirforceZImageParams",
+        "display": "🎨 Z-Image",
+        "models": ["z-image"],
+        "fields": [
+            {"name": "aspectRatio", "type": "choice", "choices": "aspect_ratios", "default": "16:9"},
+        ],
+    },
+    "imagen": {
+        "class": "AirforceImagenParams",
+        "display": "🎨 Imagen",
+        "models": ["imagen-3", "imagen-4"],
+        "default_model": "imagen-4",
+    },
+    "seedream": {
+        "class": "AirforceSeedreamParams",
+        "display": "🎨 Seedream",
+        "doc": "Seedream image params; reference images max 14.",
+        "models": ["seedream-4.5"],
+        "fields": [
+            {"name": "aspectRatio", "type": "choice", "choices": "aspect_ratios", "default": "1:1"},
+            {"name": "quality", "type": "choice", "choices": ["high", "basic"], "default": "high"},
+        ],
+        "references": {"max": 14, "key": "image_urls"},
+    },
+    "suno": {
+        "class": "AirforceSunoParams",
+        "display": "🎬 Suno",
+        "doc": "Suno video params; style is used when custom mode is on. Order: model, instrumental, custom mode, style.",
+        "models": ["suno-v5", "suno-4.5"],
+        "priority": "background",
+        "fields": [
+            {"name": "instrumental", "type": "bool", "default": True, "label_on": "Instrumental", "label_off": "With vocals"},
+            {"name": "custom_mode", "type": "bool", "key": "custom", "default": True, "label_on": "On", "label_off": "Off"},
+            {"name": "style", "type": "string", "default": "", "when": "custom_mode", "empty": "default",
+             "placeholder": "Style (used when custom mode is on)"},
+        ],
+    },
+    "grok_imagine_video": {
+        "class": "AirforceGrokImagineVideoParams",
+        "display": "🎬 Grok Imagine",
+        "doc": "Grok Imagine Video params; aspect 1:1/2:3/3:2 only; up to 2 reference images.",
+        "models": ["grok-imagine-video"],
+        "priority": "background",
+        "fields": [
+            {"name": "aspectRatio", "type": "choice", "choices": ["1:1", "2:3", "3:2"], "default": "2:3"},
+            {"name": "mode", "type": "choice", "choices": ["normal", "spicy", "fun"], "default": "spicy"},
+        ],
+        "references": {"max": 2, "key": "image_urls"},
     },
-    "flux": {
-        "models": ["flux-2-pro", "flux-2-dev", "flux-2-flex", "flux-2-klein-9b", "flux-2-klein-4b"],
-        "payload_keys": ["model", "n", "size", "aspectRatio", "resolution"],
+    "veo": {
+        "class": "AirforceVeoParams",
+        "display": "🎬 Veo",
+        "doc": "Veo video params; prompt only, no other controls or reference images.",
+        "models": ["veo-3.1-fast"],
+        "priority": "background",
+    },
+    "wan": {
+        "class": "AirforceWanParams",
+        "display": "🎬 Wan",
+        "doc": "Wan-2.6 video params; one reference image via wan_image_url.",
+        "models": ["wan-2.6"],
+        "priority": "background",
+        "fields": [
+            {"name": "aspectRatio", "type": "choice", "choices": ["16:9", "9:16"], "default": "16:9"},
+            {"name": "duration", "type": "choice", "choices": [5, 10, 15], "default": 15},
+            {"name": "resolution", "type": "choice", "choices": ["1080P", "720P"], "default": "1080P"},
+            {"name": "sound", "type": "bool", "default": True, "label_on": "On", "label_off": "Off"},
+        ],
+        "references": {"max": 1, "key": "wan_image_url", "single": True, "placeholder": "From AnonDrop Upload, one URL per line, first used"},
     },
 }
 
-# Flux Pro/Flex use ratio+resolution; Klein/Dev use width/height
-FLUX_PRO_FLEX = ("flux-2-pro", "flux-2-flex")
+# Sent with every generation request
+PAYLOAD_DEFAULTS = {"n": 1, "size": "1024x1024", "response_format": "url"}
+
+# Max in-flight generation requests per endpoint (base_url + key) across batch/parallel submits
+DEFAULT_MAX_CONCURRENCY = 4
+
+# How requests are spread over several keys / endpoints (see keypool.py)
+DISPATCH_MODES = ["round_robin", "least_loaded"]
+
+# Scheduler priority classes, highest first (see scheduler.py); auto = the Params series' class
+PRIORITY_CLASSES = ["interactive", "normal", "background"]
+PRIORITY_MODES = ["auto"] + PRIORITY_CLASSES
+
+
+def parse_endpoints(base_url, api_key, extra_endpoints):
+    """
+    Primary base_url/api_key plus one extra per line: "sk-..." (same base_url) or "https://host/v1 sk-...".
+    An optional last number caps that endpoint's parallel requests (instead of max_concurrency): "sk-... 2".
+    """
+    endpoints = [{"base_url": base_url, "api_key": api_key}]
+    for line in (extra_endpoints or "").splitlines():
+        parts = line.replace("|", " ").split()
+        if not parts or parts[0].startswith("#"):
+            continue
+        limit = None
+        if len(parts) >= 2 and parts[-1].isdigit():
+            limit = int(parts.pop())
+        if len(parts) >= 2 and "://" in parts[0]:
+            entry = {"base_url": parts[0].rstrip("/"), "api_key": parts[1]}
+        else:
+            entry = {"base_url": base_url, "api_key": parts[0]}
+        if entry not in [{"base_url": e["base_url"], "api_key": e["api_key"]} for e in endpoints]:
+            if limit:
+                entry["limit"] = limit
+            endpoints.append(entry)
+    return endpoints
+
+
+def parse_model_limits(text):
+    """
+    {model or glob pattern: max parallel requests} from "model=N" lines, e.g. "wan-2.6=2" or "veo-*=1".
+    N must be at least 1 (there is no "blocked" limit); ValueError names the offending line.
+    """
+    limits = {}
+    for line in (text or "").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if "=" not in line:
+            continue
+        name, _, value = line.partition("=")
+        try:
+            limit = int(value.strip())
+        except ValueError:
+            continue
+        if limit < 1:
+            raise ValueError(f"model_limits: '{line}' must allow at least 1 parallel request")
+        limits[name.strip()] = limit
+    return limits
 
 
 class AirforceConfig:
@@ -40,6 +201,20 @@ class AirforceConfig:
             "optional": {
                 "anondrop_key": ("STRING", {"default": "", "placeholder": "AnonDrop API Key (for reference upload)"}),
                 "anondrop_base_url": ("STRING", {"default": "https://anondrop.net", "placeholder": "AnonDrop base URL"}),
+                "pool_size": ("INT", {"default": DEFAULT_POOL_SIZE, "min": 1, "max": 100, "tooltip": "Keep-alive connections per host"}),
+                "max_retries": ("INT", {"default": DEFAULT_MAX_RETRIES, "min": 0, "max": 10, "tooltip": "Submit: retries failed connects and 5xx only (a started stream may be billed); downloads: retries resets and 5xx, resuming with Range"}),
+                "backoff_factor": ("FLOAT", {"default": DEFAULT_BACKOFF_FACTOR, "min": 0.0, "max": 10.0, "step": 0.1}),
+                "connect_timeout": ("FLOAT", {"default": DEFAULT_CONNECT_TIMEOUT, "min": 1.0, "max": 120.0, "step": 1.0}),
+                "max_concurrency": ("INT", {"default": DEFAULT_MAX_CONCURRENCY, "min": 1, "max": 64, "tooltip": "Max parallel generation requests per key / endpoint"}),
+                "cache_max_mb": ("INT", {"default": DEFAULT_CACHE_MAX_MB, "min": 0, "max": 1048576, "tooltip": "On-disk result cache size for fixed-seed Submit (0 = off)"}),
+                "cache_ttl_hours": ("FLOAT", {"default": DEFAULT_CACHE_TTL_HOURS, "min": 0.1, "max": 8760.0, "step": 0.5, "tooltip": "Keep cached results no longer than the CDN URLs stay valid"}),
+                "extra_endpoints": ("STRING", {"default": "", "multiline": True, "placeholder": "More keys, one per line: sk-... or https://host/v1 sk-..."}),
+                "dispatch": (DISPATCH_MODES, {"default": "round_robin", "tooltip": "How requests are spread over keys; 429s fail over to another key"}),
+                "ledger": ("BOOLEAN", {"default": True, "tooltip": "Record every Submit / Download in the local generation ledger (SQLite)"}),
+                "model_limits": ("STRING", {"default": "", "multiline": True, "placeholder": "Max parallel requests per model (at least 1), one per line: wan-2.6=2, veo-*=1"}),
+                "priority": (PRIORITY_MODES, {"default": "auto", "tooltip": "Scheduler class for this config's requests; auto = image models interactive, video/audio background"}),
+                "first_frame_timeout": ("FLOAT", {"default": DEFAULT_FIRST_FRAME_TIMEOUT, "min": 0.0, "max": 3600.0, "step": 5.0, "tooltip": "Fail a request whose SSE stream sends no frame within this many seconds (0 = off)"}),
+                "stall_timeout": ("FLOAT", {"default": DEFAULT_STALL_TIMEOUT, "min": 0.0, "max": 3600.0, "step": 5.0, "tooltip": "Fail a stream that then sends no frame or keepalive for this many seconds (0 = off)"}),
             }
         }
 
@@ -48,11 +223,39 @@ class AirforceConfig:
     FUNCTION = "setup"
     CATEGORY = "🚀Airforce/Modular"
 
-    def setup(self, base_url, api_key, anondrop_key="", anondrop_base_url="https://anondrop.net"):
+    def setup(self, base_url, api_key, anondrop_key="", anondrop_base_url="https://anondrop.net",
+              pool_size=DEFAULT_POOL_SIZE, max_retries=DEFAULT_MAX_RETRIES,
+              backoff_factor=DEFAULT_BACKOFF_FACTOR, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+              max_concurrency=DEFAULT_MAX_CONCURRENCY, cache_max_mb=DEFAULT_CACHE_MAX_MB,
+              cache_ttl_hours=DEFAULT_CACHE_TTL_HOURS, extra_endpoints="", dispatch="round_robin",
+              ledger=True, model_limits="", priority="auto", first_frame_timeout=DEFAULT_FIRST_FRAME_TIMEOUT,
+              stall_timeout=DEFAULT_STALL_TIMEOUT):
+        base_url = base_url.strip().rstrip("/")
+        api_key = api_key.strip()
         cfg = {
-            "base_url": base_url.strip().rstrip("/"),
-            "api_key": api_key.strip(),
+            "base_url": base_url,
+            "api_key": api_key,
             "anondrop_key": (anondrop_key or "").strip(),
             "anondrop_base_url": (anondrop_base_url or "https://anondrop.net").strip().rstrip("/"),
+            # HTTP session policy (see session.py)
+            "pool_size": int(pool_size),
+            "max_retries": int(max_retries),
+            "backoff_factor": float(backoff_factor),
+            "connect_timeout": float(connect_timeout),
+            "max_concurrency": int(max_concurrency),
+            # Result cache (see cache.py)
+            "cache_max_mb": int(cache_max_mb),
+            "cache_ttl_hours": float(cache_ttl_hours),
+            # Key / endpoint pool (see keypool.py); base_url/api_key above is the first entry
+            "endpoints": parse_endpoints(base_url, api_key, extra_endpoints),
+            "dispatch": dispatch if dispatch in DISPATCH_MODES else "round_robin",
+            # Generation ledger (see ledger.py)
+            "ledger": bool(ledger),
+            # Scheduler (see scheduler.py)
+            "model_limits": parse_model_limits(model_limits),
+            "priority": priority if priority in PRIORITY_MODES else "auto",
+            # SSE stall detection (see sse.StreamWatch)
+            "first_frame_timeout": float(first_frame_timeout),
+            "stall_timeout": float(stall_timeout),
         }
         return (cfg,)
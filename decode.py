@@ -0,0 +1,67 @@
+"""
+Fused image decode: bytes -> float32 IMAGE tensor (1,H,W,3) with one uint8 intermediate.
+The output tensor is allocated once (optionally pinned or in shared memory) and filled in place.
+No package-relative imports, so benchmarks/bench_decode.py can load this file directly.
+numpy / torch / Pillow are imported on first decode, so node registration does not load them.
+"""
+import warnings
+from contextlib import nullcontext
+from io import BytesIO
+
+TENSOR_MEMORY_MODES = ["default", "pinned", "shared"]
+
+
+def _alloc(shape, memory):
+    import torch
+
+    if memory == "pinned" and torch.cuda.is_available():
+        return torch.empty(shape, dtype=torch.float32, pin_memory=True)
+    out = torch.empty(shape, dtype=torch.float32)
+    if memory == "shared":
+        out.share_memory_()  # moving an empty tensor is cheap; it is filled afterwards
+    return out
+
+
+def decode_image_to_tensor(raw_bytes, max_side=0, memory="default", timer=None):
+    """
+    Decode image bytes into a float32 (1,H,W,3) tensor in 0-1.
+    max_side > 0 lets JPEG decode at reduced DCT scale (Image.draft; result is at least max_side on the long edge).
+    memory: default, pinned (page-locked, faster .cuda()), or shared (zero-copy to worker processes).
+    Raises on undecodable data (callers treat that as video). timer: optional StageTimer (image_decode, tensor_convert).
+    """
+    import numpy as np
+    import torch
+    from PIL import Image
+
+    stage = timer.stage if timer is not None else (lambda _name: nullcontext())
+    with stage("image_decode"):
+        img = Image.open(BytesIO(raw_bytes))
+        if max_side and img.format == "JPEG" and max(img.size) > max_side:
+            scale = max_side / float(max(img.size))
+            img.draft("RGB", (max(1, int(img.size[0] * scale)), max(1, int(img.size[1] * scale))))
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img.load()
+    with stage("tensor_convert"):
+        w, h = img.size
+        out = _alloc((1, h, w, 3), memory)
+        # The single intermediate: PIL's packed uint8 pixels, viewed read-only by numpy/torch
+        u8 = np.asarray(img)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)  # read-only numpy view; never written
+            src = torch.from_numpy(u8)
+        out[0].copy_(src)
+        out.mul_(1.0 / 255.0)
+        del img, u8, src
+    return out
+
+
+def decode_image_legacy(raw_bytes):
+    """Previous Submit path (convert -> np.array -> astype -> /255 -> from_numpy), kept for benchmarks."""
+    import numpy as np
+    import torch
+    from PIL import Image
+
+    img = Image.open(BytesIO(raw_bytes)).convert("RGB")
+    img_np = np.array(img).astype(np.float32) / 255.0
+    return torch.from_numpy(img_np).unsqueeze(0)
@@ -1,14 +1,25 @@
 """
-Download node: fetches from Submit's url and saves locally.
-Widgets: directory (default ComfyUI output), filename prefix (default ComfyUI).
+Download nodes: stream Submit's url (or a list of urls) to disk and save locally.
+Widgets: directory (default ComfyUI output), filename prefix (default ComfyUI), save format / quality.
 """
+import glob
+import hashlib
+import json
 import os
 import re
-import requests
-from io import BytesIO
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-from PIL import Image
+from .blobstore import get_blob_store
+from .cancel import is_interrupt
+from .ledger import get_ledger
+from .retry import fetch_resumable
+from .session import host_key
+from .singleflight import get_flight
 
 
 def _safe_filename_prefix(prefix):
@@ -19,21 +30,49 @@ def _safe_filename_prefix(prefix):
     return s[:64] if len(s) > 64 else s or "ComfyUI"
 
 
-def download_and_save(url, directory, filename_prefix):
-    """
-    Download from url and save as image or video. Uses ComfyUI output dir when directory is empty.
-    Returns (saved_path, error_msg). error_msg is None on success.
-    """
-    if not url or not str(url).strip():
-        return ("", "URL is empty")
+# Streamed in chunks of this size; peak memory per download is one chunk
+CHUNK_SIZE = 1024 * 1024
+
+_CONTENT_TYPE_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/webp": "webp",
+    "image/gif": "gif",
+    "video/mp4": "mp4",
+    "video/quicktime": "mp4",
+    "video/webm": "webm",
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+}
+
+IMAGE_EXTENSIONS = ("png", "jpg", "webp", "gif")
+
+# Download save formats: original = bytes as delivered; the rest re-encode images
+SAVE_FORMATS = ["original", "png", "jpeg", "webp"]
+SAVE_FORMAT_EXTENSIONS = {"png": "png", "jpeg": "jpg", "webp": "webp"}
+
+
+def sniff_extension(head, content_type=""):
+    """File extension from the first bytes (magic numbers), falling back to the Content-Type header; None if unknown."""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[4:8] == b"ftyp":
+        return "mp4"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "webm"
+    if head.startswith(b"ID3") or (len(head) > 1 and head[0] == 0xFF and (head[1] & 0xE0) == 0xE0):
+        return "mp3"
+    ctype = (content_type or "").split(";")[0].strip().lower()
+    return _CONTENT_TYPE_EXTENSIONS.get(ctype)
 
-    try:
-        resp = requests.get(url, timeout=60, stream=True)
-        resp.raise_for_status()
-        raw_bytes = resp.content
-    except Exception as e:
-        return ("", f"Download failed: {e}")
 
+def _output_dir(directory):
     try:
         import folder_paths
         base_dir = (directory and str(directory).strip()) or folder_paths.get_output_directory()
@@ -41,31 +80,163 @@ def download_and_save(url, directory, filename_prefix):
         base_dir = directory and str(directory).strip() or os.path.expanduser("~")
     base_dir = os.path.normpath(base_dir)
     os.makedirs(base_dir, exist_ok=True)
+    return base_dir
 
-    prefix = _safe_filename_prefix(filename_prefix)
-    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    # Try image first, save as png on success
+def _remove_quietly(path):
     try:
-        img = Image.open(BytesIO(raw_bytes)).convert("RGB")
-        out_path = os.path.join(base_dir, f"{prefix}_{stamp}.png")
-        img.save(out_path)
-        return (out_path, None)
-    except Exception:
+        os.remove(path)
+    except OSError:
         pass
 
-    # Otherwise save as mp4
+
+def _reencode(src_path, out_path, save_format, quality):
+    """Decode an image file and write it as png/jpeg/webp; alpha is kept where the target supports it."""
+    from PIL import Image
+
+    with Image.open(src_path) as img:
+        if save_format == "jpeg":
+            img.convert("RGB").save(out_path, format="JPEG", quality=quality, optimize=True)
+        elif save_format == "webp":
+            img = img if img.mode in ("RGB", "RGBA") else img.convert("RGBA" if "A" in img.getbands() else "RGB")
+            img.save(out_path, format="WEBP", quality=quality, method=4)
+        else:
+            img = img if img.mode in ("RGB", "RGBA", "L", "LA") else img.convert("RGBA" if "A" in img.getbands() else "RGB")
+            img.save(out_path, format="PNG", compress_level=6)
+
+
+def url_name_hash(url, length=12):
+    """Short stable hash of a url; filenames built from it never collide across urls and repeat for the same url."""
+    return hashlib.sha1(str(url).strip().encode("utf-8")).hexdigest()[:length]
+
+
+def _fetch_to_part(url, base_dir, config=None):
+    """
+    Stream url into a new .part file in base_dir: from the blob store or Previewer media cache when present, else the
+    network (interrupted transfers resume with Range, see retry.fetch_resumable).
+    Returns (tmp_path, content_type, head, stats); the .part file is removed on failure.
+    """
+    stats = {"bytes": 0, "retries": 0, "resumed_bytes": 0}
+    fd, tmp_path = tempfile.mkstemp(prefix=".airforce_", suffix=".part", dir=base_dir)
+    content_type = ""
+    try:
+        with os.fdopen(fd, "w+b") as f:
+            # Already fetched by Submit in this process: copy from the blob store instead of the CDN
+            stored = get_blob_store().iter_chunks(url, CHUNK_SIZE)
+            if stored is not None:
+                stats["source"] = "blob_store"
+            else:
+                # Cached for the Previewer (media_proxy imports this module, hence the local import)
+                from .media_proxy import get_media_cache
+                stored = get_media_cache().iter_chunks(url, CHUNK_SIZE)
+                stats["source"] = "media_cache" if stored is not None else "network"
+            if stored is not None:
+                for chunk in stored:
+                    f.write(chunk)
+                    stats["bytes"] += len(chunk)
+            else:
+                stats["bytes"], content_type = fetch_resumable(url, f, config, stats=stats, chunk_size=CHUNK_SIZE)
+            f.seek(0)
+            head = f.read(16)
+    except Exception:
+        _remove_quietly(tmp_path)
+        raise
+    return (tmp_path, content_type, head, stats)
+
+
+def _fork_part(fetched):
+    """Copy of a fetched .part for one single-flight waiter (hard link when possible; the leader renames its own)."""
+    tmp_path, content_type, head, stats = fetched
+    fd, copy_path = tempfile.mkstemp(prefix=".airforce_", suffix=".part", dir=os.path.dirname(tmp_path))
+    os.close(fd)
+    try:
+        os.remove(copy_path)
+        os.link(tmp_path, copy_path)
+    except OSError:
+        shutil.copyfile(tmp_path, copy_path)
+    return (copy_path, content_type, head, dict(stats))
+
+
+def _adopt_part(tmp_path, base_dir):
+    """Move a waiter's .part into its own output directory (the leader may save elsewhere)."""
+    if os.path.dirname(tmp_path) == base_dir:
+        return tmp_path
+    fd, own_path = tempfile.mkstemp(prefix=".airforce_", suffix=".part", dir=base_dir)
+    os.close(fd)
+    try:
+        shutil.move(tmp_path, own_path)
+    except Exception:
+        _remove_quietly(tmp_path)
+        _remove_quietly(own_path)
+        raise
+    return own_path
+
+
+def download_and_save(url, directory, filename_prefix, save_format="original", quality=95, config=None, name=None):
+    """
+    Stream url to a temp file, detect the type from the first bytes / Content-Type, then atomically rename.
+    save_format "original" writes the bytes as-is with the detected extension (no decode, alpha/metadata kept);
+    "png"/"jpeg"/"webp" re-encode images only (video/audio is always kept as-is). Unknown content is saved as MP4.
+    Uses ComfyUI output dir when directory is empty. Files are named {prefix}_{YYYYmmdd_HHMMSS}_{url hash}.{ext},
+    or {name}.{ext} when name is given.
+    Network transfers retry transient failures and resume from the partial file (config: max_retries / backoff_factor);
+    concurrent downloads of the same url share one transfer (stats source "coalesced"). ComfyUI's Cancel aborts the
+    transfer, removes the partial file and raises the interrupt exception.
+    Returns (saved_path, error_msg, stats). error_msg is None on success; stats has bytes, per-stage seconds,
+    retries and resumed_bytes.
+    """
+    stats = {"bytes": 0, "download_s": 0.0, "save_s": 0.0, "mode": "passthrough", "retries": 0, "resumed_bytes": 0}
+    if not url or not str(url).strip():
+        return ("", "URL is empty", stats)
+
+    try:
+        base_dir = _output_dir(directory)
+    except Exception as e:
+        return ("", f"Save failed: {e}", stats)
+
+    start = time.perf_counter()
+    try:
+        # Identical downloads running at the same time share one transfer; each caller gets its own .part file
+        (tmp_path, content_type, head, fetch_stats), shared = get_flight("download").do(
+            str(url).strip(), lambda: _fetch_to_part(url, base_dir, config), fork=_fork_part)
+        stats.update(fetch_stats)
+        if shared:
+            stats["source"] = "coalesced"
+            tmp_path = _adopt_part(tmp_path, base_dir)
+    except Exception as e:
+        if is_interrupt(e):
+            raise  # cancelled in ComfyUI; the .part file is already removed
+        return ("", f"Download failed: {e}", stats)
+    stats["download_s"] = round(time.perf_counter() - start, 4)
+
+    if name is None:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        name = f"{_safe_filename_prefix(filename_prefix)}_{stamp}_{url_name_hash(url, 8)}"
+    ext = sniff_extension(head, content_type) or "mp4"
+
+    start = time.perf_counter()
     try:
-        out_path = os.path.join(base_dir, f"{prefix}_{stamp}.mp4")
-        with open(out_path, "wb") as f:
-            f.write(raw_bytes)
-        return (out_path, None)
+        if ext not in IMAGE_EXTENSIONS or save_format == "original":
+            out_path = os.path.join(base_dir, f"{name}.{ext}")
+            os.replace(tmp_path, out_path)
+            # rename() is a no-op when both names are hard links to one file (coalesced save to the same path)
+            _remove_quietly(tmp_path)
+        else:
+            stats["mode"] = "reencode"
+            out_ext = SAVE_FORMAT_EXTENSIONS[save_format]
+            out_path = os.path.join(base_dir, f"{name}.{out_ext}")
+            _reencode(tmp_path, out_path, save_format, int(quality))
+            _remove_quietly(tmp_path)
     except Exception as e:
-        return ("", f"Save failed: {e}")
+        _remove_quietly(tmp_path)
+        return ("", f"Save failed: {e}", stats)
+    stats["save_s"] = round(time.perf_counter() - start, 4)
+    return (out_path, None, stats)
 
 
 class AirforceDownload:
-    """Download from Submit's url and save; optional directory and filename prefix. Default: ComfyUI output dir, prefix ComfyUI."""
+    """Download from Submit's url and save; optional directory and filename prefix. Default: ComfyUI output dir, prefix ComfyUI.
+    Save format "original" keeps the file as delivered; png/jpeg/webp re-encode images."""
 
     @classmethod
     def INPUT_TYPES(cls):
@@ -76,21 +247,148 @@ class AirforceDownload:
             "optional": {
                 "directory": ("STRING", {"default": "", "placeholder": "Empty = ComfyUI output directory"}),
                 "filename_prefix": ("STRING", {"default": "ComfyUI"}),
+                "save_format": (SAVE_FORMATS, {"default": "original", "tooltip": "original = write bytes as delivered; others re-encode images"}),
+                "quality": ("INT", {"default": 95, "min": 1, "max": 100, "tooltip": "JPEG/WebP quality when re-encoding"}),
+                "config": ("AF_CONFIG", {"tooltip": "Optional: HTTP pool, retries and backoff for the download"}),
             }
         }
 
-    RETURN_TYPES = ("STRING",)
-    RETURN_NAMES = ("path",)
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("path", "save_info")
     FUNCTION = "download"
     CATEGORY = "🚀Airforce/Modular"
     OUTPUT_NODE = True  # Run when no downstream nodes; otherwise ComfyUI may prune
 
-    def download(self, url, directory="", filename_prefix="ComfyUI"):
-        path_str, err = download_and_save(url, directory, filename_prefix)
+    def download(self, url, directory="", filename_prefix="ComfyUI", save_format="original", quality=95, config=None):
+        path_str, err, stats = download_and_save(url, directory, filename_prefix, save_format, quality, config)
+        if path_str:
+            ledger = get_ledger(config)
+            if ledger is not None:
+                ledger.record_save(url.strip(), path_str, stats["bytes"])
         # OUTPUT_NODE can return ui to show result in the UI
         ui = {}
         if path_str:
-            ui["text"] = [f"Saved: {path_str}"]
+            retried = f", {stats['retries']} retries, resumed {stats['resumed_bytes']} bytes" if stats["retries"] else ""
+            ui["text"] = [f"Saved: {path_str} ({stats['mode']} from {stats.get('source', 'network')}, download {stats['download_s']}s, save {stats['save_s']}s{retried})"]
         elif err:
             ui["text"] = [f"Failed: {err}"]
-        return {"ui": ui, "result": (path_str,)}
+        return {"ui": ui, "result": (path_str, json.dumps(stats))}
+
+
+# Bulk download defaults: total parallel transfers and parallel transfers per host
+DEFAULT_BULK_WORKERS = 8
+DEFAULT_PER_HOST = 4
+
+
+def parse_url_list(text):
+    """Unique urls in order from newline-separated text (blank lines and # comments skipped)."""
+    urls = []
+    seen = set()
+    for line in str(text or "").splitlines():
+        u = line.strip()
+        if u and not u.startswith("#") and u not in seen:
+            seen.add(u)
+            urls.append(u)
+    return urls
+
+
+def _existing_file(directory, name):
+    """A finished earlier download saved as {name}.<ext>, if any (partial .part files never match)."""
+    matches = [p for p in glob.glob(os.path.join(glob.escape(directory), glob.escape(name) + ".*")) if not p.endswith(".part")]
+    return matches[0] if matches else None
+
+
+def download_many(urls, directory, filename_prefix, save_format="original", quality=95, config=None,
+                  max_parallel=DEFAULT_BULK_WORKERS, per_host=DEFAULT_PER_HOST, skip_existing=True):
+    """
+    Download urls concurrently (at most max_parallel transfers, per_host per scheme://host), each streamed to disk by
+    download_and_save. Files are named {prefix}_{url hash}.{ext}: deterministic, collision-free, and with
+    skip_existing a url already saved in directory is not fetched again.
+    Returns (results, stats): results in input order as dicts with url, path, error, skipped and per-file stats;
+    stats has totals, wall seconds and aggregate MB/s.
+    """
+    base_dir = _output_dir(directory)
+    prefix = _safe_filename_prefix(filename_prefix)
+    host_slots = {}
+    host_lock = threading.Lock()
+
+    def one(url):
+        name = f"{prefix}_{url_name_hash(url)}"
+        existing = _existing_file(base_dir, name) if skip_existing else None
+        if existing:
+            return {"url": url, "path": existing, "error": None, "skipped": True, "stats": {"bytes": 0}}
+        with host_lock:
+            slot = host_slots.setdefault(host_key(url), threading.BoundedSemaphore(max(1, int(per_host))))
+        with slot:
+            path, err, file_stats = download_and_save(url, base_dir, prefix, save_format, quality, config, name=name)
+        return {"url": url, "path": path, "error": err, "skipped": False, "stats": file_stats}
+
+    start = time.perf_counter()
+    results = []
+    if urls:
+        with ThreadPoolExecutor(max_workers=max(1, min(int(max_parallel), len(urls)))) as pool:
+            results = list(pool.map(one, urls))
+    wall = time.perf_counter() - start
+
+    downloaded = [r for r in results if r["path"] and not r["skipped"]]
+    total_bytes = sum(r["stats"].get("bytes", 0) for r in downloaded)
+    stats = {
+        "urls": len(urls),
+        "downloaded": len(downloaded),
+        "skipped": sum(1 for r in results if r["skipped"]),
+        "failed": sum(1 for r in results if r["error"]),
+        "bytes": total_bytes,
+        "wall_s": round(wall, 4),
+        "mbps": round(total_bytes / wall / 1e6, 3) if wall > 0 else 0.0,
+        "files_per_s": round(len(downloaded) / wall, 2) if wall > 0 else 0.0,
+        "retries": sum(r["stats"].get("retries", 0) for r in downloaded),
+        "resumed_bytes": sum(r["stats"].get("resumed_bytes", 0) for r in downloaded),
+        "from_blob_store": sum(1 for r in downloaded if r["stats"].get("source") == "blob_store"),
+        "hosts": len(host_slots),
+    }
+    return (results, stats)
+
+
+class AirforceBulkDownload:
+    """Download a newline-separated url list (Batch Submit urls, Ledger Query urls) in parallel; deterministic filenames."""
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "urls": ("STRING", {"default": "", "multiline": True, "placeholder": "One URL per line"}),
+            },
+            "optional": {
+                "directory": ("STRING", {"default": "", "placeholder": "Empty = ComfyUI output directory"}),
+                "filename_prefix": ("STRING", {"default": "ComfyUI"}),
+                "save_format": (SAVE_FORMATS, {"default": "original", "tooltip": "original = write bytes as delivered; others re-encode images"}),
+                "quality": ("INT", {"default": 95, "min": 1, "max": 100, "tooltip": "JPEG/WebP quality when re-encoding"}),
+                "max_parallel": ("INT", {"default": DEFAULT_BULK_WORKERS, "min": 1, "max": 64, "tooltip": "Parallel downloads in total"}),
+                "per_host": ("INT", {"default": DEFAULT_PER_HOST, "min": 1, "max": 64, "tooltip": "Parallel downloads per host"}),
+                "skip_existing": ("BOOLEAN", {"default": True, "tooltip": "Skip urls already saved in the directory (same url -> same filename)"}),
+                "config": ("AF_CONFIG", {"tooltip": "Optional: HTTP pool, retries and backoff for the downloads"}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("paths", "stats")
+    FUNCTION = "download"
+    CATEGORY = "🚀Airforce/Modular"
+    OUTPUT_NODE = True
+
+    def download(self, urls, directory="", filename_prefix="ComfyUI", save_format="original", quality=95,
+                 max_parallel=DEFAULT_BULK_WORKERS, per_host=DEFAULT_PER_HOST, skip_existing=True, config=None):
+        url_list = parse_url_list(urls)
+        results, stats = download_many(url_list, directory, filename_prefix, save_format, quality, config,
+                                       max_parallel, per_host, skip_existing)
+        ledger = get_ledger(config)
+        if ledger is not None:
+            for r in results:
+                if r["path"] and not r["skipped"]:
+                    ledger.record_save(r["url"], r["path"], r["stats"].get("bytes"))
+        stats["errors"] = [{"url": r["url"], "error": r["error"]} for r in results if r["error"]]
+        # Line N is the Nth url (after dropping blanks, comments and repeats); empty when that download failed
+        paths = "\n".join(r["path"] or "" for r in results)
+        summary = (f"Saved {stats['downloaded']} of {stats['urls']} ({stats['skipped']} skipped, {stats['failed']} failed), "
+                   f"{stats['bytes'] / 1e6:.1f} MB in {stats['wall_s']}s ({stats['mbps']} MB/s)")
+        return {"ui": {"text": [summary]}, "result": (paths, json.dumps(stats, indent=2))}
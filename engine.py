@@ -0,0 +1,122 @@
+"""
+Async engine: one background asyncio loop that multiplexes in-flight generation requests.
+Nodes are synchronous, so they call run() / submit(); batch paths gather many coroutines on the same loop
+instead of holding one OS thread per request. aiohttp is provided by ComfyUI (its server runs on it)
+and is imported with the first client session.
+"""
+import asyncio
+import threading
+
+from .cancel import CANCEL_GRACE, cancel_scope
+from .session import count_event, host_key, http_policy
+from .timing import StageTimer
+
+
+def _request_timer(ctx):
+    """StageTimer passed as trace_request_ctx to a request, if any."""
+    timer = getattr(ctx, "trace_request_ctx", None)
+    return timer if isinstance(timer, StageTimer) else None
+
+
+class AsyncEngine:
+    """Background event loop thread plus per-host aiohttp sessions (concurrency caps live in keypool.py)."""
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._clients = {}  # (host_key, policy) -> aiohttp.ClientSession; only touched on the loop
+
+    @property
+    def loop(self):
+        with self._lock:
+            if self._loop is None:
+                ready = threading.Event()
+                self._thread = threading.Thread(target=self._run_loop, args=(ready,), name="airforce-engine", daemon=True)
+                self._thread.start()
+                ready.wait()
+            return self._loop
+
+    def _run_loop(self, ready):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        ready.set()
+        self._loop.run_forever()
+
+    def submit(self, coro):
+        """Schedule coro on the engine loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """Run coro on the engine loop and block the calling (node) thread for its result."""
+        return self.submit(coro).result(timeout)
+
+    def run_cancellable(self, coro, stage, timer=None):
+        """
+        run() that follows ComfyUI's Cancel: the task is cancelled on the loop (closing its streams) and the caller
+        waits up to CANCEL_GRACE for it to finish before raising the interrupt exception (see cancel.py).
+        """
+        finished = threading.Event()
+
+        async def tracked():
+            try:
+                return await coro
+            finally:
+                finished.set()
+
+        with cancel_scope(stage, timer) as scope:
+            future = self.submit(tracked())
+            scope.on_abort(future.cancel)
+            try:
+                return future.result()
+            except BaseException:
+                if scope.cancelled:
+                    finished.wait(CANCEL_GRACE)
+                raise
+
+    def client(self, url, config=None):
+        """Pooled keep-alive aiohttp session for the host of url (call from the engine loop)."""
+        key = host_key(url)
+        policy = http_policy(config)
+        client = self._clients.get((key, policy))
+        if client is None or client.closed:
+            import aiohttp
+
+            pool_size, _, _, _ = policy
+            trace = aiohttp.TraceConfig()
+
+            async def on_request_start(session, ctx, params):
+                count_event(key, requests=1)
+
+            async def on_connection_create_start(session, ctx, params):
+                timer = _request_timer(ctx)
+                if timer is not None:
+                    timer.start("connect")
+
+            async def on_connection_create_end(session, ctx, params):
+                count_event(key, new_connections=1)
+                timer = _request_timer(ctx)
+                if timer is not None:
+                    timer.stop("connect")
+
+            async def on_connection_reuseconn(session, ctx, params):
+                timer = _request_timer(ctx)
+                if timer is not None:
+                    timer.add("connect", 0.0)
+
+            trace.on_request_start.append(on_request_start)
+            trace.on_connection_create_start.append(on_connection_create_start)
+            trace.on_connection_create_end.append(on_connection_create_end)
+            trace.on_connection_reuseconn.append(on_connection_reuseconn)
+            connector = aiohttp.TCPConnector(limit=0, limit_per_host=pool_size, keepalive_timeout=60)
+            client = aiohttp.ClientSession(connector=connector, trace_configs=[trace])
+            self._clients[(key, policy)] = client
+        return client
+
+
+_engine = AsyncEngine()
+
+
+def get_engine():
+    """Process-wide AsyncEngine."""
+    return _engine
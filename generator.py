@@ -1,11 +1,34 @@
+import asyncio
+import functools
 import json
+import os
 import random
-import torch
-import numpy as np
-import requests
-from PIL import Image
+import threading
+import time
 from io import BytesIO
 
+from .blobstore import get_blob_store
+from .cache import get_result_cache, request_key
+from .cancel import is_interrupt, stats_line as cancel_stats_line
+from .decode import TENSOR_MEMORY_MODES, decode_image_to_tensor
+from .download import sniff_extension
+from .engine import get_engine
+from .keypool import get_key_pool, parse_retry_after
+from .ledger import get_ledger
+from .retry import StreamCut, backoff_delay, fetch_resumable, is_connect_error, is_retryable_status, retry_policy
+from .scheduler import current_flow, get_scheduler, model_limit, request_priority
+from .session import http_policy, stats_line
+from .singleflight import get_flight, stats_line as flight_stats_line
+from .progress import TICK_INTERVAL, NodeProgress
+from .sse import (DATA as SSE_DATA, DONE as SSE_DONE, KEEPALIVE as SSE_KEEPALIVE, SSEParser, StreamWatch,
+                  frame_content_url, frame_json, frame_progress, stream_timeouts)
+from .timing import StageTimer, record_timings, timings_json
+from .video import GrowingFile, decode_video_frames
+
+
+# Seconds without any bytes on the SSE stream before aiohttp gives up (StreamWatch usually fails it earlier)
+SSE_READ_TIMEOUT = 180
+
 
 def parse_size_from_payload(payload):
     """Parse width/height from payload size; return (w, h) or (512, 512) on failure."""
@@ -24,17 +47,18 @@ def parse_size_from_payload(payload):
 
 def placeholder_img_batch(w=512, h=512):
     """Single-frame placeholder (1, H, W, 3) for display in node when there is no image. Not written to disk by this node; avoids index-0 errors in preview/downstream. If connected to SaveImage, that node will save it."""
+    import torch
+
     return torch.zeros((1, h, w, 3))
 
 
-def run_one_request(config, params, prompt):
-    """
-    Single API request + SSE parse. Returns (content_url or None, debug_req_str, debug_res_str, error_msg).
-    On success error_msg is None and content_url is set; on failure content_url is None.
-    """
-    url = f"{config['base_url']}/images/generations"
+def build_request(config, params, prompt, endpoint=None):
+    """(url, headers, payload, debug_req_str) for one generation request; endpoint (keypool.Endpoint) overrides base_url/api_key."""
+    base_url = endpoint.base_url if endpoint is not None else config["base_url"]
+    api_key = endpoint.api_key if endpoint is not None else config["api_key"]
+    url = f"{base_url}/images/generations"
     headers = {
-        "Authorization": f"Bearer {config['api_key']}",
+        "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
     }
     payload = params["payload"].copy()
@@ -47,85 +71,448 @@ def run_one_request(config, params, prompt):
         "headers": {"Authorization": "Bearer sk-air-***"},
         "body": payload
     }
+    if endpoint is not None:
+        debug_req_info["endpoint"] = endpoint.label
     debug_req_str = json.dumps(debug_req_info, indent=2, ensure_ascii=False)
+    return (url, headers, payload, debug_req_str)
 
-    try:
-        response = requests.post(url, headers=headers, json=payload, stream=True, timeout=180)
-        if response.status_code != 200:
-            debug_res_str = response.text
+
+async def _stream_one(config, params, prompt, endpoint, timer, progress=None):
+    """
+    POST + incremental SSE parse against one endpoint. Returns ((content_url, debug_req_str, debug_res_str, error_msg), status, retry_after).
+    Returns as soon as a frame carries data[0].url; keepalive frames are skipped without decoding. Status / progress /
+    queue-position frames go to progress (progress.ItemProgress) as they arrive. A stream that sends no frame within
+    the Config first_frame_timeout, or none for stall_timeout after that, raises StreamStalled.
+    """
+    import aiohttp
+
+    url, headers, payload, debug_req_str = build_request(config, params, prompt, endpoint)
+    engine = get_engine()
+    # Per-read timeout, as the blocking client had: multi-minute video jobs stay open while keepalives arrive
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=http_policy(config)[3], sock_read=SSE_READ_TIMEOUT)
+    client = engine.client(url, config)
+    watch = StreamWatch(*stream_timeouts(config))
+    timer.start("sse_total")
+    async with client.post(url, headers=headers, json=payload, timeout=timeout, trace_request_ctx=timer) as response:
+        timer.milestone("headers")
+        if response.status != 200:
+            debug_res_str = await response.text()
             try:
-                debug_res_str = json.dumps(response.json(), indent=2, ensure_ascii=False)
+                debug_res_str = json.dumps(json.loads(debug_res_str), indent=2, ensure_ascii=False)
             except Exception:
                 pass
-            return (None, debug_req_str, f"Error {response.status_code}:\n{debug_res_str}", None)
+            timer.stop("sse_total")
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            return ((None, debug_req_str, f"Error {response.status}:\n{debug_res_str}", None), response.status, retry_after)
 
-        res_json = None
+        parser = SSEParser()
         sse_lines = []
-        for line in response.iter_lines():
-            if not line:
-                continue
-            line_str = line.decode("utf-8")
-            if not line_str.startswith("data: "):
-                continue
-            if line_str == "data: [DONE]" or line_str == "data: : keepalive":
-                continue
+        content_url = None
+        done = False
+        eof = False
+        chunks = response.content.iter_any().__aiter__()
+        read = None
+        try:
+            while not content_url and not eof:
+                if read is None:
+                    read = asyncio.ensure_future(chunks.__anext__())
+                # Wake every TICK_INTERVAL while the stream is quiet: fail it once stalled, else refresh the keepalive age
+                finished, _ = await asyncio.wait({read}, timeout=TICK_INTERVAL)
+                if not finished:
+                    watch.check()
+                    if progress is not None:
+                        progress.report(None, watch)
+                    continue
+                task, read = read, None
+                try:
+                    chunk = task.result()
+                except StopAsyncIteration:
+                    eof = True
+                    frames = parser.flush()
+                else:
+                    timer.milestone("first_sse_byte")
+                    frames = parser.feed(chunk)
+                for kind, frame in frames:
+                    watch.frame(kind)
+                    timer.milestone("first_frame")
+                    done = done or kind == SSE_DONE
+                    data = frame_json(frame) if kind == SSE_DATA else None
+                    if data is None:
+                        if progress is not None and kind == SSE_KEEPALIVE:
+                            progress.report(None, watch)
+                        continue
+                    sse_lines.append(data)
+                    content_url = frame_content_url(data)
+                    if content_url:
+                        timer.milestone("url_frame")
+                        if progress is not None:
+                            progress.report({"status": "completed", "progress": 1.0}, watch)
+                        break
+                    if progress is not None:
+                        event = frame_progress(data)
+                        if event:
+                            progress.report(event, watch)
+                watch.check()
+        finally:
+            if read is not None:
+                read.cancel()
+            timer.peak("max_frame_gap", watch.max_gap)
+            if watch.keepalives:
+                timer.count("keepalives", watch.keepalives)
+    timer.stop("sse_total")
+    if not content_url and not done:
+        raise StreamCut(f"SSE stream closed before the URL frame ({len(sse_lines)} data frames)")
+
+    debug_res_str = json.dumps(sse_lines, indent=2, ensure_ascii=False) if sse_lines else "[]"
+    if not content_url:
+        return ((None, debug_req_str, f"No URL in SSE response:\n{debug_res_str}", None), 200, None)
+    return ((content_url, debug_req_str, debug_res_str, None), 200, None)
+
+
+async def run_one_request_async(config, params, prompt, timer=None, flow=None, progress=None):
+    """
+    Single API request + incremental SSE parse on the engine loop. Returns (content_url or None, debug_req_str, debug_res_str, error_msg).
+    The scheduler admits the request first (per-model limits, priority class, fair share of flow = ComfyUI prompt id;
+    stage sched_wait), then the key pool picks the endpoint (per-endpoint max_concurrency, learned rate limits); a 429 fails over to another
+    key until every key has been tried. Only attempts the API cannot have accepted are retried (up to max_retries,
+    jittered exponential backoff): failed connects and 5xx responses. Once a 200 stream has started the request may be
+    running and billed, so a reset, read timeout, cut or stalled stream fails instead of POSTing it again. With a StageTimer, records queue_wait, connect, headers, first_sse_byte, first_frame, url_frame,
+    max_frame_gap and sse_total, and counts keepalives, rate_limited and retries. progress: see _stream_one.
+    """
+    pool = get_key_pool(config)
+    scheduler = get_scheduler(config)
+    model = params["payload"].get("model", "") or "unknown"
+    dispatch = config.get("dispatch", "round_robin")
+    max_retries, backoff = retry_policy(config)
+    timer = timer or StageTimer()
+    tried = []
+    retries = 0
+    debug_req_str = build_request(config, params, prompt)[3]
+    flow = flow or current_flow()
+
+    timer.start("sched_wait")
+    ticket = await scheduler.acquire(model, request_priority(config, params), flow, model_limit(config.get("model_limits"), model))
+    timer.stop("sched_wait")
+    try:
+        while True:
+            timer.start("queue_wait")
+            endpoint = await pool.acquire(dispatch, exclude=tried)
+            timer.stop("queue_wait")
+            tried.append(endpoint)
+            result, status, retry_after, error = None, None, None, None
             try:
-                data = json.loads(line_str[6:])
-                res_json = data
-                sse_lines.append(data)
-            except Exception:
+                result, status, retry_after = await _stream_one(config, params, prompt, endpoint, timer, progress)
+            except Exception as e:
+                timer.stop("sse_total")
+                error = e
+            finally:
+                pool.release(endpoint, status, retry_after)
+            if status == 429:
+                timer.count("rate_limited", 1)
+                if len(tried) < pool.size:
+                    continue
+            # Non-200 statuses arrive before any SSE byte; errors are only safe to retry if nothing was sent
+            retryable = is_connect_error(error) if error is not None else is_retryable_status(status)
+            if retryable and retries < max_retries:
+                retries += 1
+                timer.count("retries", 1)
+                await asyncio.sleep(backoff_delay(retries, backoff))
                 continue
+            if error is not None:
+                raise error
+            if retries:
+                content_url, req_str, res_str, err = result
+                result = (content_url, req_str, (res_str or "").rstrip() + f"\n\nRetried {retries}x", err)
+            return result
 
-        debug_res_str = json.dumps(sse_lines, indent=2, ensure_ascii=False) if sse_lines else "[]"
+    except Exception as e:
+        msg = str(e) or type(e).__name__
+        if retries:
+            msg += f" (after {retries} retries)"
+        return (None, debug_req_str, f"Run error: {msg}", msg)
+    finally:
+        scheduler.release(ticket)
 
-        content_url = None
-        if res_json and "data" in res_json and len(res_json["data"]) > 0:
-            content_url = res_json["data"][0].get("url")
 
-        if not content_url:
-            return (None, debug_req_str, f"No URL in SSE response:\n{debug_res_str}", None)
+def run_one_request(config, params, prompt, timer=None):
+    """Blocking wrapper around run_one_request_async for synchronous callers; reports live progress on the executing node."""
+    node_progress = NodeProgress.current()
+    progress = node_progress.item() if node_progress is not None else None
+    return get_engine().run_cancellable(run_one_request_async(config, params, prompt, timer, current_flow(), progress), "sse", timer)
 
-        return (content_url, debug_req_str, debug_res_str, None)
 
+def _video_result(decode, placeholder):
+    """(frames, info) from decode(), or the placeholder with video_error when the video cannot be decoded."""
+    try:
+        frames, info = decode()
+        info["shape"] = list(frames.shape)
+        return (frames, info)
     except Exception as e:
-        return (None, debug_req_str, f"Run error: {str(e)}", str(e))
+        return (placeholder, {"kind": "video", "shape": list(placeholder.shape), "video_error": str(e) or type(e).__name__})
+
+
+def _detect_content(raw_bytes, placeholder, timer=None, decode_opts=None):
+    """Try to parse bytes as an image tensor (1,H,W,3); else treat as video. Returns (tensor, meta).
+    decode_opts: max_side / memory for decode_image_to_tensor; video (stride, max_frames, width, height) to decode
+    video frames into a (T,H,W,3) batch instead of returning the placeholder."""
+    decode_opts = decode_opts or {}
+    try:
+        img_tensor = decode_image_to_tensor(raw_bytes, timer=timer, max_side=decode_opts.get("max_side", 0),
+                                            memory=decode_opts.get("memory", "default"))
+        return (img_tensor, {"kind": "image", "shape": list(img_tensor.shape)})
+    except Exception:
+        pass
+    video_opts = decode_opts.get("video")
+    if video_opts:
+        return _video_result(lambda: decode_video_frames(BytesIO(raw_bytes), timer=timer, **video_opts), placeholder)
+    # Video: placeholder tensor; save via Download node
+    return (placeholder, {"kind": "video", "shape": list(placeholder.shape)})
 
 
-def _fetch_and_detect(config, params, prompt):
+def _fetch_decoding_video(config, content_url, placeholder, timer, video_opts, stats, cancellable):
     """
-    Request API, fetch content in memory only (no save to disk). Try to parse as image for tensor; else treat as video.
-    Returns (img_tensor, content_url, debug_req_str, debug_res_str). path is always ""; use Airforce Download node to save from url.
+    Download content_url into a GrowingFile (in the blob store's spill directory) while a worker thread decodes
+    it as soon as the first bytes show MP4/WebM, so frames come off the wire instead of out of a buffered body.
+    Returns (path, size, result): result is _video_result's (tensor, meta), or None when the content is not a video.
+    The caller owns the file at path; it is removed here if the download fails.
     """
-    content_url, debug_req_str, debug_res_str, error_msg = run_one_request(config, params, prompt)
+    growing = GrowingFile(get_blob_store().spill_dir)
+    results = []
+
+    def _decode():
+        reader = growing.reader()
+        head = b""
+        while len(head) < 16:
+            chunk = reader.read(16 - len(head))
+            if not chunk:
+                break
+            head += chunk
+        if sniff_extension(head) not in ("mp4", "webm"):
+            return
+        reader.seek(0)
+        results.append(_video_result(lambda: decode_video_frames(reader, timer=timer, **video_opts), placeholder))
+
+    worker = threading.Thread(target=_decode, name="airforce-video-decode", daemon=True)
+    worker.start()
+    try:
+        with timer.stage("cdn_download"):
+            fetch_resumable(content_url, growing, config, stats=stats, cancellable=cancellable, timer=timer)
+    except BaseException:
+        growing.finish()
+        worker.join()
+        growing.close()
+        os.remove(growing.path)
+        raise
+    growing.finish()
+    worker.join()
+    growing.close()
+    return (growing.path, growing.size, results[0] if results else None)
+
+
+def _materialize(config, params, content_url, debug_req_str, debug_res_str, error_msg, cache_key=None, timer=None,
+                 decode_opts=None, url_only=False, cancellable=True):
+    """
+    Fetch content of a generation result in memory only (no save to disk). Try to parse as image for tensor; else treat as video.
+    Returns (img_tensor, content_url, debug_req_str, debug_res_str, meta). With cache_key, a successful result is stored in the result cache.
+    Fetched bytes go to the shared blob store so Download does not fetch them again; url_only skips fetch and decode entirely.
+    """
+    timer = timer or StageTimer()
     w, h = parse_size_from_payload(params["payload"])
     placeholder = placeholder_img_batch(w, h)
 
     if content_url is None:
         if error_msg is None:
             debug_res_str = (debug_res_str or "").rstrip() + "\n\nRequest failed (no URL)"
-        return (placeholder, "", debug_req_str, debug_res_str)
+        return (placeholder, "", debug_req_str, debug_res_str, {"kind": "error"})
+
+    if url_only:
+        debug_res_str = (debug_res_str or "").rstrip() + "\n\nGenerated 1 result (URL only, not fetched)"
+        return (placeholder, content_url, debug_req_str, debug_res_str, {"kind": "unknown"})
 
+    video_opts = (decode_opts or {}).get("video")
+    streamed = None  # (path, size, result) when a video was decoded while downloading
     try:
-        resp = requests.get(content_url, timeout=60, stream=True)
-        resp.raise_for_status()
-        raw_bytes = resp.content
+        store = get_blob_store()
+        raw_bytes = store.get(content_url)
+        if raw_bytes is None:
+            fetch_stats = {}
+            try:
+                if video_opts:
+                    streamed = _fetch_decoding_video(config, content_url, placeholder, timer, video_opts, fetch_stats,
+                                                     cancellable)
+                else:
+                    with timer.stage("cdn_download"):
+                        sink = BytesIO()
+                        fetch_resumable(content_url, sink, config, stats=fetch_stats, cancellable=cancellable, timer=timer)
+                        raw_bytes = sink.getvalue()
+            finally:
+                for name in ("retries", "resumed_bytes"):
+                    if fetch_stats.get(name):
+                        timer.count(f"cdn_{name}", fetch_stats[name])
+                if fetch_stats.get("retries"):
+                    debug_res_str = (debug_res_str or "").rstrip() + (
+                        f"\n\nCDN download retried {fetch_stats['retries']}x, resumed {fetch_stats['resumed_bytes']} bytes")
+            if streamed is not None and streamed[2] is None:
+                # Not a video: an image (small), decoded from memory as usual
+                path = streamed[0]
+                streamed = None
+                try:
+                    with open(path, "rb") as f:
+                        raw_bytes = f.read()
+                finally:
+                    os.remove(path)
+            if streamed is None:
+                timer.count("cdn_bytes", len(raw_bytes))
+                store.put(content_url, raw_bytes)
+            else:
+                timer.count("cdn_bytes", streamed[1])
+        else:
+            timer.count("blob_store_bytes", len(raw_bytes))
     except Exception as e:
+        if is_interrupt(e):
+            raise
         debug_res_str = (debug_res_str or "").rstrip() + f"\n\nDownload failed: {e}"
-        return (placeholder, "", debug_req_str, debug_res_str)
+        return (placeholder, "", debug_req_str, debug_res_str, {"kind": "error"})
 
-    # Try to parse as image for preview tensor (no save)
+    if streamed is not None:
+        path, _, (img_tensor, meta) = streamed
+    else:
+        img_tensor, meta = _detect_content(raw_bytes, placeholder, timer, decode_opts)
     try:
-        img = Image.open(BytesIO(raw_bytes)).convert("RGB")
-        img_np = np.array(img).astype(np.float32) / 255.0
-        img_tensor = torch.from_numpy(img_np).unsqueeze(0)
-        debug_res_str = (debug_res_str or "").rstrip() + "\n\nGenerated 1 image"
-        return (img_tensor, content_url, debug_req_str, debug_res_str)
+        if cache_key is not None:
+            cache = get_result_cache(config)
+            if cache is not None:
+                try:
+                    if streamed is not None:
+                        cache.put_file(cache_key, content_url, path, meta)
+                    else:
+                        cache.put(cache_key, content_url, raw_bytes, meta)
+                except Exception as e:
+                    debug_res_str = (debug_res_str or "").rstrip() + f"\n\nCache write failed: {e}"
+    finally:
+        if streamed is not None:
+            store.put_file(content_url, path)  # moved into the blob store's spill directory for Download
+    debug_res_str = (debug_res_str or "").rstrip() + f"\n\nGenerated 1 {meta['kind']}"
+    if meta.get("frames"):
+        debug_res_str += f" ({meta['frames']} frames decoded)"
+    return (img_tensor, content_url, debug_req_str, debug_res_str, meta)
+
+
+def _from_cache(config, params, prompt, cache_key, timer=None, decode_opts=None, url_only=False):
+    """Cached Submit result as (img_tensor, content_url, debug_req_str, debug_res_str, meta), or None on a miss."""
+    cache = get_result_cache(config)
+    hit = cache.get(cache_key) if cache is not None else None
+    if hit is None:
+        return None
+    content_url, raw_bytes, meta = hit
+    get_blob_store().put(content_url, raw_bytes)
+    w, h = parse_size_from_payload(params["payload"])
+    if url_only:
+        img_tensor, detected = placeholder_img_batch(w, h), meta
+    else:
+        img_tensor, detected = _detect_content(raw_bytes, placeholder_img_batch(w, h), timer, decode_opts)
+    debug_req_str = build_request(config, params, prompt)[3]
+    debug_res_str = json.dumps({"cache": "hit", "key": cache_key, "url": content_url, "meta": meta}, indent=2, ensure_ascii=False)
+    debug_res_str += f"\n\nGenerated 1 {detected.get('kind', 'result')} (from cache)"
+    return (img_tensor, content_url, debug_req_str, debug_res_str, dict(detected, cache="hit"))
+
+
+def _record_ledger(config, params, prompt, result, timer, cache_key=None):
+    """Queue one ledger row for a finished Submit (written in the background; never fails the request)."""
+    try:
+        ledger = get_ledger(config)
+        if ledger is None:
+            return
+        _, content_url, _, debug_res_str, meta = result
+        kind = meta.get("kind")
+        if kind in ("error", "cancelled"):
+            status = kind
+        elif meta.get("cache") == "hit":
+            status = "cache_hit"
+        else:
+            status = "coalesced" if meta.get("coalesced") else "ok"
+        ledger.record_generation(
+            model=params["payload"].get("model", "") or "unknown",
+            payload_hash=cache_key or request_key(config, params["payload"], prompt),
+            prompt=prompt,
+            url=content_url or None,
+            status=status,
+            kind=kind,
+            bytes=timer.counters.get("cdn_bytes") or timer.counters.get("blob_store_bytes"),
+            total_s=timer.stages.get("total"),
+            stages=timer.stages,
+            error=(debug_res_str or "")[-500:] if status == "error" else None,
+        )
     except Exception:
         pass
 
-    # Video: return placeholder and url; save via Download node
-    debug_res_str = (debug_res_str or "").rstrip() + "\n\nGenerated 1 video"
-    return (placeholder, content_url, debug_req_str, debug_res_str)
+
+def _fetch_and_detect(config, params, prompt, use_cache=False, timer=None, decode_opts=None, url_only=False):
+    """
+    Request API, fetch content in memory only (no save to disk). Try to parse as image for tensor; else treat as video.
+    Returns (img_tensor, content_url, debug_req_str, debug_res_str, meta). path is always ""; use Airforce Download node to save from url.
+    meta describes the result (kind image/video; for decoded videos also fps, frames and audio streams).
+    With use_cache, an identical earlier request (payload + prompt + base_url) is served from the on-disk result cache,
+    and identical requests already in flight are joined (single-flight) instead of sent again: the joiners share the
+    leader's URL and decoded tensor, and meta gets coalesced=True.
+    Stage timings go into timer (if given) and the per-model histogram. decode_opts: see _detect_content.
+    ComfyUI's Cancel aborts the SSE stream / CDN fetch and raises the interrupt exception (ledger status cancelled).
+    url_only returns a placeholder image without fetching the content (Download fetches it when needed).
+    """
+    timer = timer or StageTimer()
+    cache_key = None
+
+    def run():
+        result = _from_cache(config, params, prompt, cache_key, timer, decode_opts, url_only) if cache_key else None
+        if result is None:
+            if cache_key:
+                # Same request with other decode options: still one API call
+                response, _ = get_flight("generate").do(cache_key, functools.partial(run_one_request, config, params, prompt, timer))
+            else:
+                response = run_one_request(config, params, prompt, timer)
+            result = _materialize(config, params, *response, cache_key=cache_key, timer=timer, decode_opts=decode_opts,
+                                  url_only=url_only)
+        return result
+
+    try:
+        if not use_cache:
+            result = run()
+        else:
+            cache_key = request_key(config, params["payload"], prompt)
+            # Decode options are part of the flight key: joiners receive the leader's tensor as-is
+            flight_key = cache_key + ":" + json.dumps([decode_opts, url_only], sort_keys=True, default=str)
+            start = time.perf_counter()
+            result, shared = get_flight("submit").do(flight_key, run)
+            if shared:
+                timer.add("coalesced_wait", time.perf_counter() - start)
+                img_tensor, content_url, debug_req_str, debug_res_str, meta = result
+                debug_res_str = (debug_res_str or "").rstrip() + "\n\nShared the result of an identical in-flight request"
+                result = (img_tensor, content_url, debug_req_str, debug_res_str, dict(meta, coalesced=True))
+                timer.count("coalesced", 1)
+    except Exception as e:
+        if is_interrupt(e):
+            # Cancelled in ComfyUI: keep a ledger row (with cancel_latency) but not a latency histogram sample
+            timer.finish()
+            _record_ledger(config, params, prompt, (None, "", "", "", {"kind": "cancelled"}), timer, cache_key)
+        raise
+    record_timings(params["payload"].get("model", ""), timer)
+    _record_ledger(config, params, prompt, result, timer, cache_key)
+    return result
+
+
+async def _fetch_and_detect_async(config, params, prompt, timer=None, flow=None, cancellable=True, progress=None):
+    """Async _fetch_and_detect: awaits the SSE stream on the loop; only download + decode borrow a worker thread.
+    flow: scheduler fairness key captured where the request was queued (default: the prompt executing now).
+    cancellable=False keeps ComfyUI's Cancel from aborting the CDN fetch (background jobs outlive their prompt).
+    progress: live progress reporter for the stream (progress.ItemProgress), if any."""
+    timer = timer or StageTimer()
+    result = await run_one_request_async(config, params, prompt, timer, flow, progress)
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(None, functools.partial(_materialize, config, params, *result, timer=timer,
+                                                                cancellable=cancellable))
+    record_timings(params["payload"].get("model", ""), timer)
+    _record_ledger(config, params, prompt, result, timer)
+    return result
 
 
 class AirforceGeneratorModular:
@@ -141,11 +528,18 @@ class AirforceGeneratorModular:
             },
             "optional": {
                 "random_seed": ("BOOLEAN", {"default": True, "label_on": "Random seed", "label_off": "Fixed"}),
+                "decode_max_side": ("INT", {"default": 0, "min": 0, "max": 8192, "step": 64, "tooltip": "JPEG results decode at reduced scale down to this long side (0 = full size)"}),
+                "tensor_memory": (TENSOR_MEMORY_MODES, {"default": "default", "tooltip": "pinned = faster GPU upload; shared = zero-copy to worker processes"}),
+                "output_mode": (["image", "url_only"], {"default": "image", "tooltip": "url_only: skip fetching/decoding when only url is used (image is a placeholder)"}),
+                "video_max_frames": ("INT", {"default": 0, "min": 0, "max": 10000, "tooltip": "Decode video results into an IMAGE batch of at most this many frames (0 = placeholder, no decode)"}),
+                "video_stride": ("INT", {"default": 1, "min": 1, "max": 120, "tooltip": "Keep every Nth video frame"}),
+                "video_width": ("INT", {"default": 0, "min": 0, "max": 4096, "step": 2, "tooltip": "Decoded frame width (0 = source; keeps aspect if height set)"}),
+                "video_height": ("INT", {"default": 0, "min": 0, "max": 4096, "step": 2, "tooltip": "Decoded frame height (0 = source; keeps aspect if width set)"}),
             }
         }
 
-    RETURN_TYPES = ("IMAGE", "STRING", "STRING", "STRING", "STRING")
-    RETURN_NAMES = ("image", "path", "url", "debug_request", "debug_response")
+    RETURN_TYPES = ("IMAGE", "STRING", "STRING", "STRING", "STRING", "STRING", "STRING")
+    RETURN_NAMES = ("image", "path", "url", "debug_request", "debug_response", "timings", "media_info")
     FUNCTION = "generate"
     CATEGORY = "🚀Airforce/Modular"
 
@@ -156,7 +550,121 @@ class AirforceGeneratorModular:
             return random.random()
         return "fixed"
 
-    def generate(self, config, params, prompt, random_seed=True):
-        img_tensor, content_url, debug_req_str, debug_res_str = _fetch_and_detect(config, params, prompt)
+    def generate(self, config, params, prompt, random_seed=True, decode_max_side=0, tensor_memory="default", output_mode="image",
+                 video_max_frames=0, video_stride=1, video_width=0, video_height=0):
+        # Fixed seed: identical requests are served from the persistent result cache
+        timer = StageTimer()
+        decode_opts = {"max_side": decode_max_side, "memory": tensor_memory}
+        if video_max_frames > 0:
+            decode_opts["video"] = {"stride": video_stride, "max_frames": video_max_frames, "width": video_width, "height": video_height}
+        img_tensor, content_url, debug_req_str, debug_res_str, meta = _fetch_and_detect(
+            config, params, prompt, use_cache=not random_seed, timer=timer, decode_opts=decode_opts,
+            url_only=output_mode == "url_only")
+        debug_res_str = (debug_res_str or "").rstrip() + "\n" + stats_line() + "\n" + get_key_pool(config).stats_line() + "\n" + flight_stats_line()
+        debug_res_str += "\n" + get_scheduler(config).stats_line() + "\n" + cancel_stats_line()
+        cache = get_result_cache(config)
+        if cache is not None:
+            debug_res_str += "\n" + cache.stats_line()
+        timings = timings_json(params["payload"].get("model", ""), timer)
         # path is left empty; use Download node to save from url
-        return (img_tensor, "", content_url or "", debug_req_str, debug_res_str)
+        return (img_tensor, "", content_url or "", debug_req_str, debug_res_str, timings, json.dumps(meta, indent=2))
+
+
+def parse_prompt_list(text, repeat=1):
+    """One prompt per non-empty line, each repeated `repeat` times (in order)."""
+    prompts = [p.strip() for p in str(text or "").splitlines() if p.strip()]
+    repeat = max(1, int(repeat))
+    return [p for p in prompts for _ in range(repeat)]
+
+
+def stack_image_batch(tensors, reference=0):
+    """Stack (1,H,W,3) tensors into (B,H,W,3); frames of a different size are resized to tensors[reference]'s size."""
+    import torch
+
+    h, w = tensors[reference].shape[1], tensors[reference].shape[2]
+    frames = []
+    for t in tensors:
+        if t.shape[1] != h or t.shape[2] != w:
+            t = torch.nn.functional.interpolate(t.permute(0, 3, 1, 2), size=(h, w), mode="bilinear", align_corners=False)
+            t = t.permute(0, 2, 3, 1)
+        frames.append(t)
+    return torch.cat(frames, dim=0)
+
+
+async def _fetch_one_timed(config, params, prompt, flow=None, progress=None):
+    """_fetch_and_detect_async plus its stage timings; scheduling and per-endpoint caps apply inside run_one_request_async."""
+    timer = StageTimer()
+    result = await _fetch_and_detect_async(config, params, prompt, timer, flow, progress=progress)
+    return result, timer
+
+
+async def _fetch_many(config, params, prompts, flow=None, node_progress=None):
+    return await asyncio.gather(*[_fetch_one_timed(config, params, p, flow, node_progress.item(i) if node_progress else None)
+                                  for i, p in enumerate(prompts)])
+
+
+class AirforceBatchGenerator:
+    """Batch submit: one request per prompt line (x repeat), multiplexed on the async engine; returns stacked IMAGE batch,
+    urls (line N = item N, empty for a failed item) and per-item debug JSON. Requests always go to the API (no result cache)."""
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "config": ("AF_CONFIG",),
+                "params": ("AF_PARAMS",),
+                "prompts": ("STRING", {"multiline": True, "default": "a beautiful scenery", "placeholder": "One prompt per line"}),
+                "repeat": ("INT", {"default": 1, "min": 1, "max": 64, "tooltip": "Requests per prompt line"}),
+            },
+            "optional": {
+                "random_seed": ("BOOLEAN", {"default": True, "label_on": "Random seed", "label_off": "Fixed", "tooltip": "Random: re-run on every queue. Fixed: ComfyUI reuses the last output while inputs are unchanged (the batch itself never uses the result cache)"}),
+            }
+        }
+
+    RETURN_TYPES = ("IMAGE", "STRING", "STRING")
+    RETURN_NAMES = ("images", "urls", "debug")
+    FUNCTION = "generate"
+    CATEGORY = "🚀Airforce/Modular"
+
+    @classmethod
+    def IS_CHANGED(cls, random_seed=True, **kwargs):
+        if random_seed:
+            return random.random()
+        return "fixed"
+
+    def generate(self, config, params, prompts, repeat=1, random_seed=True):
+        items = parse_prompt_list(prompts, repeat)
+        if not items:
+            w, h = parse_size_from_payload(params["payload"])
+            return (placeholder_img_batch(w, h), "", json.dumps([{"error": "No prompts"}], indent=2))
+
+        start = time.perf_counter()
+        node_progress = NodeProgress.current(len(items))
+        results = get_engine().run_cancellable(_fetch_many(config, params, items, current_flow(), node_progress), "batch")
+        wall = time.perf_counter() - start
+
+        tensors, urls, debug_items = [], [], []  # urls keeps one line per item (empty on failure)
+        for i, (prompt, ((img_tensor, content_url, debug_req_str, debug_res_str, meta), timer)) in enumerate(zip(items, results)):
+            tensors.append(img_tensor)
+            urls.append(content_url or "")
+            debug_items.append({
+                "index": i,
+                "prompt": prompt,
+                "url": content_url or "",
+                "ok": bool(content_url),
+                "kind": meta.get("kind", ""),
+                "seconds": round(timer.stages.get("total", 0.0), 3),
+                "timings": timer.to_dict(),
+                "debug_response": debug_res_str,
+            })
+        debug_str = json.dumps({
+            "count": len(items),
+            "succeeded": sum(1 for u in urls if u),
+            "wall_seconds": round(wall, 3),
+            "sum_seconds": round(sum(r[1].stages.get("total", 0.0) for r in results), 3),
+            "scheduler": get_scheduler(config).stats(),
+            "items": debug_items,
+        }, indent=2, ensure_ascii=False)
+        # Size the batch by the first real image, not a failed item's placeholder (payload size)
+        reference = next((i for i, d in enumerate(debug_items) if d["ok"] and d["kind"] == "image"), 0)
+        return (stack_image_batch(tensors, reference), "\n".join(urls), debug_str)
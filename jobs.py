@@ -0,0 +1,160 @@
+"""
+Job mode: Submit Job enqueues a generation on the async engine and returns a handle immediately;
+Collect Job waits for (or polls) the handle later, so long video jobs overlap with other work in the workflow.
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from concurrent import futures
+
+from .cancel import CANCEL_POLL_INTERVAL, cancel_scope
+from .engine import get_engine
+from .generator import _fetch_and_detect_async, parse_size_from_payload, placeholder_img_batch
+from .scheduler import current_flow
+
+# Finished jobs are kept this long for collection, then dropped
+JOB_RETENTION_SECONDS = 3600
+
+
+class _Job:
+    def __init__(self, job_id, model, prompt, future):
+        self.job_id = job_id
+        self.model = model
+        self.prompt = prompt
+        self.future = future
+        self.created = time.time()
+        self.finished = None
+
+
+class JobManager:
+    """In-process registry of background generation jobs (job_id -> future on the engine loop)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def submit(self, config, params, prompt):
+        """Start a generation in the background; returns the job id."""
+        self._prune()
+        job_id = uuid.uuid4().hex[:12]
+        # The flow (fair-share key) is the prompt that queued the job, not whichever prompt runs when it starts
+        future = get_engine().submit(_fetch_and_detect_async(config, params, prompt, flow=current_flow(), cancellable=False))
+        job = _Job(job_id, params["payload"].get("model", ""), prompt, future)
+        future.add_done_callback(lambda _f: setattr(job, "finished", time.time()))
+        with self._lock:
+            self._jobs[job_id] = job
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id):
+        """'running', 'done', 'error' or 'unknown' (jobs waiting for a concurrency slot count as running)."""
+        job = self.get(job_id)
+        if job is None:
+            return "unknown"
+        if not job.future.done():
+            return "running"
+        return "error" if job.future.exception() is not None else "done"
+
+    def _prune(self):
+        now = time.time()
+        with self._lock:
+            for job_id in [j for j, job in self._jobs.items() if job.finished and now - job.finished > JOB_RETENTION_SECONDS]:
+                del self._jobs[job_id]
+
+
+_jobs = JobManager()
+
+
+def get_job_manager():
+    """Process-wide JobManager."""
+    return _jobs
+
+
+class AirforceSubmitJob:
+    """Enqueue a generation and return a job handle right away; connect the handle to Airforce: Collect Job."""
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "config": ("AF_CONFIG",),
+                "params": ("AF_PARAMS",),
+                "prompt": ("STRING", {"multiline": True, "default": "a beautiful scenery", "placeholder": "Describe the image or video you want to generate"}),
+            },
+            "optional": {
+                "random_seed": ("BOOLEAN", {"default": True, "label_on": "Random seed", "label_off": "Fixed"}),
+            }
+        }
+
+    RETURN_TYPES = ("AF_JOB", "STRING")
+    RETURN_NAMES = ("job", "job_id")
+    FUNCTION = "submit"
+    CATEGORY = "🚀Airforce/Modular"
+
+    @classmethod
+    def IS_CHANGED(cls, random_seed=True, **kwargs):
+        if random_seed:
+            return random.random()
+        return "fixed"
+
+    def submit(self, config, params, prompt, random_seed=True):
+        job_id = get_job_manager().submit(config, params, prompt)
+        w, h = parse_size_from_payload(params["payload"])
+        job = {"job_id": job_id, "model": params["payload"].get("model", ""), "size": [w, h]}
+        return (job, job_id)
+
+
+class AirforceCollectJob:
+    """Collect a job's result: wait blocks until it finishes (up to timeout); poll returns the current state immediately."""
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "job": ("AF_JOB",),
+                "mode": (["wait", "poll"], {"default": "wait"}),
+                "timeout": ("INT", {"default": 600, "min": 1, "max": 7200, "tooltip": "Seconds to wait in wait mode"}),
+            }
+        }
+
+    RETURN_TYPES = ("IMAGE", "STRING", "STRING", "STRING", "STRING")
+    RETURN_NAMES = ("image", "url", "status", "debug_request", "debug_response")
+    FUNCTION = "collect"
+    CATEGORY = "🚀Airforce/Modular"
+
+    @classmethod
+    def IS_CHANGED(cls, **kwargs):
+        # ComfyUI passes only widget values here, never the linked job, so the job's status can't be seen: always
+        # re-run. Collecting a finished job again just reads the stored result (no new request is made)
+        return float("nan")
+
+    def collect(self, job, mode="wait", timeout=600):
+        w, h = job.get("size") or (512, 512)
+        placeholder = placeholder_img_batch(w, h)
+        job_id = job.get("job_id", "")
+        entry = get_job_manager().get(job_id)
+        if entry is None:
+            return (placeholder, "", "unknown", "", f"Unknown or expired job {job_id}")
+
+        if mode == "wait":
+            # Cancel stops the wait (the job keeps running and can be collected later)
+            deadline = time.monotonic() + timeout
+            with cancel_scope("collect_wait") as scope:
+                while not entry.future.done() and time.monotonic() < deadline:
+                    scope.check()
+                    futures.wait([entry.future], timeout=min(CANCEL_POLL_INTERVAL, max(0.0, deadline - time.monotonic())))
+        if not entry.future.done():
+            elapsed = round(time.time() - entry.created, 1)
+            return (placeholder, "", "running", "", json.dumps({"job_id": job_id, "model": entry.model, "elapsed_seconds": elapsed}))
+
+        exc = entry.future.exception()
+        if exc is not None:
+            return (placeholder, "", "error", "", f"Job error: {exc}")
+        img_tensor, content_url, debug_req_str, debug_res_str, _meta = entry.future.result()
+        status = "done" if content_url else "error"
+        return (img_tensor, content_url or "", status, debug_req_str, debug_res_str)
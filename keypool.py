@@ -0,0 +1,206 @@
+"""
+Key / endpoint pool for the generation API: dispatch round-robin or least-loaded across AF_CONFIG endpoints,
+cap in-flight requests per endpoint (max_concurrency), and learn per-key token buckets from 429 / Retry-After.
+A throttled key cools down and requests fail over to the other keys. Used from the async engine loop.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+from .config import DEFAULT_MAX_CONCURRENCY
+
+# Cooldown when a 429 has no usable Retry-After; 429s within RATE_WINDOW before a rate is learned; slowest learned
+# rate (requests/second) and AIMD factors for it. A learned rate is dropped after a window without 429s.
+DEFAULT_RETRY_AFTER = 5.0
+RATE_LEARN_AFTER = 2
+MIN_RATE = 0.1
+RATE_DECREASE = 0.5
+RATE_INCREASE = 1.05
+RATE_WINDOW = 60.0
+
+
+def parse_retry_after(value):
+    """Retry-After header (seconds or HTTP date) -> seconds, or None."""
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def config_endpoints(config):
+    """[(base_url, api_key, limit or None), ...] from config["endpoints"], or the single base_url/api_key."""
+    endpoints = config.get("endpoints") or [{"base_url": config["base_url"], "api_key": config["api_key"]}]
+    return [(e["base_url"], e["api_key"], e.get("limit")) for e in endpoints]
+
+
+class Endpoint:
+    """One base_url + api_key with its in-flight count, cooldown and learned token bucket."""
+
+    def __init__(self, base_url, api_key, limit=None):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.limit = limit  # own in-flight cap; None = the pool's max_concurrency
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.rate = None  # learned requests/second; None until repeated 429s
+        self.tokens = 1.0
+        self.refilled = time.monotonic()
+        self.recent = deque()  # monotonic start times within RATE_WINDOW
+        self.recent_429 = deque()  # monotonic 429 times within RATE_WINDOW
+        self.sent = 0
+        self.throttled = 0
+
+    @property
+    def label(self):
+        return f"{self.base_url} key ...{self.api_key[-4:]}" if self.api_key else self.base_url
+
+    def send_rate(self, now):
+        """Requests/second actually sent over the recent window (at least one second of span)."""
+        while self.recent and now - self.recent[0] > RATE_WINDOW:
+            self.recent.popleft()
+        if not self.recent:
+            return 0.0
+        return len(self.recent) / max(1.0, now - self.recent[0])
+
+    def _refill(self, now):
+        if self.rate is not None:
+            self.tokens = min(max(1.0, self.rate * 2.0), self.tokens + (now - self.refilled) * self.rate)
+        self.refilled = now
+
+    def wait_time(self, now, limit):
+        """Seconds until this endpoint may take a request (0 = now); None when only in-flight slots block it."""
+        self._refill(now)
+        if now < self.cooldown_until:
+            return self.cooldown_until - now
+        if self.in_flight >= (self.limit or limit):
+            return None
+        if self.rate is not None and self.tokens < 1.0:
+            return (1.0 - self.tokens) / self.rate
+        return 0.0
+
+
+class KeyPool:
+    def __init__(self, endpoints, limit):
+        self.endpoints = [Endpoint(u, k, n) for u, k, n in endpoints]
+        self.limit = limit
+        self._lock = threading.Lock()  # guards stats reads from other threads
+        self._next = 0
+        self._released = None  # asyncio.Event on the engine loop, set whenever a slot frees
+
+    @property
+    def size(self):
+        return len(self.endpoints)
+
+    @property
+    def capacity(self):
+        """Parallel requests the pool can carry: the sum of the endpoint caps."""
+        return sum(ep.limit or self.limit for ep in self.endpoints)
+
+    def _pick(self, ready, dispatch):
+        if dispatch == "least_loaded":
+            return min(ready, key=lambda e: (e.in_flight, e.sent))
+        for _ in range(len(self.endpoints)):
+            ep = self.endpoints[self._next % len(self.endpoints)]
+            self._next += 1
+            if ep in ready:
+                return ep
+        return ready[0]
+
+    async def acquire(self, dispatch="round_robin", exclude=()):
+        """Wait for an endpoint with a free slot, no cooldown and a token; returns it (call release when done)."""
+        if self._released is None:
+            self._released = asyncio.Event()
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                waits = {}
+                for ep in self.endpoints:
+                    if ep in exclude and len(exclude) < len(self.endpoints):
+                        continue
+                    waits[ep] = ep.wait_time(now, self.limit)
+                ready = [ep for ep, w in waits.items() if w == 0.0]
+                if ready:
+                    ep = self._pick(ready, dispatch)
+                    ep.in_flight += 1
+                    ep.sent += 1
+                    if ep.rate is not None:
+                        ep.tokens -= 1.0
+                    ep.recent.append(now)
+                    while ep.recent and now - ep.recent[0] > RATE_WINDOW:
+                        ep.recent.popleft()
+                    return ep
+                timed = [w for w in waits.values() if w is not None]
+            self._released.clear()
+            try:
+                await asyncio.wait_for(self._released.wait(), timeout=min(timed) if timed else None)
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self, ep, status=None, retry_after=None):
+        """
+        Return a slot. A 429 cools the key down for Retry-After (or DEFAULT_RETRY_AFTER). Only repeated 429s within
+        RATE_WINDOW start a learned rate (half the observed send rate, at least MIN_RATE), and each further 429 halves
+        it; successes raise it again, and it is dropped after a window without 429s.
+        """
+        now = time.monotonic()
+        with self._lock:
+            ep.in_flight = max(0, ep.in_flight - 1)
+            while ep.recent_429 and now - ep.recent_429[0] > RATE_WINDOW:
+                ep.recent_429.popleft()
+            if status == 429:
+                ep.throttled += 1
+                ep.recent_429.append(now)
+                ep.cooldown_until = max(ep.cooldown_until, now + (retry_after if retry_after is not None else DEFAULT_RETRY_AFTER))
+                if ep.rate is not None:
+                    ep.rate = max(MIN_RATE, ep.rate * RATE_DECREASE)
+                elif len(ep.recent_429) >= RATE_LEARN_AFTER:
+                    ep.rate = max(MIN_RATE, ep.send_rate(now) * RATE_DECREASE)
+                # One request may go as soon as the cooldown ends
+                ep.tokens = 1.0
+                ep.refilled = now
+            elif status == 200 and ep.rate is not None:
+                ep.rate = ep.rate * RATE_INCREASE if ep.recent_429 else None
+        if self._released is not None:
+            self._released.set()
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                "endpoint": ep.label,
+                "in_flight": ep.in_flight,
+                "limit": ep.limit or self.limit,
+                "sent": ep.sent,
+                "throttled": ep.throttled,
+                "cooldown_s": round(max(0.0, ep.cooldown_until - now), 1),
+                "learned_rate_per_min": round(ep.rate * 60.0, 2) if ep.rate is not None else None,
+            } for ep in self.endpoints]
+
+    def stats_line(self):
+        parts = [f"{s['endpoint']} sent={s['sent']} 429={s['throttled']} in_flight={s['in_flight']}" for s in self.stats()]
+        return "Key pool: " + "; ".join(parts)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_key_pool(config):
+    """Process-wide KeyPool for the config's endpoints and max_concurrency (per endpoint unless the endpoint sets one)."""
+    limit = max(1, int(config.get("max_concurrency") or DEFAULT_MAX_CONCURRENCY))
+    key = (tuple(config_endpoints(config)), limit)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = KeyPool(key[0], limit)
+            _pools[key] = pool
+    return pool
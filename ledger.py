@@ -0,0 +1,320 @@
+"""
+Generation ledger: append-only SQLite (WAL) history of every Submit (model, payload hash, prompt, url, status,
+per-stage latency, bytes) and every Download save (url -> path). Rows are queued and written in batches by a
+background thread, off the request path. Indexed by model + time and by url, so history questions are answered
+from the index instead of scanning files: the Ledger Query node, or from a shell (stdlib only, no ComfyUI needed):
+
+    python ledger.py latency --model wan-2.6 --since 7d
+    python ledger.py urls --since yesterday [--download DIR]
+"""
+import argparse
+import atexit
+import json
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+LEDGER_FILENAME = "airforce_ledger.sqlite3"
+BATCH_SIZE = 256
+BATCH_WAIT = 0.5  # seconds the writer waits to fill a batch
+SINCE_CHOICES = ["1h", "24h", "today", "yesterday", "7d", "30d", "all"]
+QUERY_KINDS = ["latency", "list"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    model TEXT NOT NULL,
+    payload_hash TEXT,
+    prompt TEXT,
+    url TEXT,
+    status TEXT NOT NULL,
+    kind TEXT,
+    bytes INTEGER,
+    total_s REAL,
+    stages TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_generations_model_ts ON generations (model, ts);
+CREATE INDEX IF NOT EXISTS idx_generations_ts ON generations (ts);
+CREATE INDEX IF NOT EXISTS idx_generations_url ON generations (url);
+CREATE TABLE IF NOT EXISTS saves (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    url TEXT NOT NULL,
+    path TEXT NOT NULL,
+    bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_saves_url ON saves (url);
+"""
+
+_GENERATION_COLUMNS = ("ts", "model", "payload_hash", "prompt", "url", "status", "kind", "bytes", "total_s", "stages", "error")
+_SAVE_COLUMNS = ("ts", "url", "path", "bytes")
+
+
+def default_ledger_path():
+    """ComfyUI user directory /airforce_ledger.sqlite3; ~/.cache outside ComfyUI."""
+    try:
+        import folder_paths
+        base = folder_paths.get_user_directory()
+    except Exception:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, LEDGER_FILENAME)
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=10.0, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def since_range(since, now=None):
+    """(start_ts, end_ts) for a SINCE_CHOICES window; end is None for open-ended windows."""
+    now = now if now is not None else time.time()
+    midnight = datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    if since == "all":
+        return (0.0, None)
+    if since == "today":
+        return (midnight.timestamp(), None)
+    if since == "yesterday":
+        return ((midnight - timedelta(days=1)).timestamp(), midnight.timestamp())
+    units = {"h": 3600, "d": 86400}
+    try:
+        return (now - float(since[:-1]) * units[since[-1]], None)
+    except (KeyError, ValueError, IndexError):
+        raise ValueError(f"since must be one of {SINCE_CHOICES} or <N>h / <N>d, got {since!r}")
+
+
+class Ledger:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with _connect(path) as conn:
+            conn.executescript(_SCHEMA)
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="airforce-ledger", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush, 5.0)
+        self.written = 0
+        self.errors = 0
+
+    # Writes: queued by request threads, committed in batches by the writer thread
+
+    def record_generation(self, **row):
+        row.setdefault("ts", time.time())
+        if isinstance(row.get("stages"), dict):
+            row["stages"] = json.dumps(row["stages"], separators=(",", ":"))
+        self._queue.put(("generations", tuple(row.get(c) for c in _GENERATION_COLUMNS)))
+
+    def record_save(self, url, path, size=None):
+        if url and path:
+            self._queue.put(("saves", (time.time(), url, path, size)))
+
+    def _write_loop(self):
+        conn = _connect(self.path)
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + BATCH_WAIT
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    for table, columns in (("generations", _GENERATION_COLUMNS), ("saves", _SAVE_COLUMNS)):
+                        rows = [r for t, r in batch if t == table]
+                        if rows:
+                            conn.executemany(
+                                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows)
+                self.written += len(batch)
+            except sqlite3.Error:
+                self.errors += len(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self, timeout=None):
+        """Wait until queued rows are committed (or timeout seconds pass)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    # Queries: separate read connection; WAL lets them run while the writer commits
+
+    def _read(self, sql, args=()):
+        self.flush(2.0)
+        conn = _connect(self.path)
+        try:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(sql, args).fetchall()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _where(model, since):
+        start, end = since_range(since)
+        clauses, args = ["g.ts >= ?"], [start]
+        if end is not None:
+            clauses.append("g.ts < ?")
+            args.append(end)
+        if model:
+            clauses.append("g.model = ?")
+            args.append(model)
+        return " AND ".join(clauses), args
+
+    def latency(self, model="", since="7d", stage="total", percentiles=(50, 95, 99)):
+        """Per-model nearest-rank latency percentiles of successful generations for a stage (total = end to end)."""
+        where, args = self._where(model, since)
+        value = "g.total_s" if stage in ("", "total") else "json_extract(g.stages, ?)"
+        value_args = [] if stage in ("", "total") else [f"$.{stage}"]
+        models = [model] if model else [r["model"] for r in self._read(
+            f"SELECT DISTINCT g.model AS model FROM generations g WHERE {where}", args)]
+        out = []
+        for m in models:
+            m_where, m_args = self._where(m, since)
+            base = f"FROM generations g WHERE {m_where} AND g.status = 'ok' AND {value} IS NOT NULL"
+            base_args = m_args + value_args  # placeholder order: WHERE clauses, then the IS NOT NULL value
+            row = self._read(f"SELECT COUNT(*) AS n, AVG({value}) AS mean {base}", value_args + base_args)[0]
+            n = row["n"]
+            entry = {"model": m, "stage": stage or "total", "since": since, "count": n,
+                     "mean": round(row["mean"], 4) if row["mean"] is not None else None}
+            for pct in percentiles:
+                if not n:
+                    entry[f"p{pct}"] = None
+                    continue
+                rank = max(0, min(n - 1, math.ceil(pct / 100.0 * n) - 1))
+                v = self._read(f"SELECT {value} AS v {base} ORDER BY v LIMIT 1 OFFSET ?", value_args + base_args + [rank])
+                entry[f"p{pct}"] = round(v[0]["v"], 4) if v else None
+            out.append(entry)
+        return out
+
+    def history(self, model="", since="24h", status="", limit=100):
+        """Newest-first generations with the latest saved path for each url."""
+        where, args = self._where(model, since)
+        if status:
+            where += " AND g.status = ?"
+            args.append(status)
+        rows = self._read(
+            f"""SELECT g.*, (SELECT s.path FROM saves s WHERE s.url = g.url ORDER BY s.id DESC LIMIT 1) AS path
+                FROM generations g WHERE {where} ORDER BY g.ts DESC LIMIT ?""", args + [int(limit)])
+        out = []
+        for r in rows:
+            d = dict(r)
+            d["time"] = datetime.fromtimestamp(d["ts"]).isoformat(timespec="seconds")
+            d["stages"] = json.loads(d["stages"]) if d["stages"] else {}
+            out.append(d)
+        return out
+
+    def stats_line(self):
+        return f"Ledger: {self.written} rows written, {self._queue.unfinished_tasks} queued, {self.errors} failed ({self.path})"
+
+
+_ledgers = {}
+_ledgers_lock = threading.Lock()
+
+
+def get_ledger(config=None, path=None):
+    """Process-wide Ledger for path (default location unless given); None when the config turns the ledger off."""
+    if config is not None and not config.get("ledger", True):
+        return None
+    path = path or default_ledger_path()
+    with _ledgers_lock:
+        ledger = _ledgers.get(path)
+        if ledger is None:
+            ledger = Ledger(path)
+            _ledgers[path] = ledger
+    return ledger
+
+
+class AirforceLedgerQuery:
+    """Query the generation ledger: latency percentiles per model, or recent results (urls feed Download nodes)."""
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "query": (QUERY_KINDS, {"default": "latency"}),
+                "since": (SINCE_CHOICES, {"default": "7d"}),
+            },
+            "optional": {
+                "model": ("STRING", {"default": "", "placeholder": "Model, e.g. wan-2.6 (empty = all)"}),
+                "stage": ("STRING", {"default": "total", "tooltip": "latency: total, or a stage such as url_frame / cdn_download"}),
+                "status": (["ok", "error", "all"], {"default": "ok", "tooltip": "list: which results to include"}),
+                "limit": ("INT", {"default": 100, "min": 1, "max": 100000}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("result", "urls")
+    FUNCTION = "query"
+    CATEGORY = "🚀Airforce/Modular"
+
+    @classmethod
+    def IS_CHANGED(cls, **kwargs):
+        return time.time()  # the ledger grows between runs
+
+    def query(self, query, since, model="", stage="total", status="ok", limit=100):
+        ledger = get_ledger()
+        model = (model or "").strip()
+        if query == "latency":
+            rows = ledger.latency(model, since, (stage or "total").strip())
+            return (json.dumps(rows, indent=2), "")
+        rows = ledger.history(model, since, "" if status == "all" else status, limit)
+        urls = "\n".join(r["url"] for r in rows if r.get("url"))
+        return (json.dumps(rows, indent=2, ensure_ascii=False), urls)
+
+
+def _download_all(urls, directory):
+    """CLI re-download with the standard library (the Bulk Download node is faster inside ComfyUI)."""
+    import shutil
+    import urllib.request
+
+    os.makedirs(directory, exist_ok=True)
+    for url in urls:
+        name = os.path.basename(url.split("?")[0]) or "download"
+        target = os.path.join(directory, name)
+        try:
+            with urllib.request.urlopen(url, timeout=60) as resp, open(target, "wb") as f:
+                shutil.copyfileobj(resp, f, 1024 * 1024)
+            print(f"saved {target}")
+        except Exception as e:
+            print(f"failed {url}: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the Airforce generation ledger")
+    parser.add_argument("command", choices=["latency", "list", "urls"])
+    parser.add_argument("--db", default=None, help=f"ledger file (default {default_ledger_path()})")
+    parser.add_argument("--model", default="")
+    parser.add_argument("--since", default="7d", help="1h, 24h, today, yesterday, 7d, 30d, all, or <N>h / <N>d")
+    parser.add_argument("--stage", default="total")
+    parser.add_argument("--status", default="ok", help="ok, error or all")
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--download", default="", help="urls: save every url into this directory")
+    args = parser.parse_args()
+
+    ledger = Ledger(args.db or default_ledger_path())
+    if args.command == "latency":
+        print(json.dumps(ledger.latency(args.model, args.since, args.stage), indent=2))
+        return
+    rows = ledger.history(args.model, args.since, "" if args.status == "all" else args.status, args.limit)
+    if args.command == "list":
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+        return
+    urls = [r["url"] for r in rows if r.get("url")]
+    if args.download:
+        _download_all(urls, args.download)
+    else:
+        print("\n".join(urls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+"""
+Local media proxy for the Previewer: preview media is fetched once into a size-bounded on-disk LRU and served from
+ComfyUI's own server, so tabs, redraws and re-created nodes do not stream the CDN again and seeking is local.
+Routes (registered on PromptServer when running inside ComfyUI):
+  GET /airforce/media/{key}         cached file, with HTTP Range (aiohttp FileResponse); while a cold key is still
+                                    being prefetched, a redirect to the CDN url so playback starts at once
+  GET /airforce/media/{key}/poster  small JPEG poster frame (first video frame / image thumbnail)
+Only urls registered by the Previewer get a key, so the routes cannot be used to fetch arbitrary urls.
+"""
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+from .blobstore import get_blob_store
+from .download import CHUNK_SIZE, sniff_extension
+from .retry import fetch_resumable
+
+DEFAULT_MEDIA_CACHE_MB = 2048
+POSTER_MAX_SIDE = 320
+POSTER_QUALITY = 80
+PREFETCH_WORKERS = 2
+ROUTE_PREFIX = "/airforce/media"
+# Registered urls never fetched (prefetch failed, node removed) are forgotten after this long (CDN url lifetime)
+UNFETCHED_TTL_SECONDS = 24 * 3600
+# Registrations and hits only change the index in memory; it is written on fetch / eviction, or at most this often
+INDEX_FLUSH_SECONDS = 30.0
+
+_KEY_RE = re.compile(r"^[0-9a-f]{32}$")
+
+_EXTENSION_CONTENT_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "webp": "image/webp",
+    "gif": "image/gif",
+    "mp4": "video/mp4",
+    "webm": "video/webm",
+    "mp3": "audio/mpeg",
+}
+
+
+def default_media_dir():
+    """ComfyUI user directory /airforce_media; ~/.cache/airforce_media outside ComfyUI."""
+    try:
+        import folder_paths
+        base = folder_paths.get_user_directory()
+    except Exception:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "airforce_media")
+
+
+def media_key(url):
+    return hashlib.sha256(str(url).strip().encode("utf-8")).hexdigest()[:32]
+
+
+def media_route(key):
+    return f"{ROUTE_PREFIX}/{key}"
+
+
+def poster_route(key):
+    return f"{ROUTE_PREFIX}/{key}/poster"
+
+
+class MediaCache:
+    """Directory of <key>.<ext> files (+ <key>.poster.jpg) plus an index.json with url, size, content type, access time."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = None
+        self._dirty = False  # registrations / access times changed since the index was last written
+        self._saved = 0.0
+        self._inflight = {}  # key -> threading.Event while one thread fetches it (others wait)
+        self._posters = {}  # key -> threading.Event while one thread builds its poster
+        self._prefetch = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _index_path(self):
+        return os.path.join(self.directory, "index.json")
+
+    def _path(self, key, entry):
+        return os.path.join(self.directory, f"{key}.{entry.get('ext') or 'bin'}")
+
+    def _poster_path(self, key):
+        return os.path.join(self.directory, key + ".poster.jpg")
+
+    def _load(self):
+        if self._index is None:
+            try:
+                with open(self._index_path(), "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except Exception:
+                self._index = {}
+        return self._index
+
+    def _save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self._index_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self._index_path())
+        self._dirty = False
+        self._saved = time.monotonic()
+
+    def _touch(self):
+        """Note an in-memory index change; written when INDEX_FLUSH_SECONDS have passed since the last save."""
+        self._dirty = True
+        if time.monotonic() - self._saved >= INDEX_FLUSH_SECONDS:
+            self._save()
+
+    def flush(self):
+        """Write registrations and access times recorded since the last save (also run at exit)."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _drop_files(self, key, entry):
+        for path in (self._path(key, entry), self._poster_path(key)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self, keep):
+        """
+        Drop least recently used fetched entries until the cache fits max_bytes, and unfetched registrations older
+        than UNFETCHED_TTL_SECONDS (never `keep` or in-flight keys). Dropped keys leave the index.
+        """
+        index = self._index
+        expired = time.time() - UNFETCHED_TTL_SECONDS
+        for old_key in [k for k, e in index.items() if not e.get("size") and e.get("accessed", 0) < expired]:
+            if old_key != keep and old_key not in self._inflight:
+                self._drop_files(old_key, index.pop(old_key))
+        total = sum(e.get("size", 0) for e in index.values())
+        for old_key in sorted(index, key=lambda k: index[k].get("accessed", 0)):
+            if total <= self.max_bytes:
+                break
+            if old_key == keep or old_key in self._inflight or not index[old_key].get("size"):
+                continue
+            entry = index.pop(old_key)
+            total -= entry["size"]
+            self._drop_files(old_key, entry)
+            self.evictions += 1
+
+    def register(self, url, prefetch=True):
+        """Key for url (stable across restarts); with prefetch the file is fetched in the background."""
+        key = media_key(url)
+        with self._lock:
+            index = self._load()
+            if key not in index:
+                index[key] = {"url": str(url).strip(), "size": 0, "accessed": time.time()}
+                self._touch()
+            cached = bool(index[key].get("size"))
+        if prefetch and not cached:
+            self._prefetch_pool().submit(self._prefetch_one, key)
+        return key
+
+    def _prefetch_pool(self):
+        with self._lock:
+            if self._prefetch is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._prefetch = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="airforce-media")
+            return self._prefetch
+
+    def lookup(self, key):
+        """
+        ("file", path, content_type) when the key is cached or its bytes are already in memory (blob store);
+        otherwise ("url", cdn_url, None) after making sure a prefetch is running. Raises KeyError for unknown keys.
+        """
+        with self._lock:
+            entry = self._load().get(key) if _KEY_RE.match(str(key)) else None
+            if entry is None:
+                raise KeyError(key)
+            url = entry["url"]
+            cached = bool(entry.get("size")) and os.path.exists(self._path(key, entry))
+            fetching = key in self._inflight
+        if cached or get_blob_store().contains(url):
+            return ("file",) + self.fetch(key)
+        if not fetching:
+            self._prefetch_pool().submit(self._prefetch_one, key)
+        return ("url", url, None)
+
+    def _prefetch_one(self, key):
+        try:
+            self.fetch(key)
+        except Exception:
+            pass  # the route retries and reports the error when the browser asks for it
+
+    def fetch(self, key):
+        """
+        (path, content_type) of the cached file for a registered key, fetching it first if needed. Concurrent calls
+        for the same key wait for one fetch. Raises KeyError for unknown keys and the fetch error otherwise.
+        """
+        while True:
+            with self._lock:
+                entry = self._load().get(key) if _KEY_RE.match(str(key)) else None
+                if entry is None:
+                    raise KeyError(key)
+                if entry.get("size") and os.path.exists(self._path(key, entry)):
+                    entry["accessed"] = time.time()
+                    self._touch()
+                    self.hits += 1
+                    return (self._path(key, entry), entry.get("content_type") or "application/octet-stream")
+                waiting = self._inflight.get(key)
+                if waiting is None:
+                    self._inflight[key] = threading.Event()
+                    self.misses += 1
+                    url = entry["url"]
+                    break
+                self.coalesced += 1
+            waiting.wait()
+        try:
+            ext, content_type, size = self._download(key, url)
+            with self._lock:
+                entry = self._load().setdefault(key, {"url": url})
+                entry.update(ext=ext, content_type=content_type, size=size, accessed=time.time(), poster=False)
+                self._evict(keep=key)
+                self._save()
+                return (self._path(key, entry), content_type)
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    def _download(self, key, url):
+        """Fill <key>.<ext> from the blob store (already fetched by Submit) or the CDN; returns (ext, content_type, size)."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".airforce_", suffix=".part", dir=self.directory)
+        content_type = ""
+        try:
+            with os.fdopen(fd, "w+b") as f:
+                stored = get_blob_store().iter_chunks(url, CHUNK_SIZE)
+                if stored is not None:
+                    for chunk in stored:
+                        f.write(chunk)
+                else:
+                    _, content_type = fetch_resumable(url, f, chunk_size=CHUNK_SIZE, cancellable=False)
+                size = f.tell()
+                f.seek(0)
+                head = f.read(16)
+            ext = sniff_extension(head, content_type) or "mp4"
+            content_type = _EXTENSION_CONTENT_TYPES.get(ext, content_type or "application/octet-stream")
+            os.replace(tmp_path, os.path.join(self.directory, f"{key}.{ext}"))
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return (ext, content_type, size)
+
+    def poster(self, key):
+        """
+        Path of a JPEG poster (first video frame or image thumbnail, longest side POSTER_MAX_SIDE), made once per key;
+        concurrent requests for the same key wait for one build.
+        """
+        path, content_type = self.fetch(key)
+        poster_path = self._poster_path(key)
+        while True:
+            with self._lock:
+                entry = self._load().get(key) or {}
+                if entry.get("poster") and os.path.exists(poster_path):
+                    return poster_path
+                waiting = self._posters.get(key)
+                if waiting is None:
+                    self._posters[key] = threading.Event()
+                    break
+            waiting.wait()
+        try:
+            _write_poster(path, content_type, poster_path)
+            with self._lock:
+                entry = self._load().get(key)
+                if entry is not None:
+                    entry["poster"] = True
+                    self._touch()
+            return poster_path
+        finally:
+            with self._lock:
+                self._posters.pop(key).set()
+
+    def iter_chunks(self, url, chunk_size=CHUNK_SIZE):
+        """Chunks of an already cached url (Download copies from here instead of the CDN); None if not cached."""
+        key = media_key(url)
+        with self._lock:
+            entry = self._load().get(key)
+            if not entry or not entry.get("size"):
+                return None
+            path = self._path(key, entry)
+            entry["accessed"] = time.time()
+            self._touch()
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+
+        def _read():
+            with f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+
+        return _read()
+
+    def stats(self):
+        with self._lock:
+            index = self._load()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "entries": sum(1 for e in index.values() if e.get("size")),
+                "registered": len(index),
+                "bytes": sum(e.get("size", 0) for e in index.values()),
+            }
+
+
+def _write_poster(path, content_type, poster_path):
+    """First decodable video frame (PyAV) or the image itself, scaled down and saved as JPEG."""
+    from PIL import Image
+
+    if content_type.startswith("video/"):
+        import av
+        container = av.open(path, mode="r")
+        try:
+            stream = container.streams.video[0]
+            img = next(container.decode(stream)).to_image()
+        finally:
+            container.close()
+    elif content_type.startswith("image/"):
+        img = Image.open(path)
+        img.draft("RGB", (POSTER_MAX_SIDE, POSTER_MAX_SIDE))
+    else:
+        raise ValueError(f"No poster for {content_type}")
+    img = img.convert("RGB")
+    img.thumbnail((POSTER_MAX_SIDE, POSTER_MAX_SIDE))
+    tmp = poster_path + ".tmp"
+    img.save(tmp, format="JPEG", quality=POSTER_QUALITY)
+    os.replace(tmp, poster_path)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_media_cache():
+    """Process-wide MediaCache (created on first use)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MediaCache(default_media_dir(), DEFAULT_MEDIA_CACHE_MB * 1024 * 1024)
+            atexit.register(_cache.flush)
+        return _cache
+
+
+async def _serve_media(request):
+    from aiohttp import web
+
+    try:
+        kind, target, content_type = await asyncio.get_running_loop().run_in_executor(None, get_media_cache().lookup, request.match_info["key"])
+    except KeyError:
+        return web.Response(status=404, text="Unknown media key")
+    except Exception as e:
+        return web.Response(status=502, text=f"Media fetch failed: {e}")
+    if kind == "url":
+        # Cold key: play from the CDN (as before the proxy) while the prefetch fills the cache; not cached by the browser
+        raise web.HTTPFound(target, headers={"Cache-Control": "no-store"})
+    return web.FileResponse(target, headers={"Content-Type": content_type, "Cache-Control": "private, max-age=86400"})
+
+
+async def _serve_poster(request):
+    from aiohttp import web
+
+    try:
+        path = await asyncio.get_running_loop().run_in_executor(None, get_media_cache().poster, request.match_info["key"])
+    except KeyError:
+        return web.Response(status=404, text="Unknown media key")
+    except Exception as e:
+        return web.Response(status=404, text=f"No poster: {e}")
+    return web.FileResponse(path, headers={"Content-Type": "image/jpeg", "Cache-Control": "private, max-age=86400"})
+
+
+def register_routes():
+    """Add the media routes to ComfyUI's PromptServer; False outside ComfyUI (no server module / instance)."""
+    try:
+        from server import PromptServer
+        routes = PromptServer.instance.routes
+    except Exception:
+        return False
+    routes.get(ROUTE_PREFIX + "/{key}")(_serve_media)
+    routes.get(ROUTE_PREFIX + "/{key}/poster")(_serve_poster)
+    return True
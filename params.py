@@ -1,341 +1,203 @@
-from .config import MODEL_REGISTRY, ASPECT_RATIO_PRESETS
+"""
+Params nodes generated from config.MODEL_REGISTRY. Each series schema is compiled once at import into INPUT_TYPES,
+one validator per widget and a payload builder, then turned into a node class (class names are stable).
+Extra series or models load from JSON without code changes (see extra_model_files / load_registry).
+"""
+import copy
+import json
+import logging
+import os
+
+from .config import ASPECT_RATIO_PRESETS, MODEL_REGISTRY, PAYLOAD_DEFAULTS, PRIORITY_CLASSES
 from .upload import parse_image_urls
 
-
-def _flux_dim(v):
-    """Flux width/height: 256-2048, must be multiple of 8."""
-    v = max(256, min(2048, int(v)))
-    return (v // 8) * 8
-
-
-class AirforceNanoParams:
-    @classmethod
-    def INPUT_TYPES(cls):
-        nano_models = MODEL_REGISTRY["nano"]["models"]
-        return {
-            "required": {
-                "model": (nano_models, {"default": nano_models[0]}),
-                "aspectRatio": (ASPECT_RATIO_PRESETS, {"default": "1:1"}),
-                "resolution": (["1k", "2k", "4k"], {"default": "1k"}),
-            },
-            "optional": {
-                "reference_urls": ("STRING", {"default": "", "placeholder": "From AnonDrop Upload node, one URL per line, max 8"}),
-            }
-        }
-
-    RETURN_TYPES = ("AF_PARAMS",)
-    RETURN_NAMES = ("params",)
-    FUNCTION = "pack"
-    CATEGORY = "🚀Airforce/Modular"
-
-    def pack(self, model, aspectRatio, resolution, reference_urls=None):
-        payload = {
-            "model": model,
-            "n": 1,
-            "size": "1024x1024",
-            "response_format": "url",
-            "aspectRatio": aspectRatio,
-            "resolution": resolution
-        }
-        urls = parse_image_urls(reference_urls, max_count=8)
-        if urls is not None:
-            payload["image_urls"] = urls
-        return ({"payload": payload, },)
-
-
-FLUX_PRO_FLEX_MODELS = ["flux-2-pro", "flux-2-flex"]
-FLUX_DEV_KLEIN_MODELS = ["flux-2-dev", "flux-2-klein-9b", "flux-2-klein-4b"]
-
-
-class AirforceFluxProFlexParams:
-    """Flux Pro / Flex: aspectRatio + resolution (1k/2k), reference images max 8."""
-
-    @classmethod
+logger = logging.getLogger(__name__)
+
+FIELD_TYPES = ("choice", "int", "bool", "string")
+
+
+def extra_model_files():
+    """JSON files merged into the registry: models.json next to this file, then <ComfyUI user dir>/airforce_models.json."""
+    paths = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "models.json")]
+    try:
+        import folder_paths
+        paths.append(os.path.join(folder_paths.get_user_directory(), "airforce_models.json"))
+    except Exception:
+        pass
+    return paths
+
+
+def load_registry(paths=None):
+    """
+    MODEL_REGISTRY merged with JSON files shaped like it: {"<series>": {...}}. For a known series, listed models are
+    appended and other keys replace the built-in ones; a new series needs at least "class" and "models".
+    Unreadable files are logged and skipped.
+    """
+    registry = copy.deepcopy(MODEL_REGISTRY)
+    for path in extra_model_files() if paths is None else paths:
+        if not os.path.isfile(path):
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for series, spec in data.items():
+                base = registry.get(series)
+                if base is None:
+                    registry[series] = dict(spec)
+                    continue
+                models = base["models"] + [m for m in spec.get("models", ()) if m not in base["models"]]
+                base.update({k: v for k, v in spec.items() if k != "models"})
+                base["models"] = models
+        except Exception as e:
+            logger.warning("Airforce: skipping model file %s: %s", path, e)
+    return registry
+
+
+def _compile_field(owner, field):
+    """(name, payload_key, when, default, check, widget) for one field spec; check(value) validates / normalises."""
+    name = field["name"]
+    ftype = field.get("type", "choice")
+    if ftype not in FIELD_TYPES:
+        raise ValueError(f"{owner}: field {name} has unknown type {ftype!r}")
+
+    if ftype == "choice":
+        choices = ASPECT_RATIO_PRESETS if field["choices"] == "aspect_ratios" else list(field["choices"])
+        allowed = frozenset(choices)
+        default = field.get("default", choices[0])
+        widget = (choices, {"default": default})
+
+        def check(value):
+            if value not in allowed:
+                raise ValueError(f"{owner}: {name} must be one of {choices}, got {value!r}")
+            return value
+    elif ftype == "int":
+        lo, hi, step = int(field.get("min", 0)), int(field.get("max", 8192)), int(field.get("step", 1))
+        default = int(field.get("default", lo))
+        widget = ("INT", {"default": default, "min": lo, "max": hi, "step": step})
+
+        def check(value):
+            v = max(lo, min(hi, int(value)))
+            return lo + (v - lo) // step * step
+    elif ftype == "bool":
+        default = bool(field.get("default", False))
+        opts = {"default": default}
+        for label in ("label_on", "label_off"):
+            if label in field:
+                opts[label] = field[label]
+        widget = ("BOOLEAN", opts)
+        check = bool
+    else:
+        default = field.get("default", "")
+        empty = field.get("empty")
+        opts = {"default": default}
+        if "placeholder" in field:
+            opts["placeholder"] = field["placeholder"]
+        widget = ("STRING", opts)
+
+        def check(value):
+            return (value or "").strip() or empty or ""
+
+    return (name, field.get("key", name), field.get("when"), default, check, widget)
+
+
+class ParamsSchema:
+    """One compiled registry entry: INPUT_TYPES plus build(model, values) -> payload."""
+
+    def __init__(self, series, spec):
+        self.series = series
+        self.class_name = spec["class"]
+        self.display = spec.get("display", self.class_name)
+        self.doc = spec.get("doc")
+        self.models = list(spec["models"])
+        if not self.models:
+            raise ValueError(f"{self.class_name}: no models")
+        self._models = frozenset(self.models)
+        self._fields = [_compile_field(self.class_name, f) for f in spec.get("fields", ())]
+        self._derived = dict(spec.get("derived") or {})
+        self.priority = spec.get("priority", PRIORITY_CLASSES[0])
+        if self.priority not in PRIORITY_CLASSES:
+            raise ValueError(f"{self.class_name}: unknown priority {self.priority!r}")
+
+        required = {"model": (self.models, {"default": spec.get("default_model", self.models[0])})}
+        for name, _, _, _, _, widget in self._fields:
+            required[name] = widget
+        self.input_types = {"required": required}
+        self.arg_names = [f[0] for f in self._fields]  # pack() positional order after model
+
+        refs = spec.get("references")
+        self._refs = None
+        if refs:
+            max_count = int(refs.get("max", 8))
+            self._refs = (max_count, refs.get("key", "image_urls"), bool(refs.get("single")))
+            placeholder = refs.get("placeholder", f"From AnonDrop Upload, one URL per line, max {max_count}")
+            self.input_types["optional"] = {"reference_urls": ("STRING", {"default": "", "placeholder": placeholder})}
+            self.arg_names.append("reference_urls")
+
+    def build(self, model, values):
+        """Validated payload for model and widget values; raises ValueError for values outside the schema."""
+        if model not in self._models:
+            raise ValueError(f"{self.class_name}: unknown model {model!r}")
+        checked = {name: check(values.get(name, default)) for name, _, _, default, check, _ in self._fields}
+        payload = {"model": model, **PAYLOAD_DEFAULTS}
+        for name, key, when, _, _, _ in self._fields:
+            if key is not None and (when is None or checked[when]):
+                payload[key] = checked[name]
+        for key, template in self._derived.items():
+            payload[key] = template.format(**checked)
+        if self._refs is not None:
+            max_count, key, single = self._refs
+            urls = parse_image_urls(values.get("reference_urls"), max_count=max_count)
+            if urls:
+                payload[key] = urls[0] if single else urls
+        return payload
+
+
+def _make_node_class(schema):
     def INPUT_TYPES(cls):
-        return {
-            "required": {
-                "model": (FLUX_PRO_FLEX_MODELS, {"default": FLUX_PRO_FLEX_MODELS[0]}),
-                "aspectRatio": (ASPECT_RATIO_PRESETS, {"default": "1:1"}),
-                "resolution": (["1k", "2k"], {"default": "1k"}),
-            },
-            "optional": {
-                "reference_urls": ("STRING", {"default": "", "placeholder": "From AnonDrop Upload, one URL per line, max 8"}),
-            }
-        }
-
-    RETURN_TYPES = ("AF_PARAMS",)
-    RETURN_NAMES = ("params",)
-    FUNCTION = "pack"
-    CATEGORY = "🚀Airforce/Modular"
-
-    def pack(self, model, aspectRatio, resolution, reference_urls=None):
-        payload = {
-            "model": model,
-            "n": 1,
-            "size": "1024x1024",
-            "response_format": "url",
-            "aspectRatio": aspectRatio,
-            "resolution": resolution,
-        }
-        urls = parse_image_urls(reference_urls, max_count=8)
-        if urls is not None:
-            payload["image_urls"] = urls
-        return ({"payload": payload, },)
-
-
-class AirforceFluxDevKleinParams:
-    """Flux Dev / Klein: width and height in pixels, reference images max 4."""
-
-    @classmethod
-    def INPUT_TYPES(cls):
-        return {
-            "required": {
-                "model": (FLUX_DEV_KLEIN_MODELS, {"default": FLUX_DEV_KLEIN_MODELS[0]}),
-                "width": ("INT", {"default": 1024, "min": 256, "max": 2048, "step": 8}),
-                "height": ("INT", {"default": 1024, "min": 256, "max": 2048, "step": 8}),
-            },
-            "optional": {
-                "reference_urls": ("STRING", {"default": "", "placeholder": "From AnonDrop Upload, one URL per line, max 4"}),
-            }
-        }
-
-    RETURN_TYPES = ("AF_PARAMS",)
-    RETURN_NAMES = ("params",)
-    FUNCTION = "pack"
-    CATEGORY = "🚀Airforce/Modular"
-
-    def pack(self, model, width, height, reference_urls=None):
-        w, h = _flux_dim(width), _flux_dim(height)
-        payload = {
-            "model": model,
-            "n": 1,
-            "size": "1024x1024",
-            "response_format": "url",
-            "aspectRatio": f"{w}:{h}",
-        }
-        urls = parse_image_urls(reference_urls, max_count=4)
-        if urls is not None:
-            payload["image_urls"] = urls
-        return ({"payload": payload, },)
-
-
-class AirforceZImageParams:
-    @classmethod
-    def INPUT_TYPES(cls):
-        return {
-            "required": {
-                "model": (["z-image"], {"default": "z-image"}),
-                "aspectRatio": (ASPECT_RATIO_PRESETS, {"default": "16:9"}),
-            }
-        }
-
-    RETURN_TYPES = ("AF_PARAMS",)
-    RETURN_NAMES = ("params",)
-    FUNCTION = "pack"
-    CATEGORY = "🚀Airforce/Modular"
-
-    def pack(self, model, aspectRatio):
-        return ({"payload": {
-            "model": model,
-            "n": 1,
-            "size": "1024x1024",
-            "response_format": "url",
-            "aspectRatio": aspectRatio,
-        }, },)
-
-
-class AirforceImagenParams:
-    @classmethod
-    def INPUT_TYPES(cls):
-        return {
-            "required": {
-                "model": (["imagen-3", "imagen-4"], {"default": "imagen-4"}),
-            }
-        }
-
-    RETURN_TYPES = ("AF_PARAMS",)
-    RETURN_NAMES = ("params",)
-    FUNCTION = "pack"
-    CATEGORY = "🚀Airforce/Modular"
-
-    def pack(self, model):
-        return ({"payload": {
-            "model": model,
-            "n": 1,
-            "size": "1024x1024",
-            "response_format": "url",
-        }, },)
-
-
-class AirforceSeedreamParams:
-    """Seedream image params; reference images max 14."""
-
-    @classmethod
-    def INPUT_TYPES(cls):
-        return {
-            "required": {
-                "model": (["seedream-4.5"], {"default": "seedream-4.5"}),
-                "aspectRatio": (ASPECT_RATIO_PRESETS, {"default": "1:1"}),
-                "quality": (["high", "basic"], {"default": "high"}),
-            },
-            "optional": {
-                "reference_urls": ("STRING", {"default": "", "placeholder": "From AnonDrop Upload, one URL per line, max 14"}),
-            }
-        }
-
-    RETURN_TYPES = ("AF_PARAMS",)
-    RETURN_NAMES = ("params",)
-    FUNCTION = "pack"
-    CATEGORY = "🚀Airforce/Modular"
-
-    def pack(self, model, aspectRatio, quality, reference_urls=None):
-        payload = {
-            "model": model,
-            "n": 1,
-            "size": "1024x1024",
-            "response_format": "url",
-            "aspectRatio": aspectRatio,
-            "quality": quality,
-        }
-        urls = parse_image_urls(reference_urls, max_count=14)
-        if urls is not None:
-            payload["image_urls"] = urls
-        return ({"payload": payload, },)
-
-
-class AirforceSunoParams:
-    """Suno video params; style is used when custom mode is on. Order: model, instrumental, custom mode, style."""
-
-    @classmethod
-    def INPUT_TYPES(cls):
-        return {
-            "required": {
-                "model": (["suno-v5", "suno-4.5"], {"default": "suno-v5"}),
-                "instrumental": ("BOOLEAN", {"default": True, "label_on": "Instrumental", "label_off": "With vocals"}),
-                "custom_mode": ("BOOLEAN", {"default": True, "label_on": "On", "label_off": "Off"}),
-                "style": ("STRING", {"default": "", "placeholder": "Style (used when custom mode is on)"}),
-            }
-        }
-
-    RETURN_TYPES = ("AF_PARAMS",)
-    RETURN_NAMES = ("params",)
-    FUNCTION = "pack"
-    CATEGORY = "🚀Airforce/Modular"
-
-    def pack(self, model, instrumental, custom_mode, style):
-        payload = {
-            "model": model,
-            "n": 1,
-            "size": "1024x1024",
-            "response_format": "url",
-            "custom": custom_mode,
-            "instrumental": instrumental,
-        }
-        if custom_mode:
-            payload["style"] = (style or "").strip() or "default"
-        return ({"payload": payload, },)
-
-
-# Grok Imagine Video supports 1:1, 2:3, 3:2 only
-GROK_ASPECT_RATIOS = ["1:1", "2:3", "3:2"]
-
-
-class AirforceGrokImagineVideoParams:
-    """Grok Imagine Video params; aspect 1:1/2:3/3:2 only; up to 2 reference images."""
-
-    @classmethod
-    def INPUT_TYPES(cls):
-        return {
-            "required": {
-                "model": (["grok-imagine-video"], {"default": "grok-imagine-video"}),
-                "aspectRatio": (GROK_ASPECT_RATIOS, {"default": "2:3"}),
-                "mode": (["normal", "spicy", "fun"], {"default": "spicy"}),
-            },
-            "optional": {
-                "reference_urls": ("STRING", {"default": "", "placeholder": "From AnonDrop Upload, one URL per line, max 2"}),
-            }
-        }
-
-    RETURN_TYPES = ("AF_PARAMS",)
-    RETURN_NAMES = ("params",)
-    FUNCTION = "pack"
-    CATEGORY = "🚀Airforce/Modular"
-
-    def pack(self, model, aspectRatio, mode, reference_urls=None):
-        payload = {
-            "model": model,
-            "n": 1,
-            "size": "1024x1024",
-            "response_format": "url",
-            "mode": mode,
-            "aspectRatio": aspectRatio,
-        }
-        urls = parse_image_urls(reference_urls, max_count=2)
-        if urls is not None:
-            payload["image_urls"] = urls
-        return ({"payload": payload, },)
-
-
-class AirforceVeoParams:
-    """Veo video params; prompt only, no other controls or reference images."""
-
-    @classmethod
-    def INPUT_TYPES(cls):
-        return {
-            "required": {
-                "model": (["veo-3.1-fast"], {"default": "veo-3.1-fast"}),
-            }
-        }
-
-    RETURN_TYPES = ("AF_PARAMS",)
-    RETURN_NAMES = ("params",)
-    FUNCTION = "pack"
-    CATEGORY = "🚀Airforce/Modular"
-
-    def pack(self, model):
-        return ({"payload": {
-            "model": model,
-            "n": 1,
-            "size": "1024x1024",
-            "response_format": "url",
-        }, },)
-
-
-class AirforceWanParams:
-    """Wan-2.6 video params; one reference image via wan_image_url."""
-
-    @classmethod
-    def INPUT_TYPES(cls):
-        return {
-            "required": {
-                "model": (["wan-2.6"], {"default": "wan-2.6"}),
-                "aspectRatio": (["16:9", "9:16"], {"default": "16:9"}),
-                "duration": ([5, 10, 15], {"default": 15}),
-                "resolution": (["1080P", "720P"], {"default": "1080P"}),
-                "sound": ("BOOLEAN", {"default": True, "label_on": "On", "label_off": "Off"}),
-            },
-            "optional": {
-                "reference_urls": ("STRING", {"default": "", "placeholder": "From AnonDrop Upload, one URL per line, first used"}),
-            }
-        }
-
-    RETURN_TYPES = ("AF_PARAMS",)
-    RETURN_NAMES = ("params",)
-    FUNCTION = "pack"
-    CATEGORY = "🚀Airforce/Modular"
-
-    def pack(self, model, aspectRatio, duration, resolution, sound, reference_urls=None):
-        payload = {
-            "model": model,
-            "n": 1,
-            "size": "1024x1024",
-            "response_format": "url",
-            "aspectRatio": aspectRatio,
-            "duration": duration,
-            "resolution": resolution,
-            "sound": sound,
-        }
-        urls = parse_image_urls(reference_urls, max_count=1)
-        if urls is not None and len(urls) > 0:
-            payload["wan_image_url"] = urls[0]
-        return ({"payload": payload, },)
+        return schema.input_types
+
+    def pack(self, model, *args, **values):
+        values.update(zip(schema.arg_names, args))
+        return ({"payload": schema.build(model, values), "priority": schema.priority},)
+
+    return type(schema.class_name, (), {
+        "__module__": __name__,
+        "__doc__": schema.doc,
+        "SCHEMA": schema,
+        "INPUT_TYPES": classmethod(INPUT_TYPES),
+        "RETURN_TYPES": ("AF_PARAMS",),
+        "RETURN_NAMES": ("params",),
+        "FUNCTION": "pack",
+        "CATEGORY": "🚀Airforce/Modular",
+        "pack": pack,
+    })
+
+
+def build_params_nodes(registry):
+    """({class_name: node class}, {class_name: display name}). A broken JSON entry is logged; built-ins fall back to config."""
+    classes, display = {}, {}
+    for series, spec in registry.items():
+        try:
+            schema = ParamsSchema(series, spec)
+        except Exception as e:
+            logger.warning("Airforce: invalid model series %s: %s", series, e)
+            if series not in MODEL_REGISTRY:
+                continue
+            schema = ParamsSchema(series, MODEL_REGISTRY[series])
+        classes[schema.class_name] = _make_node_class(schema)
+        display[schema.class_name] = schema.display
+    return classes, display
+
+
+PARAMS_NODE_CLASSES, PARAMS_DISPLAY_NAMES = build_params_nodes(load_registry())
+
+AirforceNanoParams = PARAMS_NODE_CLASSES["AirforceNanoParams"]
+AirforceFluxProFlexParams = PARAMS_NODE_CLASSES["AirforceFluxProFlexParams"]
+AirforceFluxDevKleinParams = PARAMS_NODE_CLASSES["AirforceFluxDevKleinParams"]
+AirforceZImageParams = PARAMS_NODE_CLASSES["AirforceZImageParams"]
+AirforceImagenParams = PARAMS_NODE_CLASSES["AirforceImagenParams"]
+AirforceSeedreamParams = PARAMS_NODE_CLASSES["AirforceSeedreamParams"]
+AirforceSunoParams = PARAMS_NODE_CLASSES["AirforceSunoParams"]
+AirforceGrokImagineVideoParams = PARAMS_NODE_CLASSES["AirforceGrokImagineVideoParams"]
+AirforceVeoParams = PARAMS_NODE_CLASSES["AirforceVeoParams"]
+AirforceWanParams = PARAMS_NODE_CLASSES["AirforceWanParams"]
@@ -1,5 +1,9 @@
+from .media_proxy import get_media_cache, media_route, poster_route
+
+
 class AirforceVideoPreview:
-    """Video preview only: takes URL, frontend renders HTML5 video in the node (image URLs are ignored)."""
+    """Video preview only: takes URL, frontend renders HTML5 video in the node (image URLs are ignored).
+    The browser loads the video from the local media proxy (cached on disk, seekable) rather than the CDN."""
 
     @classmethod
     def INPUT_TYPES(cls):
@@ -15,4 +19,9 @@ class AirforceVideoPreview:
     CATEGORY = "🚀Airforce/Modular"
 
     def preview(self, url):
-        return {"ui": {"video_url": [url]}, "result": (url,)}
+        ui = {"video_url": [url]}
+        if url and str(url).strip().lower().startswith(("http://", "https://")):
+            key = get_media_cache().register(url)
+            ui["media_url"] = [media_route(key)]
+            ui["poster_url"] = [poster_route(key)]
+        return {"ui": ui, "result": (url,)}
@@ -0,0 +1,126 @@
+"""
+Live progress for in-flight generations. While an SSE stream is open, its status / progress / queue-position frames
+are pushed to ComfyUI as they arrive: the running node's progress bar (0-100) and an "airforce.progress" websocket
+event with the status text, queue position, time to first frame and time since the last keepalive (drawn under the
+node by web/airforce_preview.js). Batch Submit reports the mean over its requests. Outside ComfyUI nothing is sent.
+"""
+import sys
+import threading
+import time
+
+EVENT = "airforce.progress"
+# While no bytes arrive, the stream wakes this often to check for a stall and refresh the keepalive age
+TICK_INTERVAL = 1.0
+# Minimum seconds between websocket messages for one node; status / queue-position changes are sent at once
+SEND_INTERVAL = 0.5
+
+
+def _server():
+    try:
+        from server import PromptServer
+        return PromptServer.instance
+    except Exception:
+        return None
+
+
+def _executing_node(server):
+    """(prompt_id, node_id) of the node executing on this thread (executor context, else the server's last ids)."""
+    try:
+        from comfy_execution.utils import get_executing_context
+        ctx = get_executing_context()
+        if ctx is not None:
+            return (ctx.prompt_id, ctx.node_id)
+    except Exception:
+        pass
+    return (getattr(server, "last_prompt_id", None), getattr(server, "last_node_id", None))
+
+
+def _progress_bar(node_id):
+    # Only use comfy.utils if ComfyUI already imported it (it pulls in torch)
+    utils = sys.modules.get("comfy.utils")
+    if utils is None:
+        return None
+    try:
+        return utils.ProgressBar(100, node_id=node_id)
+    except TypeError:
+        return utils.ProgressBar(100)  # older ComfyUI: the hook falls back to the executing node
+    except Exception:
+        return None
+
+
+class NodeProgress:
+    """Progress of one node's request(s). Create it on the node's thread (current()); report from the engine loop."""
+
+    def __init__(self, server, node_id, prompt_id=None, client_id=None, items=1):
+        self.server = server
+        self.node_id = node_id
+        self.prompt_id = prompt_id
+        self.client_id = client_id
+        self.items = max(1, int(items))
+        self._bar = _progress_bar(node_id)
+        self._lock = threading.Lock()
+        self._state = {}  # item -> {"status", "progress", "queue_position"}
+        self._sent = 0.0
+        self._value = 0
+
+    @classmethod
+    def current(cls, items=1):
+        """NodeProgress for the node executing on this thread, or None outside ComfyUI."""
+        server = _server()
+        if server is None:
+            return None
+        prompt_id, node_id = _executing_node(server)
+        if node_id is None:
+            return None
+        return cls(server, node_id, prompt_id, getattr(server, "client_id", None), items)
+
+    def item(self, index=0):
+        """Reporter for one request of the node (Batch Submit: its position in the batch)."""
+        return ItemProgress(self, index)
+
+    def report(self, index, event=None, watch=None):
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.setdefault(index, {})
+            urgent = False
+            if event and "status" in event and "queue_position" not in event:
+                state.pop("queue_position", None)  # left the queue
+            for key, value in (event or {}).items():
+                if state.get(key) != value:
+                    urgent = urgent or key != "progress"
+                    state[key] = value
+            value = round(100 * sum(s.get("progress", 0.0) for s in self._state.values()) / self.items)
+            bar_changed = value != self._value
+            self._value = value
+            if not urgent and not bar_changed and now - self._sent < SEND_INTERVAL:
+                return
+            self._sent = now
+            message = {
+                "node": self.node_id,
+                "prompt_id": self.prompt_id,
+                "item": index,
+                "items": self.items,
+                "value": value,
+                "status": state.get("status"),
+                "queue_position": state.get("queue_position"),
+            }
+        if watch is not None:
+            message.update(watch.snapshot())
+        try:
+            if bar_changed and self._bar is not None:
+                self._bar.update_absolute(value, 100)
+            self.server.send_sync(EVENT, message, self.client_id)
+        except Exception:
+            pass
+
+
+class ItemProgress:
+    __slots__ = ("node", "index")
+
+    def __init__(self, node, index):
+        self.node = node
+        self.index = index
+
+    def report(self, event=None, watch=None):
+        """Push a frame's status fields (sse.frame_progress) and the stream's timing; throttled per node."""
+        self.node.report(self.index, event, watch)
@@ -0,0 +1,172 @@
+"""
+Retry engine: classifies failures as retryable (5xx, connection resets, streams cut short) or fatal, backs off
+exponentially with full jitter, and resumes interrupted CDN downloads with HTTP Range into the partial file.
+Attempts and backoff come from AF_CONFIG max_retries / backoff_factor (see session.http_policy).
+Downloads follow ComfyUI's Cancel (see cancel.py): the socket is shut down and no retry is made.
+"""
+import random
+import re
+import socket
+import time
+
+from .cancel import CANCEL_POLL_INTERVAL, cancel_scope
+from .session import get_session, http_policy, request_timeout
+
+RETRYABLE_STATUS_CODES = (500, 502, 503, 504)
+MAX_BACKOFF = 30.0
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class StreamCut(ConnectionError):
+    """A response ended early: SSE closed before the URL frame / [DONE], or a body shorter than announced."""
+
+
+class StreamStalled(TimeoutError):
+    """An SSE stream sent no frame (not even a keepalive) within the first-frame / stall timeout. Fatal, like a
+    request timeout: the job may still be running upstream, so it is not re-submitted."""
+
+
+def is_retryable_status(status):
+    return status in RETRYABLE_STATUS_CODES
+
+
+def is_retryable_error(exc):
+    """True for transient network failures; HTTP errors only for 5xx. Timeouts of a whole request are fatal."""
+    import aiohttp
+    import requests
+
+    if isinstance(exc, requests.HTTPError):
+        return is_retryable_status(getattr(exc.response, "status_code", None))
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return is_retryable_status(exc.status)
+    return isinstance(exc, (
+        ConnectionError,  # includes StreamCut and ConnectionResetError
+        aiohttp.ClientConnectionError,
+        aiohttp.ClientPayloadError,
+        requests.ConnectionError,
+        requests.exceptions.ChunkedEncodingError,
+        requests.exceptions.ReadTimeout,
+    ))
+
+
+def is_connect_error(exc):
+    """True when the request never reached the server (connection refused, DNS failure, connect timeout), so a
+    non-idempotent POST may be sent again. A reset, read timeout or cut stream after connecting is not: the server
+    may already have accepted (and billed) the request."""
+    import aiohttp
+
+    return isinstance(exc, (aiohttp.ClientConnectorError, getattr(aiohttp, "ConnectionTimeoutError", aiohttp.ClientConnectorError)))
+
+
+def retry_policy(config=None):
+    """(max_retries, backoff_factor) from AF_CONFIG."""
+    _, max_retries, backoff, _ = http_policy(config)
+    return (max_retries, backoff)
+
+
+def backoff_delay(attempt, backoff_factor, cap=MAX_BACKOFF):
+    """Full-jitter exponential backoff for retry number `attempt` (1-based): uniform(0, min(cap, factor * 2**(attempt-1)))."""
+    if backoff_factor <= 0:
+        return 0.0
+    return random.uniform(0.0, min(cap, backoff_factor * (2 ** max(0, attempt - 1))))
+
+
+def _content_range(resp):
+    """(start, total) from a 206 Content-Range header; (None, None) if absent or malformed."""
+    m = re.match(r"bytes (\d+)-\d+/(\d+|\*)", resp.headers.get("Content-Range", ""))
+    if not m:
+        return (None, None)
+    return (int(m.group(1)), None if m.group(2) == "*" else int(m.group(2)))
+
+
+def _response_socket(resp):
+    """The socket under a streamed requests/urllib3 response: the connection's, or (once http.client has detached
+    it from the connection) the one behind the response's file object."""
+    sock = getattr(getattr(resp.raw, "connection", None), "sock", None)
+    if sock is None:
+        fp = getattr(getattr(resp.raw, "_fp", None), "fp", None)
+        sock = getattr(getattr(fp, "raw", None), "_sock", None)
+    return sock
+
+
+def _shutdown_response(resp):
+    """Unblock a read on resp from another thread by shutting its socket down (the connection is then discarded)."""
+    sock = _response_socket(resp)
+    if sock is not None:
+        sock.shutdown(socket.SHUT_RDWR)
+
+
+def _sleep(seconds, scope):
+    """time.sleep that returns early (raising the interrupt) when the scope is cancelled."""
+    end = time.monotonic() + seconds
+    while True:
+        scope.check()
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, CANCEL_POLL_INTERVAL))
+
+
+def _read_body(resp, sink, written, stats, chunk_size, scope):
+    """Append (206 resume) or restart (fresh / Range ignored) the sink from resp; returns bytes written so far."""
+    resp.raise_for_status()
+    expected = None
+    start, total = _content_range(resp) if resp.status_code == 206 else (None, None)
+    if written and start == written:
+        stats["resumed_bytes"] += written
+        expected = total
+    else:
+        # Fresh download, or the server ignored Range: start the sink over
+        sink.seek(0)
+        sink.truncate()
+        written = 0
+        length = resp.headers.get("Content-Length")
+        expected = int(length) if length and length.isdigit() and resp.status_code == 200 else total
+    for chunk in resp.iter_content(chunk_size=chunk_size):
+        scope.check()
+        if chunk:
+            sink.write(chunk)
+            written += len(chunk)
+    if expected is not None and written < expected:
+        raise StreamCut(f"Body ended at {written} of {expected} bytes")
+    return written
+
+
+def fetch_resumable(url, sink, config=None, read_timeout=60, stats=None, chunk_size=DOWNLOAD_CHUNK_SIZE,
+                    cancellable=True, timer=None):
+    """
+    GET url into sink (a seekable binary file / BytesIO, empty at start). After a retryable failure the request is
+    re-sent with Range: bytes=<written>- and appended; a server that ignores Range (200) restarts the sink.
+    Returns (bytes_written, content_type). stats (dict) gets retries and resumed_bytes added.
+    Raises the last error once retries are exhausted or the error is fatal, and the interrupt exception when the
+    user cancels (cancellable=False for background fetches that outlive the prompt).
+    """
+    with cancel_scope("download", timer, enabled=cancellable) as scope:
+        return _fetch_resumable(url, sink, config, read_timeout, stats, chunk_size, scope)
+
+
+def _fetch_resumable(url, sink, config, read_timeout, stats, chunk_size, scope):
+    stats = stats if stats is not None else {}
+    stats.setdefault("retries", 0)
+    stats.setdefault("resumed_bytes", 0)
+    max_retries, backoff = retry_policy(config)
+    # This loop owns all retries (connect, read, 5xx); the session makes a single attempt
+    session = get_session(url, config, no_retry=True)
+    while True:
+        written = sink.tell()  # bytes kept from earlier attempts (the sink is only appended to or restarted)
+        headers = {"Range": f"bytes={written}-"} if written else None
+        try:
+            with session.get(url, headers=headers, timeout=request_timeout(config, read_timeout), stream=True) as resp:
+                unregister = scope.on_abort(lambda: _shutdown_response(resp))
+                try:
+                    written = _read_body(resp, sink, written, stats, chunk_size, scope)
+                finally:
+                    unregister()
+                content_type = resp.headers.get("Content-Type", "")
+            return (written, content_type)
+        except Exception as e:
+            scope.check()  # cancelled: the error is our own socket shutdown, never retry it
+            if not is_retryable_error(e) or stats["retries"] >= max_retries:
+                raise
+            stats["retries"] += 1
+            _sleep(backoff_delay(stats["retries"], backoff), scope)
@@ -0,0 +1,234 @@
+"""
+Generation scheduler: every API request (Submit, Batch Submit, Submit Job) is admitted here before it takes a key
+from the key pool. Admission respects per-model limits (AF_CONFIG model_limits) and the pool's capacity (sum of the
+per-endpoint caps), serves priority classes in order (interactive > normal > background) and, within a class,
+round-robins over flows (ComfyUI prompts) so one workflow's burst cannot starve another. Background requests may use
+at most BACKGROUND_SHARE of the capacity, so minutes-long video jobs always leave room for image previews.
+Queue depth, running count and wait times are tracked per model. Runs on the async engine loop.
+"""
+import asyncio
+import fnmatch
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+from .config import MODEL_REGISTRY, PRIORITY_CLASSES
+from .keypool import get_key_pool
+
+# Share of the pool capacity background requests may hold at once (at least one slot)
+BACKGROUND_SHARE = 0.75
+DEFAULT_FLOW = "default"
+
+
+def model_limit(limits, model):
+    """Max parallel requests for model from a parse_model_limits dict: exact name first, then glob patterns; None = no limit."""
+    if not limits:
+        return None
+    limit = limits.get(model)
+    if limit is None:
+        for pattern, value in limits.items():
+            if fnmatch.fnmatchcase(model, pattern):
+                limit = value
+                break
+    return limit
+
+
+_MODEL_PRIORITIES = {model: spec.get("priority", PRIORITY_CLASSES[0])
+                     for spec in MODEL_REGISTRY.values() for model in spec["models"]}
+
+
+def request_priority(config, params):
+    """Priority class: Config priority unless auto, then the Params series' class (registry "priority")."""
+    priority = config.get("priority", "auto")
+    if priority in PRIORITY_CLASSES:
+        return priority
+    priority = params.get("priority") or _MODEL_PRIORITIES.get(params["payload"].get("model", ""))
+    return priority if priority in PRIORITY_CLASSES else PRIORITY_CLASSES[0]
+
+
+def current_flow():
+    """Id of the ComfyUI prompt being executed (the fairness unit); DEFAULT_FLOW outside ComfyUI."""
+    try:
+        from server import PromptServer
+        return getattr(PromptServer.instance, "last_prompt_id", None) or DEFAULT_FLOW
+    except Exception:
+        return DEFAULT_FLOW
+
+
+class _Ticket:
+    __slots__ = ("model", "priority", "flow", "limit", "future", "enqueued", "admitted")
+
+    def __init__(self, model, priority, flow, limit, future):
+        self.model = model
+        self.priority = priority
+        self.flow = flow
+        self.limit = limit
+        self.future = future
+        self.enqueued = time.monotonic()
+        self.admitted = None
+
+
+class _ModelStats:
+    __slots__ = ("queued", "running", "limit", "admitted", "wait_sum", "wait_max", "last_wait")
+
+    def __init__(self):
+        self.queued = 0
+        self.running = 0
+        self.limit = None
+        self.admitted = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.last_wait = 0.0
+
+
+class Scheduler:
+    def __init__(self, pool):
+        self.pool = pool
+        self._lock = threading.Lock()  # guards stats reads from other threads
+        self._queues = {p: OrderedDict() for p in PRIORITY_CLASSES}  # priority -> flow -> deque of tickets
+        self._running = 0
+        self._running_by_class = {p: 0 for p in PRIORITY_CLASSES}
+        self._models = {}
+
+    def _model(self, model):
+        stats = self._models.get(model)
+        if stats is None:
+            stats = self._models[model] = _ModelStats()
+        return stats
+
+    def _class_cap(self, priority):
+        capacity = self.pool.capacity
+        if priority == "background":
+            return max(1, math.floor(capacity * BACKGROUND_SHARE))
+        return capacity
+
+    def _admissible(self, ticket):
+        running = self._model(ticket.model).running
+        return (ticket.limit is None or running < ticket.limit) and \
+            self._running_by_class[ticket.priority] < self._class_cap(ticket.priority)
+
+    def _admit(self, ticket):
+        now = time.monotonic()
+        ticket.admitted = now
+        wait = now - ticket.enqueued
+        stats = self._model(ticket.model)
+        stats.queued -= 1
+        stats.running += 1
+        stats.admitted += 1
+        stats.wait_sum += wait
+        stats.wait_max = max(stats.wait_max, wait)
+        stats.last_wait = wait
+        self._running += 1
+        self._running_by_class[ticket.priority] += 1
+        ticket.future.set_result(wait)
+
+    def _discard_cancelled(self):
+        """Drop tickets whose waiter was cancelled while queued (before its task could remove them itself)."""
+        for flows in self._queues.values():
+            for flow in list(flows):
+                queue = flows[flow]
+                for ticket in [t for t in queue if t.future.done()]:
+                    queue.remove(ticket)
+                    self._model(ticket.model).queued -= 1
+                if not queue:
+                    del flows[flow]
+
+    def _pump(self):
+        """Admit queued tickets: classes in priority order, flows round-robin within a class, FIFO within a flow."""
+        with self._lock:
+            self._discard_cancelled()
+            for priority in PRIORITY_CLASSES:
+                flows = self._queues[priority]
+                progress = True
+                while progress and flows and self._running < self.pool.capacity:
+                    progress = False
+                    for flow in list(flows):
+                        queue = flows[flow]
+                        ticket = next((t for t in queue if self._admissible(t)), None)
+                        if ticket is None:
+                            continue
+                        queue.remove(ticket)
+                        if queue:
+                            flows.move_to_end(flow)  # served: go to the back of the rotation
+                        else:
+                            del flows[flow]
+                        self._admit(ticket)
+                        progress = True
+                        if self._running >= self.pool.capacity:
+                            break
+
+    async def acquire(self, model, priority, flow=DEFAULT_FLOW, limit=None):
+        """Wait until the request may run; returns the ticket (pass it to release). Records the wait per model."""
+        ticket = _Ticket(model, priority, flow or DEFAULT_FLOW, limit, asyncio.get_running_loop().create_future())
+        with self._lock:
+            stats = self._model(model)
+            stats.queued += 1
+            stats.limit = limit
+            self._queues[priority].setdefault(ticket.flow, deque()).append(ticket)
+        self._pump()
+        try:
+            await ticket.future
+        except BaseException:
+            # Cancelled while queued (or just admitted): give the place / slot back
+            if ticket.admitted is not None:
+                self.release(ticket)
+            else:
+                with self._lock:
+                    queue = self._queues[priority].get(ticket.flow)
+                    if queue is not None and ticket in queue:
+                        queue.remove(ticket)
+                        if not queue:
+                            del self._queues[priority][ticket.flow]
+                        self._model(model).queued -= 1
+            raise
+        return ticket
+
+    def release(self, ticket):
+        with self._lock:
+            self._model(ticket.model).running -= 1
+            self._running -= 1
+            self._running_by_class[ticket.priority] -= 1
+        self._pump()
+
+    def stats(self):
+        """Per model: queued, running, limit, admitted, wait avg/max/last (seconds); plus class and capacity totals."""
+        with self._lock:
+            models = {
+                model: {
+                    "queued": s.queued,
+                    "running": s.running,
+                    "limit": s.limit,
+                    "admitted": s.admitted,
+                    "wait_avg_s": round(s.wait_sum / s.admitted, 3) if s.admitted else 0.0,
+                    "wait_max_s": round(s.wait_max, 3),
+                    "last_wait_s": round(s.last_wait, 3),
+                } for model, s in self._models.items()
+            }
+            return {
+                "capacity": self.pool.capacity,
+                "running": self._running,
+                "running_by_class": dict(self._running_by_class),
+                "queued_by_class": {p: sum(len(q) for q in flows.values()) for p, flows in self._queues.items()},
+                "models": models,
+            }
+
+    def stats_line(self):
+        s = self.stats()
+        parts = [f"{m} running={v['running']}{'/' + str(v['limit']) if v['limit'] else ''} queued={v['queued']} "
+                 f"wait_avg={v['wait_avg_s']}s" for m, v in s["models"].items()]
+        return f"Scheduler: {s['running']}/{s['capacity']} running; " + ("; ".join(parts) if parts else "idle")
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(config):
+    """Process-wide Scheduler for the config's key pool (one per pool)."""
+    pool = get_key_pool(config)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(id(pool))
+        if scheduler is None:
+            scheduler = _schedulers[id(pool)] = Scheduler(pool)
+    return scheduler
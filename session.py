@@ -0,0 +1,173 @@
+"""
+Shared HTTP sessions: one pooled keep-alive requests.Session per host, reused by Submit, Download and Upload.
+Pool size, connect timeout and retry/backoff come from AF_CONFIG (see AirforceConfig); defaults apply without a config.
+requests / urllib3 are imported when the first session is built, not when ComfyUI registers the nodes.
+"""
+import threading
+from urllib.parse import urlsplit
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_CONNECT_TIMEOUT = 10.0
+
+# Only retried for idempotent methods (GET/HEAD...); a POST is retried on connect errors only, so paid generations are never re-sent
+RETRY_STATUS_CODES = (502, 503, 504)
+
+_lock = threading.Lock()
+_sessions = {}  # (host_key, policy, no_retry) -> requests.Session
+_counters = {}  # host_key -> {"requests": n, "new_connections": n}
+_local = threading.local()  # .connection: urllib3 connection this thread last took from a pool
+
+
+def host_key(url):
+    """scheme://host[:port] of a URL, lowercased; sessions and counters are keyed on it."""
+    parts = urlsplit(str(url or "").strip())
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def http_policy(config=None):
+    """(pool_size, max_retries, backoff_factor, connect_timeout) from AF_CONFIG, falling back to defaults."""
+    config = config or {}
+    pool_size = int(config.get("pool_size") or DEFAULT_POOL_SIZE)
+    max_retries = config.get("max_retries")
+    max_retries = DEFAULT_MAX_RETRIES if max_retries is None else int(max_retries)
+    backoff = config.get("backoff_factor")
+    backoff = DEFAULT_BACKOFF_FACTOR if backoff is None else float(backoff)
+    connect_timeout = float(config.get("connect_timeout") or DEFAULT_CONNECT_TIMEOUT)
+    return (max(1, pool_size), max(0, max_retries), max(0.0, backoff), connect_timeout)
+
+
+def request_timeout(config, read_timeout):
+    """(connect, read) timeout tuple for requests: connect from config, read per call site."""
+    return (http_policy(config)[3], read_timeout)
+
+
+def _counting_pool(base, counters):
+    """urllib3 pool class that counts every freshly opened connection (DNS + TCP + TLS)."""
+
+    class _CountingPool(base):
+        def _new_conn(self):
+            with _lock:
+                counters["new_connections"] += 1
+            return super()._new_conn()
+
+        def _get_conn(self, timeout=None):
+            conn = super()._get_conn(timeout)
+            _local.connection = conn
+            return conn
+
+    return _CountingPool
+
+
+_adapter_class = None
+
+
+def _counting_adapter_class():
+    """HTTPAdapter subclass that counts requests sent and connections opened for one host (built on first use)."""
+    global _adapter_class
+    if _adapter_class is not None:
+        return _adapter_class
+    from requests.adapters import HTTPAdapter
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class _CountingAdapter(HTTPAdapter):
+        def __init__(self, counters, **kwargs):
+            self._counters = counters
+            super().__init__(**kwargs)
+
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": _counting_pool(HTTPConnectionPool, self._counters),
+                "https": _counting_pool(HTTPSConnectionPool, self._counters),
+            }
+
+        def send(self, request, **kwargs):
+            with _lock:
+                self._counters["requests"] += 1
+            return super().send(request, **kwargs)
+
+    _adapter_class = _CountingAdapter
+    return _adapter_class
+
+
+def _build_session(key, policy, no_retry=False):
+    import requests
+    from urllib3.util.retry import Retry
+
+    pool_size, max_retries, backoff, _ = policy
+    counters = _counters.setdefault(key, {"requests": 0, "new_connections": 0})
+    retry = Retry(
+        total=max_retries,
+        connect=0 if no_retry else max_retries,
+        read=0 if no_retry else max_retries,
+        status=0 if no_retry else max_retries,
+        other=0 if no_retry else None,
+        backoff_factor=backoff,
+        status_forcelist=() if no_retry else RETRY_STATUS_CODES,
+        raise_on_status=False,
+    )
+    adapter = _counting_adapter_class()(counters, pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def active_connection():
+    """urllib3 connection the calling thread most recently took from a pooled session (e.g. from inside a request
+    body's read(), to shut its socket down on cancel); None if it has not used one."""
+    return getattr(_local, "connection", None)
+
+
+def get_session(url, config=None, no_retry=False):
+    """
+    Process-wide pooled session for the host of url; created on first use and kept alive.
+    no_retry=True gives a session that makes a single attempt (redirects are still followed), for callers that run
+    their own retry loop over connect / read errors and 5xx (retry.fetch_resumable), so max_retries is not applied twice.
+    """
+    key = host_key(url)
+    policy = http_policy(config)
+    with _lock:
+        session = _sessions.get((key, policy, no_retry))
+        if session is None:
+            session = _build_session(key, policy, no_retry)
+            _sessions[(key, policy, no_retry)] = session
+    return session
+
+
+def api_session(config):
+    """Session for the generation API (config base_url)."""
+    return get_session(config["base_url"], config)
+
+
+def anondrop_session(config):
+    """Session for AnonDrop uploads (config anondrop_base_url)."""
+    return get_session(config.get("anondrop_base_url") or "https://anondrop.net", config)
+
+
+def count_event(key, requests=0, new_connections=0):
+    """Add to a host's counters; used by the async engine, whose connections are pooled by aiohttp."""
+    with _lock:
+        c = _counters.setdefault(key, {"requests": 0, "new_connections": 0})
+        c["requests"] += requests
+        c["new_connections"] += new_connections
+
+
+def session_stats():
+    """Per-host counters: requests sent, new connections opened, and requests that reused a pooled connection."""
+    with _lock:
+        stats = {}
+        for key, c in _counters.items():
+            reused = max(0, c["requests"] - c["new_connections"])
+            stats[key] = {"requests": c["requests"], "new_connections": c["new_connections"], "reused": reused}
+        return stats
+
+
+def stats_line():
+    """One-line summary of session_stats() for debug outputs."""
+    parts = []
+    for key, s in session_stats().items():
+        parts.append(f"{key} requests={s['requests']} new={s['new_connections']} reused={s['reused']}")
+    return "HTTP pool: " + ("; ".join(parts) if parts else "no requests yet")
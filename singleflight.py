@@ -0,0 +1,102 @@
+"""
+Single-flight: concurrent calls with the same key share one execution. The first caller (leader) runs the work;
+callers arriving while it is in flight wait and receive the leader's result (or its exception). Nothing is kept
+after the call finishes, so later identical calls run again (the result cache / blob store / upload cache cover those).
+Groups: "submit" (fixed-seed Submit result incl. decoded tensor), "generate" (its API call, keyed on request_key),
+"download" (CDN fetches by url), "upload" (image digest).
+"""
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.value = None
+        self.shared = []  # per-waiter values from fork()
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, fork=None):
+        """
+        Run fn() once per in-flight key. Returns (value, shared): shared is False for the leader, True for callers
+        that attached to it. fork(value), if given, is called by the leader once per waiter before the waiters wake,
+        to hand each waiter its own copy of a resource the leader owns (e.g. a temp file); otherwise all get `value`.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return (call.shared.pop() if fork is not None else call.value, True)
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                # Late arrivals after this point start a new call
+                del self._calls[key]
+                waiters = call.waiters
+            try:
+                if call.error is None and fork is not None:
+                    call.shared = [fork(call.value) for _ in range(waiters)]
+            except Exception as e:
+                call.error = e
+            call.done.set()
+        return (call.value, False)
+
+    def waiters(self):
+        """{key: callers waiting on the in-flight call} for keys currently in flight."""
+        with self._lock:
+            return {key: call.waiters for key, call in self._calls.items()}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "waiting": sum(call.waiters for call in self._calls.values()),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+            }
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def get_flight(name):
+    """Process-wide SingleFlight group by name (created on first use)."""
+    with _flights_lock:
+        flight = _flights.get(name)
+        if flight is None:
+            flight = _flights[name] = SingleFlight(name)
+        return flight
+
+
+def stats_line():
+    """One line summarising every group, e.g. for Submit's debug output."""
+    with _flights_lock:
+        flights = list(_flights.values())
+    parts = []
+    for flight in flights:
+        s = flight.stats()
+        parts.append(f"{flight.name} in_flight={s['in_flight']} waiting={s['waiting']} coalesced={s['coalesced']}/{s['leaders'] + s['coalesced']}")
+    return "Single-flight: " + ("; ".join(parts) if parts else "idle")
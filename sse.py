@@ -0,0 +1,157 @@
+"""
+Incremental parser for the /images/generations SSE stream.
+Lines are classified on raw bytes so keepalive and [DONE] frames are never decoded or json-parsed.
+Intermediate data frames (status, progress, queue position) are read by frame_progress; StreamWatch times the frames
+(time to first frame, time since the last keepalive) and fails a stream that goes silent.
+"""
+import json
+import time
+
+from .retry import StreamStalled
+
+# Frame kinds yielded by SSEParser.feed
+DATA = "data"
+KEEPALIVE = "keepalive"
+DONE = "done"
+
+# Seconds until the first frame / between frames (keepalives count) before a stream is failed as stalled; 0 = off.
+# The first-frame default matches the SSE read timeout (generator.SSE_READ_TIMEOUT), the limit before the watch existed
+DEFAULT_FIRST_FRAME_TIMEOUT = 180.0
+DEFAULT_STALL_TIMEOUT = 60.0
+
+
+def classify_line(line):
+    """Classify one SSE line (bytes, no newline). Returns (kind, payload_bytes) or None for non-data lines."""
+    if not line.startswith(b"data:"):
+        return None
+    payload = line[5:]
+    if payload.startswith(b" "):
+        payload = payload[1:]
+    if payload == b"[DONE]":
+        return (DONE, None)
+    # The API sends "data: : keepalive"; any comment-style payload is a keepalive
+    if payload.startswith(b":") or not payload.strip():
+        return (KEEPALIVE, None)
+    return (DATA, payload)
+
+
+class SSEParser:
+    """Feed raw chunks as they arrive; yields (kind, payload_bytes) per complete data line.
+    The API puts one JSON object per data line, so each line is handled on its own (as the blocking client did)."""
+
+    def __init__(self):
+        self._buf = bytearray()
+
+    def feed(self, chunk):
+        self._buf.extend(chunk)
+        while True:
+            nl = self._buf.find(b"\n")
+            if nl < 0:
+                return
+            line = bytes(self._buf[:nl]).rstrip(b"\r")
+            del self._buf[:nl + 1]
+            frame = classify_line(line)
+            if frame is not None:
+                yield frame
+
+    def flush(self):
+        """Yield a trailing line left without a newline at end of stream."""
+        if self._buf:
+            line = bytes(self._buf).rstrip(b"\r")
+            self._buf.clear()
+            frame = classify_line(line)
+            if frame is not None:
+                yield frame
+
+
+def frame_json(payload):
+    """json.loads a data payload; None if it is not valid JSON."""
+    try:
+        return json.loads(payload)
+    except Exception:
+        return None
+
+
+def frame_content_url(data):
+    """data[0].url of a parsed frame, or None."""
+    if isinstance(data, dict):
+        items = data.get("data")
+        if isinstance(items, list) and items and isinstance(items[0], dict):
+            return items[0].get("url")
+    return None
+
+
+def frame_progress(data):
+    """
+    Status fields of an intermediate frame as {"status", "progress", "queue_position"} (only the keys it carries),
+    or None. progress is a 0..1 fraction; values above 1 are taken as percentages.
+    """
+    if not isinstance(data, dict):
+        return None
+    event = {}
+    status = data.get("status") or data.get("state")
+    if isinstance(status, str) and status:
+        event["status"] = status
+    progress = data.get("progress", data.get("percent"))
+    if isinstance(progress, (int, float)) and not isinstance(progress, bool):
+        event["progress"] = min(1.0, max(0.0, progress / 100.0 if progress > 1 else float(progress)))
+    position = data.get("queue_position", data.get("position"))
+    if isinstance(position, int) and not isinstance(position, bool):
+        event["queue_position"] = position
+    return event or None
+
+
+def stream_timeouts(config):
+    """(first_frame_timeout, stall_timeout) in seconds from AF_CONFIG; 0 disables a check."""
+    config = config or {}
+    first = config.get("first_frame_timeout")
+    stall = config.get("stall_timeout")
+    return (DEFAULT_FIRST_FRAME_TIMEOUT if first is None else max(0.0, float(first)),
+            DEFAULT_STALL_TIMEOUT if stall is None else max(0.0, float(stall)))
+
+
+class StreamWatch:
+    """Frame timing for one SSE request, from when it is sent: time to first frame, time since the last frame
+    (a keepalive or data frame, i.e. the last sign of life), the longest gap, and the stall check."""
+
+    def __init__(self, first_frame_timeout=DEFAULT_FIRST_FRAME_TIMEOUT, stall_timeout=DEFAULT_STALL_TIMEOUT):
+        self.first_frame_timeout = first_frame_timeout
+        self.stall_timeout = stall_timeout
+        self.started = time.monotonic()
+        self.first_frame = None
+        self.last_frame = None
+        self.max_gap = 0.0
+        self.keepalives = 0
+
+    def frame(self, kind):
+        now = time.monotonic()
+        if self.first_frame is None:
+            self.first_frame = now
+        else:
+            self.max_gap = max(self.max_gap, now - self.last_frame)
+        self.last_frame = now
+        if kind == KEEPALIVE:
+            self.keepalives += 1
+
+    def time_to_first_frame(self):
+        return None if self.first_frame is None else self.first_frame - self.started
+
+    def since_last_frame(self):
+        return time.monotonic() - (self.last_frame or self.started)
+
+    def check(self):
+        """Raise StreamStalled if the first frame or the next frame is overdue."""
+        if self.first_frame is None:
+            if self.first_frame_timeout and self.since_last_frame() > self.first_frame_timeout:
+                raise StreamStalled(f"No SSE frame within {self.first_frame_timeout:g}s")
+        elif self.stall_timeout and self.since_last_frame() > self.stall_timeout:
+            raise StreamStalled(f"SSE stream stalled: no frame or keepalive for {self.stall_timeout:g}s "
+                                f"(last after {self.last_frame - self.started:.1f}s)")
+
+    def snapshot(self):
+        """{"first_frame_s", "since_keepalive_s"} for progress reports."""
+        ttff = self.time_to_first_frame()
+        return {
+            "first_frame_s": None if ttff is None else round(ttff, 2),
+            "since_keepalive_s": round(self.since_last_frame(), 1),
+        }
@@ -0,0 +1,19 @@
+"""
+Shared setup for the offline tests: the node pack is imported once from its folder (as benchmarks/bench_load.py does)
+and its submodules are looked up by name. Nothing talks to api.airforce; HTTP tests use local servers.
+"""
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "benchmarks"))
+
+from bench_load import load_package  # noqa: E402
+
+if "airforce_nodes" not in sys.modules:
+    load_package()
+
+
+def pack_module(name):
+    """airforce_nodes.<name> (e.g. "scheduler")."""
+    return sys.modules["airforce_nodes." + name]
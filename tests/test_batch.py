@@ -0,0 +1,21 @@
+"""Batch Submit stacking: items of another size are resized to the reference (first successful) image."""
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from conftest import pack_module  # noqa: E402
+
+generator = pack_module("generator")
+
+
+def test_stack_resizes_to_reference():
+    placeholder = generator.placeholder_img_batch(512, 512)
+    image = torch.rand((1, 48, 64, 3))
+    batch = generator.stack_image_batch([placeholder, image, torch.rand((1, 96, 128, 3))], reference=1)
+    assert tuple(batch.shape) == (3, 48, 64, 3)
+    assert torch.equal(batch[1], image[0])
+
+
+def test_stack_defaults_to_first():
+    batch = generator.stack_image_batch([torch.rand((1, 32, 32, 3)), torch.rand((1, 64, 64, 3))])
+    assert tuple(batch.shape) == (2, 32, 32, 3)
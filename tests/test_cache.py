@@ -0,0 +1,68 @@
+"""Result cache: LRU eviction by size, TTL expiry, lazily flushed access times, file-backed puts."""
+import json
+import time
+
+from conftest import pack_module
+
+cache_module = pack_module("cache")
+
+
+def _index_on_disk(cache):
+    with open(cache._index_path(), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_lru_evicts_least_recently_used(tmp_path):
+    cache = cache_module.ResultCache(str(tmp_path), max_bytes=250, ttl_seconds=3600)
+    cache.put("a", "https://cdn.test/a.png", b"a" * 100)
+    time.sleep(0.01)
+    cache.put("b", "https://cdn.test/b.png", b"b" * 100)
+    time.sleep(0.01)
+    assert cache.get("a")[1] == b"a" * 100  # a is now more recent than b
+    time.sleep(0.01)
+    cache.put("c", "https://cdn.test/c.png", b"c" * 100)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1 and not (tmp_path / "b.bin").exists()
+
+
+def test_oversized_entry_is_not_stored(tmp_path):
+    cache = cache_module.ResultCache(str(tmp_path), max_bytes=10, ttl_seconds=3600)
+    cache.put("big", "https://cdn.test/big.png", b"x" * 11)
+    assert cache.get("big") is None
+
+
+def test_ttl_expires_entries(tmp_path):
+    cache = cache_module.ResultCache(str(tmp_path), max_bytes=1000, ttl_seconds=60)
+    cache.put("k", "https://cdn.test/k.png", b"data", {"kind": "image"})
+    assert cache.get("k") == ("https://cdn.test/k.png", b"data", {"kind": "image"})
+    cache._index["k"]["created"] -= 61
+    assert cache.get("k") is None
+    assert "k" not in _index_on_disk(cache) and not (tmp_path / "k.bin").exists()
+
+
+def test_hits_flush_access_times_lazily(tmp_path):
+    cache = cache_module.ResultCache(str(tmp_path), max_bytes=1000, ttl_seconds=3600)
+    cache.put("k", "https://cdn.test/k.png", b"data")
+    accessed = _index_on_disk(cache)["k"]["accessed"]
+    time.sleep(0.01)
+    cache.get("k")
+    assert _index_on_disk(cache)["k"]["accessed"] == accessed  # saved at most every INDEX_FLUSH_SECONDS
+    cache.flush()
+    assert _index_on_disk(cache)["k"]["accessed"] > accessed
+
+
+def test_put_file_copies_from_disk(tmp_path):
+    source = tmp_path / "clip.mp4"
+    source.write_bytes(b"\x00" * 64)
+    cache = cache_module.ResultCache(str(tmp_path / "cache"), max_bytes=1000, ttl_seconds=3600)
+    cache.put_file("v", "https://cdn.test/v.mp4", str(source), {"kind": "video"})
+    assert cache.get("v") == ("https://cdn.test/v.mp4", b"\x00" * 64, {"kind": "video"})
+    assert source.exists()
+
+
+def test_request_key_ignores_key_order():
+    config = {"base_url": "https://api.test/v1"}
+    assert cache_module.request_key(config, {"model": "m", "size": "1x1"}, "p") == \
+        cache_module.request_key(config, {"size": "1x1", "model": "m"}, "p")
+    assert cache_module.request_key(config, {"model": "m"}, "p") != cache_module.request_key(config, {"model": "m"}, "q")
@@ -0,0 +1,51 @@
+"""Download: extension sniffing, url lists, and Bulk Download against benchmarks/mock_server.py."""
+import os
+
+import pytest
+
+from conftest import pack_module
+from mock_server import build_parser, make_fake_mp4, make_png, start_server
+
+download = pack_module("download")
+
+
+@pytest.mark.parametrize("head, content_type, ext", [
+    (make_png(2, 2)[:16], "", "png"),
+    (b"\xff\xd8\xff\xe0" + bytes(12), "", "jpg"),
+    (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "", "webp"),
+    (b"GIF89a" + bytes(10), "", "gif"),
+    (make_fake_mp4(64)[:16], "", "mp4"),
+    (b"\x1a\x45\xdf\xa3" + bytes(12), "", "webm"),
+    (b"ID3\x04" + bytes(12), "", "mp3"),
+    (bytes(16), "image/png; charset=binary", "png"),  # unknown magic: Content-Type decides
+    (bytes(16), "application/octet-stream", None),
+])
+def test_sniff_extension(head, content_type, ext):
+    assert download.sniff_extension(head, content_type) == ext
+
+
+def test_parse_url_list_drops_blanks_comments_and_repeats():
+    text = "https://a.test/1.png\n\n  # note\nhttps://b.test/2.mp4\nhttps://a.test/1.png\n"
+    assert download.parse_url_list(text) == ["https://a.test/1.png", "https://b.test/2.mp4"]
+
+
+@pytest.fixture
+def mock_cdn():
+    pytest.importorskip("requests")
+    server, state = start_server(build_parser().parse_args(["--port", "0", "--cdn-latency-ms", "0", "--image-size", "16",
+                                                            "--video-mb", "0.01"]))
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port}", state
+    server.shutdown()
+
+
+def test_bulk_download_paths_line_up_with_urls(mock_cdn, tmp_path):
+    base, state = mock_cdn
+    urls = [f"{base}/cdn/one.png", f"{base}/missing/two.png", f"{base}/cdn/three.mp4"]
+    out = download.AirforceBulkDownload().download("\n".join(urls), directory=str(tmp_path), skip_existing=False,
+                                                   config={"ledger": False})
+    paths = out["result"][0].split("\n")
+    assert len(paths) == 3 and paths[1] == ""
+    assert paths[0].endswith(".png") and paths[2].endswith(".mp4")
+    assert all(os.path.exists(p) for p in (paths[0], paths[2]))
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
@@ -0,0 +1,12 @@
+"""Collect Job cache key: ComfyUI calls IS_CHANGED with widget values only (the linked job is not passed)."""
+import math
+
+from conftest import pack_module
+
+jobs = pack_module("jobs")
+
+
+def test_collect_always_reruns():
+    for mode in ("wait", "poll"):
+        changed = jobs.AirforceCollectJob.IS_CHANGED(mode=mode, timeout=600)
+        assert math.isnan(changed)  # NaN != NaN: ComfyUI never reuses the cached output
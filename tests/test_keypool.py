@@ -0,0 +1,62 @@
+"""Key pool: per-endpoint caps, 429 cooldown with failover to the other keys, Retry-After parsing."""
+import asyncio
+
+from conftest import pack_module
+
+keypool = pack_module("keypool")
+
+
+def _pool(keys=2, limit=1):
+    return keypool.KeyPool([("https://api.test/v1", f"sk-{i:04d}", None) for i in range(keys)], limit)
+
+
+def test_round_robin_respects_caps():
+    pool = _pool(keys=2, limit=1)
+
+    async def main():
+        first = await pool.acquire()
+        second = await pool.acquire()
+        assert first is not second
+        blocked = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0.05)
+        assert not blocked.done()  # both keys at their cap
+        pool.release(first, 200)
+        assert await asyncio.wait_for(blocked, 1) is first
+
+    asyncio.run(main())
+    assert pool.capacity == 2
+
+
+def test_429_cools_key_down_and_fails_over():
+    pool = _pool(keys=2, limit=4)
+
+    async def main():
+        throttled = await pool.acquire()
+        pool.release(throttled, 429, retry_after=30)
+        for _ in range(3):
+            ep = await pool.acquire()
+            assert ep is not throttled
+            pool.release(ep, 200)
+        # The generator excludes keys already tried for a request
+        assert await pool.acquire(exclude=[throttled]) is not throttled
+        return throttled
+
+    throttled = asyncio.run(main())
+    stats = {s["endpoint"]: s for s in pool.stats()}
+    assert stats[throttled.label]["throttled"] == 1 and stats[throttled.label]["cooldown_s"] > 25
+    assert throttled.rate is None  # one 429 only cools down; repeated ones learn a rate
+
+
+def test_repeated_429s_learn_a_rate():
+    pool = _pool(keys=1, limit=4)
+    ep = pool.endpoints[0]
+    for _ in range(keypool.RATE_LEARN_AFTER):
+        pool.release(ep, 429, retry_after=0)
+    assert ep.rate is not None and ep.rate >= keypool.MIN_RATE
+
+
+def test_parse_retry_after():
+    assert keypool.parse_retry_after("7") == 7.0
+    assert keypool.parse_retry_after("") is None
+    assert keypool.parse_retry_after("soon") is None
+    assert keypool.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0  # in the past
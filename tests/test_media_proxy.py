@@ -0,0 +1,60 @@
+"""Previewer media cache: LRU eviction drops keys from the index; registrations and hits are flushed lazily."""
+import json
+import time
+
+from conftest import pack_module
+
+media_proxy = pack_module("media_proxy")
+blobstore = pack_module("blobstore")
+
+
+def _index_on_disk(cache):
+    with open(cache._index_path(), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _stored_url(name, size):
+    # Fetches come from the blob store (as after a Submit), so no network is needed
+    url = f"https://cdn.test/{name}.mp4"
+    blobstore.get_blob_store().put(url, b"\x00\x00\x00\x18ftypisom" + bytes(size - 12))
+    return url
+
+
+def test_eviction_removes_entries(tmp_path):
+    cache = media_proxy.MediaCache(str(tmp_path), max_bytes=2500)
+    keys = [cache.register(_stored_url(f"clip{i}", 1000), prefetch=False) for i in range(4)]
+    for key in keys:
+        cache.fetch(key)
+        time.sleep(0.01)  # distinct access times
+    index = _index_on_disk(cache)
+    assert sorted(index) == sorted(keys[2:])
+    assert all(e["size"] == 1000 for e in index.values())
+    assert cache.stats()["evictions"] == 2
+    assert not (tmp_path / f"{keys[0]}.mp4").exists()
+
+
+def test_unfetched_registrations_expire(tmp_path):
+    cache = media_proxy.MediaCache(str(tmp_path), max_bytes=10000)
+    stale = cache.register("https://cdn.test/never-fetched.mp4", prefetch=False)
+    cache._index[stale]["accessed"] -= media_proxy.UNFETCHED_TTL_SECONDS + 1
+    fresh = cache.register("https://cdn.test/pending.mp4", prefetch=False)
+    cache.fetch(cache.register(_stored_url("fetched", 100), prefetch=False))
+    index = _index_on_disk(cache)
+    assert stale not in index and fresh in index
+
+
+def test_registrations_and_hits_are_flushed_lazily(tmp_path):
+    cache = media_proxy.MediaCache(str(tmp_path), max_bytes=10000)
+    key = cache.register(_stored_url("lazy", 100), prefetch=False)  # first change: written at once
+    cache.fetch(key)
+    accessed = _index_on_disk(cache)[key]["accessed"]
+
+    other = cache.register("https://cdn.test/other.mp4", prefetch=False)
+    time.sleep(0.01)
+    cache.fetch(key)  # hit
+    on_disk = _index_on_disk(cache)
+    assert other not in on_disk and on_disk[key]["accessed"] == accessed
+
+    cache.flush()
+    on_disk = _index_on_disk(cache)
+    assert other in on_disk and on_disk[key]["accessed"] > accessed
@@ -0,0 +1,127 @@
+"""Scheduler admission: capacity, cancellation while queued."""
+import asyncio
+
+from conftest import pack_module
+
+scheduler = pack_module("scheduler")
+
+
+class _Pool:
+    def __init__(self, capacity):
+        self.capacity = capacity
+
+
+async def _job(sched, model, hold=0.05, flow="default", priority="interactive", order=None):
+    ticket = await sched.acquire(model, priority, flow)
+    try:
+        if order is not None:
+            order.append(flow)
+        await asyncio.sleep(hold)
+    finally:
+        sched.release(ticket)
+
+
+def test_cancelling_a_full_batch_admits_nothing_more():
+    sched = scheduler.Scheduler(_Pool(2))
+
+    async def main():
+        batch = asyncio.gather(*(_job(sched, "m", hold=10) for _ in range(6)))
+        await asyncio.sleep(0.05)
+        assert sched.stats()["models"]["m"]["queued"] == 4
+        batch.cancel()
+        try:
+            await batch
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(0)
+
+    loop = asyncio.new_event_loop()
+    errors = []
+    loop.set_exception_handler(lambda _loop, context: errors.append(context))
+    try:
+        loop.run_until_complete(main())
+    finally:
+        loop.close()
+    assert errors == []
+    stats = sched.stats()
+    assert stats["running"] == 0
+    assert stats["models"]["m"] == {**stats["models"]["m"], "queued": 0, "running": 0, "admitted": 2}
+    assert stats["queued_by_class"]["interactive"] == 0
+
+
+def test_capacity_is_never_exceeded():
+    sched = scheduler.Scheduler(_Pool(3))
+    peak = []
+
+    async def job():
+        ticket = await sched.acquire("m", "interactive")
+        peak.append(sched.stats()["running"])
+        await asyncio.sleep(0.01)
+        sched.release(ticket)
+
+    async def main():
+        await asyncio.gather(*(job() for _ in range(12)))
+
+    asyncio.run(main())
+    assert max(peak) == 3
+    assert sched.stats()["models"]["m"]["admitted"] == 12
+
+
+def test_flows_share_slots_round_robin():
+    sched = scheduler.Scheduler(_Pool(1))
+    order = []
+
+    async def main():
+        blocker = await sched.acquire("m", "interactive", "warmup")
+        jobs = [asyncio.ensure_future(_job(sched, "m", 0.01, flow, order=order)) for flow in "AAAABB"]
+        await asyncio.sleep(0.01)  # all queued behind the blocker, A's burst first
+        sched.release(blocker)
+        await asyncio.gather(*jobs)
+
+    asyncio.run(main())
+    assert order == ["A", "B", "A", "B", "A", "A"]
+
+
+def test_priority_classes_in_order():
+    sched = scheduler.Scheduler(_Pool(1))
+    order = []
+
+    async def main():
+        blocker = await sched.acquire("m", "interactive")
+        jobs = [asyncio.ensure_future(_job(sched, "m", 0.01, priority, priority, order))
+                for priority in ("background", "normal", "interactive")]
+        await asyncio.sleep(0.01)
+        sched.release(blocker)
+        await asyncio.gather(*jobs)
+
+    asyncio.run(main())
+    assert order == ["interactive", "normal", "background"]
+
+
+def test_background_leaves_room_and_model_limits_apply():
+    sched = scheduler.Scheduler(_Pool(4))
+    peaks = {"background": 0, "limited": 0}
+
+    async def job(model, priority, limit=None):
+        ticket = await sched.acquire(model, priority, limit=limit)
+        stats = sched.stats()
+        peaks["background"] = max(peaks["background"], stats["running_by_class"]["background"])
+        peaks["limited"] = max(peaks["limited"], stats["models"].get("v", {}).get("running", 0))
+        await asyncio.sleep(0.02)
+        sched.release(ticket)
+
+    async def main():
+        background = [job("bg", "background") for _ in range(6)]
+        await asyncio.gather(*background, *(job("v", "interactive", limit=1) for _ in range(3)))
+
+    asyncio.run(main())
+    assert peaks["background"] == 3  # floor(4 * BACKGROUND_SHARE)
+    assert peaks["limited"] == 1
+
+
+def test_model_limit_patterns():
+    limits = {"wan-2.6": 2, "veo-*": 1}
+    assert scheduler.model_limit(limits, "wan-2.6") == 2
+    assert scheduler.model_limit(limits, "veo-3.1-fast") == 1
+    assert scheduler.model_limit(limits, "flux-2-pro") is None
+    assert scheduler.model_limit(None, "wan-2.6") is None
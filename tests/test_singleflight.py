@@ -0,0 +1,84 @@
+"""Single-flight: concurrent identical calls share one execution and its result or error."""
+import itertools
+import threading
+import time
+
+import pytest
+
+from conftest import pack_module
+
+singleflight = pack_module("singleflight")
+
+
+def _concurrently(n, fn):
+    results, errors = [], []
+    start = threading.Barrier(n)
+
+    def run():
+        start.wait()
+        try:
+            results.append(fn())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = singleflight.SingleFlight("test")
+    calls = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.1)
+        return "value"
+
+    results, errors = _concurrently(5, lambda: flight.do("k", work))
+    assert errors == [] and len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert {value for value, _ in results} == {"value"}
+    assert flight.stats() == {"in_flight": 0, "waiting": 0, "leaders": 1, "coalesced": 4}
+
+
+def test_errors_reach_every_waiter_and_the_next_call_runs_again():
+    flight = singleflight.SingleFlight("test")
+
+    def fail():
+        time.sleep(0.1)
+        raise ValueError("boom")
+
+    results, errors = _concurrently(3, lambda: flight.do("k", fail))
+    assert results == [] and len(errors) == 3 and all(str(e) == "boom" for e in errors)
+    assert flight.do("k", lambda: "again") == ("again", False)
+
+
+def test_fork_gives_each_waiter_its_own_value():
+    flight = singleflight.SingleFlight("test")
+    forks = itertools.count()
+
+    def work():
+        time.sleep(0.1)
+        return "leader"
+
+    results, _ = _concurrently(3, lambda: flight.do("k", work, fork=lambda value: f"copy{next(forks)}"))
+    values = sorted(value for value, _ in results)
+    assert values == ["copy0", "copy1", "leader"]
+
+
+def test_distinct_keys_do_not_wait():
+    flight = singleflight.SingleFlight("test")
+    keys = itertools.count()
+    results, _ = _concurrently(3, lambda: flight.do(next(keys), lambda: "v"))
+    assert all(shared is False for _, shared in results)
+
+
+def test_get_flight_is_per_name():
+    assert singleflight.get_flight("a-test") is singleflight.get_flight("a-test")
+    assert singleflight.get_flight("a-test") is not singleflight.get_flight("b-test")
+    with pytest.raises(KeyError):
+        singleflight.SingleFlight("test").do("k", lambda: {}["missing"])
@@ -0,0 +1,68 @@
+"""SSE parsing and stall detection (sse.py)."""
+import time
+
+import pytest
+
+from conftest import pack_module
+
+sse = pack_module("sse")
+retry = pack_module("retry")
+
+
+def _frames(chunks):
+    parser = sse.SSEParser()
+    frames = [f for chunk in chunks for f in parser.feed(chunk)]
+    return frames + list(parser.flush())
+
+
+def test_frames_split_across_chunks():
+    stream = b'data: : keepalive\n\ndata: {"status": "queued"}\r\n\ndata: {"data": [{"url": "https://cdn.test/a.png"}]}\n\ndata: [DONE]\n\n'
+    for size in (1, 7, len(stream)):
+        frames = _frames([stream[i:i + size] for i in range(0, len(stream), size)])
+        assert [kind for kind, _ in frames] == [sse.KEEPALIVE, sse.DATA, sse.DATA, sse.DONE]
+        assert sse.frame_content_url(sse.frame_json(frames[2][1])) == "https://cdn.test/a.png"
+
+
+def test_non_data_lines_and_trailing_line():
+    frames = _frames([b"event: ping\nid: 3\n: comment\n", b'data:{"a": 1}'])
+    assert frames == [(sse.DATA, b'{"a": 1}')]
+
+
+def test_frame_helpers():
+    assert sse.frame_json(b"not json") is None
+    assert sse.frame_content_url({"data": []}) is None
+    assert sse.frame_progress({"status": "running", "progress": 40, "queue_position": 2}) == \
+        {"status": "running", "progress": 0.4, "queue_position": 2}
+    assert sse.frame_progress({"progress": 0.25}) == {"progress": 0.25}
+    assert sse.frame_progress({"data": [{"url": "x"}]}) is None
+
+
+def test_stream_timeouts_defaults_and_off():
+    assert sse.stream_timeouts({}) == (sse.DEFAULT_FIRST_FRAME_TIMEOUT, sse.DEFAULT_STALL_TIMEOUT)
+    assert sse.stream_timeouts({"first_frame_timeout": 0, "stall_timeout": -1}) == (0.0, 0.0)
+
+
+def test_watch_fails_a_missing_first_frame():
+    watch = sse.StreamWatch(first_frame_timeout=0.05, stall_timeout=10)
+    watch.check()
+    time.sleep(0.06)
+    with pytest.raises(retry.StreamStalled):
+        watch.check()
+
+
+def test_watch_keepalives_keep_the_stream_alive():
+    watch = sse.StreamWatch(first_frame_timeout=10, stall_timeout=0.05)
+    for _ in range(3):
+        time.sleep(0.03)
+        watch.frame(sse.KEEPALIVE)
+        watch.check()
+    assert watch.keepalives == 3 and watch.time_to_first_frame() is not None
+    time.sleep(0.06)
+    with pytest.raises(retry.StreamStalled):
+        watch.check()
+
+
+def test_watch_disabled():
+    watch = sse.StreamWatch(first_frame_timeout=0, stall_timeout=0)
+    time.sleep(0.01)
+    watch.check()
@@ -0,0 +1,51 @@
+"""Submit retries against benchmarks/mock_server.py: only attempts the API cannot have accepted are re-sent."""
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("requests")
+
+from conftest import pack_module  # noqa: E402
+from mock_server import build_parser, start_server  # noqa: E402
+
+config = pack_module("config")
+generator = pack_module("generator")
+
+PARAMS = {"payload": {"model": "test-image", "size": "64x64"}}
+
+
+def _run(*flags, max_retries=2):
+    server, state = start_server(build_parser().parse_args(["--port", "0", "--latency-ms", "20", "--keepalives", "1", *flags]))
+    try:
+        host, port = server.server_address[:2]
+        cfg = config.AirforceConfig().setup(f"http://{host}:{port}/v1", "sk-test", max_retries=max_retries,
+                                            backoff_factor=0.0, ledger=False)[0]
+        result = generator.run_one_request(cfg, PARAMS, "a prompt")
+    finally:
+        server.shutdown()
+    return result, state.counters
+
+
+def test_success_first_try():
+    (content_url, _, _, error), counters = _run()
+    assert error is None and content_url.endswith(".png")
+    assert counters["generations"] == 1
+
+
+def test_5xx_is_retried():
+    (content_url, _, debug, _), counters = _run("--error-rate", "1")
+    assert content_url is None and debug.startswith("Error 500") and "Retried 2x" in debug
+    assert counters["generations"] == 3  # first attempt + max_retries
+
+
+def test_cut_stream_is_not_reposted():
+    # The 200 stream started, so the request may be running (and billed): fail instead of POSTing again
+    (content_url, _, _, error), counters = _run("--cut-rate", "1")
+    assert content_url is None and "URL frame" in error
+    assert counters["generations"] == 1
+
+
+def test_failed_connect_is_retried():
+    cfg = config.AirforceConfig().setup("http://127.0.0.1:9/v1", "sk-test", max_retries=1, backoff_factor=0.0,
+                                        connect_timeout=2, ledger=False)[0]
+    content_url, _, _, error = generator.run_one_request(cfg, PARAMS, "a prompt")
+    assert content_url is None and "after 1 retries" in error
@@ -0,0 +1,160 @@
+"""
+Offline video decode tests: clips are generated locally with PyAV (benchmarks/mock_server.make_test_mp4).
+Needs the ComfyUI Python environment (av, numpy, torch); skipped otherwise. Run: python -m pytest tests
+"""
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import pytest
+
+pytest.importorskip("av")
+pytest.importorskip("numpy")
+pytest.importorskip("torch")
+
+from conftest import pack_module  # noqa: E402
+from mock_server import make_fake_mp4, make_test_mp4  # noqa: E402
+
+video = pack_module("video")
+generator = pack_module("generator")
+
+FRAMES, FPS, WIDTH, HEIGHT = 24, 12, 64, 48
+
+
+@pytest.fixture(scope="module")
+def clip():
+    return make_test_mp4(FRAMES, FPS, WIDTH, HEIGHT)
+
+
+def _grey(frames):
+    """Mean 0-255 value per decoded frame (the fixture encodes frame i as grey (i * 10) % 256)."""
+    return [round(float(f.mean()) * 255) for f in frames]
+
+
+def test_decodes_all_frames(clip):
+    frames, info = video.decode_video_frames(BytesIO(clip))
+    assert tuple(frames.shape) == (FRAMES, HEIGHT, WIDTH, 3)
+    assert 0.0 <= float(frames.min()) and float(frames.max()) <= 1.0
+    assert info["frames"] == FRAMES and info["fps"] == FPS and info["source_fps"] == FPS
+    assert info["audio"] == []
+
+
+def test_stride_keeps_every_nth_frame(clip):
+    frames, info = video.decode_video_frames(BytesIO(clip), stride=3)
+    assert info["frames"] == FRAMES // 3
+    assert info["fps"] == FPS / 3
+    for got, index in zip(_grey(frames), range(0, FRAMES, 3)):
+        assert abs(got - index * 10) <= 4
+
+
+def test_max_frames_stops_early(clip):
+    frames, info = video.decode_video_frames(BytesIO(clip), stride=2, max_frames=5)
+    assert info["frames"] == 5
+    for got, index in zip(_grey(frames), range(0, 10, 2)):
+        assert abs(got - index * 10) <= 4
+
+
+def test_resize_keeps_aspect(clip):
+    frames, info = video.decode_video_frames(BytesIO(clip), max_frames=1, width=32)
+    assert tuple(frames.shape) == (1, 24, 32, 3)
+    assert (info["source_width"], info["source_height"]) == (WIDTH, HEIGHT)
+
+
+def test_audio_stream_is_reported():
+    frames, info = video.decode_video_frames(BytesIO(make_test_mp4(FRAMES, FPS, WIDTH, HEIGHT, audio=True)), max_frames=2)
+    assert frames.shape[0] == 2
+    assert [a["codec"] for a in info["audio"]] == ["aac"]
+    assert info["audio"][0]["sample_rate"] == 44100
+
+
+def test_decodes_local_path(clip, tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(clip)
+    assert video.open_video_source(str(path)) == str(path)
+    frames, _ = video.decode_video_frames(video.open_video_source(str(path)), max_frames=3)
+    assert frames.shape[0] == 3
+
+
+def test_submit_detects_and_decodes_video(clip):
+    placeholder = generator.placeholder_img_batch(WIDTH, HEIGHT)
+    frames, meta = generator._detect_content(clip, placeholder, decode_opts={"video": {"stride": 4, "max_frames": 0}})
+    assert meta["kind"] == "video" and meta["frames"] == FRAMES // 4
+    assert list(frames.shape) == meta["shape"]
+
+    # Without video options the placeholder is returned and nothing is decoded
+    same, meta = generator._detect_content(clip, placeholder)
+    assert same is placeholder and meta == {"kind": "video", "shape": list(placeholder.shape)}
+
+
+def test_undecodable_video_keeps_placeholder():
+    placeholder = generator.placeholder_img_batch(WIDTH, HEIGHT)
+    result, meta = generator._detect_content(make_fake_mp4(4096), placeholder, decode_opts={"video": {"max_frames": 4}})
+    assert result is placeholder
+    assert meta["kind"] == "video" and meta["video_error"]
+
+
+def test_growing_file_reader_waits_for_writer(clip):
+    growing = video.GrowingFile()
+    try:
+        def fill():
+            for i in range(0, len(clip), 256):
+                growing.write(clip[i:i + 256])
+                time.sleep(0.002)
+            growing.finish()
+
+        writer = threading.Thread(target=fill)
+        writer.start()
+        frames, info = video.decode_video_frames(growing.reader(), max_frames=4)
+        writer.join()
+        assert info["frames"] == 4 and growing.size == len(clip)
+    finally:
+        growing.close()
+        os.remove(growing.path)
+
+
+def test_growing_file_restart_rewrites_from_zero():
+    growing = video.GrowingFile()
+    try:
+        growing.write(b"abcdef")
+        reader = growing.reader()
+        assert reader.read(4) == b"abcd"
+        growing.seek(0)
+        growing.truncate()  # fetch_resumable restarting the sink after a 200 to a Range request
+        growing.write(b"abcdefgh")
+        growing.finish()
+        assert reader.read() == b"efgh"
+    finally:
+        growing.close()
+        os.remove(growing.path)
+
+
+def test_submit_decodes_while_downloading(clip):
+    class Slow(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", str(len(clip)))
+            self.end_headers()
+            for i in range(0, len(clip), 256):
+                self.wfile.write(clip[i:i + 256])
+                self.wfile.flush()
+                time.sleep(0.002)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Slow)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/clip.mp4"
+    try:
+        params = {"payload": {"model": "test", "size": f"{WIDTH}x{HEIGHT}"}}
+        frames, content_url, _, debug, meta = generator._materialize(
+            {}, params, url, "", "", None, decode_opts={"video": {"stride": 2, "max_frames": 0}}, cancellable=False)
+    finally:
+        server.shutdown()
+    assert content_url == url and meta["frames"] == FRAMES // 2
+    assert tuple(frames.shape) == (FRAMES // 2, HEIGHT, WIDTH, 3)
+    # The file went to the blob store (spilled to disk), so Download / Video Frames do not fetch it again
+    assert generator.get_blob_store().get(url) == clip
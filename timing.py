@@ -0,0 +1,138 @@
+"""
+Per-stage timing for Submit: a StageTimer travels with one request, and finished timers feed a rolling per-model histogram.
+Stages (seconds): connect, headers, first_sse_byte, first_frame, url_frame, max_frame_gap, sse_total, cdn_download,
+image_decode, tensor_convert, total.
+"""
+import bisect
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Samples kept per (model, stage) and histogram bucket upper bounds in seconds
+HISTOGRAM_WINDOW = 500
+HISTOGRAM_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class StageTimer:
+    """Collects stage durations and counters (bytes, throughput) for one request."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self._open = {}
+
+    def start(self, name):
+        self._open[name] = time.perf_counter()
+
+    def stop(self, name):
+        begin = self._open.pop(name, None)
+        if begin is not None:
+            self.add(name, time.perf_counter() - begin)
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def milestone(self, name):
+        """Record seconds since the timer was created (first occurrence only), e.g. time to first SSE byte."""
+        if name not in self.stages:
+            self.stages[name] = time.perf_counter() - self.t0
+
+    def peak(self, name, seconds):
+        """Keep the largest value seen for a stage, e.g. the longest gap between SSE frames."""
+        self.stages[name] = max(self.stages.get(name, 0.0), seconds)
+
+    def count(self, name, value):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def stage(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    def finish(self):
+        self.stages["total"] = time.perf_counter() - self.t0
+        seconds = self.stages.get("cdn_download")
+        if seconds and self.counters.get("cdn_bytes"):
+            self.counters["cdn_mbps"] = round(self.counters["cdn_bytes"] / seconds / 1e6, 3)
+
+    def to_dict(self):
+        return {
+            "stages": {k: round(v, 4) for k, v in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+
+class _Histograms:
+    """Rolling window of stage samples per model, summarised as percentiles and bucket counts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}  # model -> stage -> deque
+
+    def record(self, model, timer):
+        with self._lock:
+            per_model = self._samples.setdefault(model or "unknown", {})
+            for stage, seconds in timer.stages.items():
+                per_model.setdefault(stage, deque(maxlen=HISTOGRAM_WINDOW)).append(seconds)
+
+    def summary(self, model=None):
+        """{model: {stage: {count, mean, p50, p90, p99, buckets}}}; one model or all of them."""
+        with self._lock:
+            models = [model] if model is not None else list(self._samples)
+            out = {}
+            for m in models:
+                stages = {}
+                for stage, samples in self._samples.get(m, {}).items():
+                    values = sorted(samples)
+                    if not values:
+                        continue
+                    buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+                    for v in values:
+                        buckets[bisect.bisect_left(HISTOGRAM_BUCKETS, v)] += 1
+                    stages[stage] = {
+                        "count": len(values),
+                        "mean": round(sum(values) / len(values), 4),
+                        "p50": round(percentile(values, 50), 4),
+                        "p90": round(percentile(values, 90), 4),
+                        "p99": round(percentile(values, 99), 4),
+                        "buckets": dict(zip([f"<={b}" for b in HISTOGRAM_BUCKETS] + ["inf"], buckets)),
+                    }
+                out[m] = stages
+            return out
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+_histograms = _Histograms()
+
+
+def record_timings(model, timer):
+    """Finish timer and add it to the per-model histogram."""
+    timer.finish()
+    _histograms.record(model, timer)
+
+
+def timing_summary(model=None):
+    return _histograms.summary(model)
+
+
+def timings_json(model, timer):
+    """Structured JSON for the Submit timings output: this request's stages plus the model's rolling histogram."""
+    model = model or "unknown"
+    data = {"model": model}
+    data.update(timer.to_dict())
+    data["histogram"] = timing_summary(model).get(model, {})
+    return json.dumps(data, indent=2)
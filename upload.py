@@ -1,9 +1,14 @@
+import hashlib
 import re
-import torch
-import numpy as np
-import requests
-from PIL import Image
+import socket
+import threading
+import time
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+
+from .cancel import cancel_scope, is_interrupt
+from .session import active_connection, anondrop_session, request_timeout
+from .singleflight import get_flight
 
 
 def parse_image_urls(text, max_count=8):
@@ -18,19 +23,68 @@ def parse_image_urls(text, max_count=8):
     return urls if urls else None
 
 
+# Upload encoder formats: (PIL format, file extension, MIME type)
+UPLOAD_FORMATS = {
+    "png": ("PNG", "png", "image/png"),
+    "webp_lossless": ("WEBP", "webp", "image/webp"),
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+}
+DEFAULT_PNG_COMPRESS_LEVEL = 1
+
+
+def tensor_to_uint8(tensor, max_side=0):
+    """
+    ComfyUI IMAGE tensor (B,H,W,C) or (H,W,C) float 0-1 to a uint8 numpy array (B,H,W,C).
+    With max_side > 0, frames are first area-downscaled so the longest side is at most max_side.
+    Scaling and clamping happen in place on one float scratch buffer, followed by a single cast.
+    """
+    import torch
+
+    t = tensor.detach()
+    if t.dim() == 3:
+        t = t.unsqueeze(0)
+    h, w = t.shape[1], t.shape[2]
+    if max_side and max(h, w) > max_side:
+        scale = max_side / float(max(h, w))
+        size = (max(1, round(h * scale)), max(1, round(w * scale)))
+        t = torch.nn.functional.interpolate(t.movedim(-1, 1).float(), size=size, mode="area").movedim(1, -1)
+    buf = t.to(device="cpu", dtype=torch.float32)
+    if buf.data_ptr() == tensor.data_ptr():
+        buf = buf.clone()  # never scale the caller's tensor in place
+    buf.mul_(255.0).add_(0.5).clamp_(0.0, 255.0)
+    return buf.to(torch.uint8).numpy()
+
+
+def encode_images(tensor, fmt="png", compress_level=DEFAULT_PNG_COMPRESS_LEVEL, quality=95, max_side=0):
+    """
+    Encode every frame of an IMAGE tensor (B,H,W,C) or (H,W,C) for upload.
+    fmt: png (compress_level 0-9), webp_lossless, or jpeg (quality). Returns [(bytes, extension, mime), ...].
+    """
+    from PIL import Image
+
+    pil_format, ext, mime = UPLOAD_FORMATS[fmt]
+    frames = tensor_to_uint8(tensor, max_side)
+    out = []
+    for arr in frames:
+        if arr.shape[-1] == 1:
+            arr = arr[..., 0]
+        pil = Image.fromarray(arr)
+        buf = BytesIO()
+        if pil_format == "PNG":
+            pil.save(buf, format="PNG", compress_level=int(compress_level))
+        elif pil_format == "WEBP":
+            pil.save(buf, format="WEBP", lossless=True, quality=int(quality), method=0)
+        else:
+            pil.convert("RGB").save(buf, format="JPEG", quality=int(quality), subsampling=0)
+        out.append((buf.getvalue(), ext, mime))
+    return out
+
+
 def image_tensor_to_png_bytes(tensor):
-    """ComfyUI IMAGE tensor (1,H,W,C) or (H,W,C) float 0-1 to PNG bytes."""
+    """ComfyUI IMAGE tensor (1,H,W,C) or (H,W,C) float 0-1 to PNG bytes (first frame)."""
     if tensor.dim() == 4:
-        tensor = tensor[0]
-    arr = tensor.cpu().numpy()
-    if arr.max() <= 1.0:
-        arr = (arr * 255).clip(0, 255).astype(np.uint8)
-    else:
-        arr = arr.clip(0, 255).astype(np.uint8)
-    pil = Image.fromarray(arr)
-    buf = BytesIO()
-    pil.save(buf, format="PNG")
-    return buf.getvalue()
+        tensor = tensor[:1]
+    return encode_images(tensor, "png", compress_level=6)[0][0]
 
 
 def anondrop_extract_url(response):
@@ -53,7 +107,113 @@ def anondrop_extract_url(response):
     return None
 
 
+# Parallel AnonDrop uploads per node run, and how long a tensor digest -> URL mapping is reused across runs
+DEFAULT_UPLOAD_WORKERS = 4
+UPLOAD_CACHE_TTL = 24 * 3600
+
+
+def tensor_digest(tensor):
+    """blake2b digest of an IMAGE tensor's shape, dtype and pixel data; equal digests upload once."""
+    import numpy as np
+
+    arr = np.ascontiguousarray(tensor.detach().cpu().numpy())
+    h = hashlib.blake2b(digest_size=20)
+    h.update(str((arr.shape, arr.dtype.str)).encode("ascii"))
+    h.update(memoryview(arr).cast("B"))
+    return h.hexdigest()
+
+
+class _UploadCache:
+    """In-process digest -> AnonDrop URL map with expiry, shared across queue runs."""
+
+    def __init__(self, ttl_seconds):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            url, expires = entry
+            if time.time() > expires:
+                del self._entries[digest]
+                return None
+            return url
+
+    def put(self, digest, url):
+        with self._lock:
+            self._entries[digest] = (url, time.time() + self.ttl_seconds)
+
+
+_upload_cache = _UploadCache(UPLOAD_CACHE_TTL)
+
+
+class _CancellableBody(BytesIO):
+    """
+    Request body that follows the scope: read() raises the interrupt once cancelled (stops the send between blocks),
+    and the first read() registers a socket shutdown for the connection carrying it (unblocks the response wait).
+    """
+
+    def __init__(self, data, scope):
+        super().__init__(data)
+        self.scope = scope
+        self.unregister = None
+
+    def read(self, size=-1):
+        if self.unregister is None:
+            sock = getattr(active_connection(), "sock", None)
+            self.unregister = self.scope.on_abort(lambda: sock.shutdown(socket.SHUT_RDWR)) if sock else (lambda: None)
+        self.scope.check()
+        return super().read(size)
+
+
+def _upload_one(session, upload_url, key, config, slot, img, encode_opts, scope):
+    """Encode (first frame) and upload one image; returns (url or None, error or None). Raises when cancelled."""
+    from urllib3 import encode_multipart_formdata
+
+    scope.check()
+    try:
+        data, ext, mime = encode_images(img[:1] if img.dim() == 4 else img, **encode_opts)[0]
+    except Exception as e:
+        return (None, f"image_{slot} convert failed: {e}")
+    try:
+        # Multipart body sent from a file object, so Cancel can stop it between blocks
+        body, content_type = encode_multipart_formdata({"file": (f"ref_{slot}.{ext}", data, mime)})
+        stream = _CancellableBody(body, scope)
+        try:
+            r = session.post(
+                upload_url,
+                params={"key": key},
+                data=stream,
+                headers={"Content-Type": content_type},
+                timeout=request_timeout(config, 60),
+            )
+        finally:
+            if stream.unregister is not None:
+                stream.unregister()
+        if r.status_code != 200:
+            return (None, f"image_{slot} upload HTTP {r.status_code}: {r.text[:200]}")
+        u = anondrop_extract_url(r)
+        if not u:
+            return (None, f"image_{slot} no URL in response: {r.text[:200]}")
+        return (u.rstrip("/") + f"/img.{ext}", None)
+    except Exception as e:
+        if scope.cancelled or is_interrupt(e):
+            raise
+        return (None, f"image_{slot} request error: {e}")
+
+
+def _upload_shared(digest, *args):
+    """_upload_one, joined by concurrent uploads of the same digest (other queued runs / nodes); returns (url, err, shared)."""
+    (url, err), shared = get_flight("upload").do(digest, lambda: _upload_one(*args))
+    return (url, err, shared)
+
+
 class AirforceAnonDropUpload:
+    """Upload reference images to AnonDrop in parallel. Identical images (duplicate slots, uploads in flight elsewhere, or unchanged since an earlier run) are uploaded once."""
+
     @classmethod
     def INPUT_TYPES(cls):
         inputs = {
@@ -64,6 +224,11 @@ class AirforceAnonDropUpload:
         }
         for i in range(1, 15):
             inputs["optional"][f"image_{i}"] = ("IMAGE",)
+        inputs["optional"]["max_parallel"] = ("INT", {"default": DEFAULT_UPLOAD_WORKERS, "min": 1, "max": 14})
+        inputs["optional"]["format"] = (list(UPLOAD_FORMATS), {"default": "png"})
+        inputs["optional"]["compress_level"] = ("INT", {"default": DEFAULT_PNG_COMPRESS_LEVEL, "min": 0, "max": 9, "tooltip": "PNG zlib level (1 = fast, 9 = smallest)"})
+        inputs["optional"]["quality"] = ("INT", {"default": 95, "min": 1, "max": 100, "tooltip": "JPEG quality"})
+        inputs["optional"]["max_side"] = ("INT", {"default": 0, "min": 0, "max": 8192, "step": 64, "tooltip": "Downscale so the longest side fits the model's max reference resolution (0 = keep)"})
         return inputs
 
     RETURN_TYPES = ("STRING", "STRING")
@@ -71,45 +236,68 @@ class AirforceAnonDropUpload:
     FUNCTION = "upload"
     CATEGORY = "🚀Airforce/Modular"
 
-    def upload(self, config, **kwargs):
+    def upload(self, config, max_parallel=DEFAULT_UPLOAD_WORKERS, format="png",
+               compress_level=DEFAULT_PNG_COMPRESS_LEVEL, quality=95, max_side=0, **kwargs):
         key = (config.get("anondrop_key") or "").strip()
         if not key:
             return ("", "No AnonDrop Key (set in Config node)")
         base = (config.get("anondrop_base_url") or "https://anondrop.net").strip().rstrip("/")
         upload_url = f"{base}/upload"
-        urls = []
-        errors = []
+        session = anondrop_session(config)
+        encode_opts = {"fmt": format, "compress_level": compress_level, "quality": quality, "max_side": max_side}
+        opts_tag = f"{format}:{compress_level}:{quality}:{max_side}"
+
+        # Slots in order; identical tensors with the same encode options share one digest
+        slots = []
         for i in range(1, 15):
             img = kwargs.get(f"image_{i}")
-            if img is None:
+            # Duck-typed IMAGE check so torch is not needed to register the node
+            if img is not None and hasattr(img, "numel") and img.numel() > 0:
+                slots.append((i, img, tensor_digest(img) + ":" + opts_tag))
+
+        resolved = {}
+        pending = {}
+        cached = 0
+        joined = 0
+        for i, img, digest in slots:
+            if digest in resolved or digest in pending:
                 continue
-            if isinstance(img, torch.Tensor) and img.numel() > 0:
-                try:
-                    png_bytes = image_tensor_to_png_bytes(img)
-                except Exception as e:
-                    errors.append(f"image_{i} convert failed: {e}")
-                    continue
+            url = _upload_cache.get(digest)
+            if url:
+                resolved[digest] = (url, None)
+                cached += 1
             else:
-                continue
-            try:
-                r = requests.post(
-                    upload_url,
-                    params={"key": key},
-                    files={"file": (f"ref_{i}.png", png_bytes, "image/png")},
-                    timeout=60,
-                )
-                if r.status_code != 200:
-                    errors.append(f"image_{i} upload HTTP {r.status_code}: {r.text[:200]}")
-                    continue
-                u = anondrop_extract_url(r)
-                if u:
-                    urls.append(u.rstrip("/") + "/img.png")
-                else:
-                    errors.append(f"image_{i} no URL in response: {r.text[:200]}")
-            except Exception as e:
-                errors.append(f"image_{i} request error: {e}")
+                pending[digest] = (i, img)
+
+        if pending:
+            workers = min(len(pending), max(1, int(max_parallel)))
+            # Cancel: queued uploads are dropped, running ones stop sending; leaving the pool waits for them
+            with cancel_scope("upload") as scope, \
+                    ThreadPoolExecutor(max_workers=workers, thread_name_prefix="airforce-upload") as pool:
+                scope.on_abort(lambda: pool.shutdown(wait=False, cancel_futures=True))
+                futures = {
+                    digest: pool.submit(_upload_shared, digest, session, upload_url, key, config, i, img, encode_opts, scope)
+                    for digest, (i, img) in pending.items()
+                }
+                for digest, future in futures.items():
+                    url, err, shared = future.result()
+                    resolved[digest] = (url, err)
+                    joined += shared
+                    if url:
+                        _upload_cache.put(digest, url)
+
+        urls = []
+        errors = []
+        for i, img, digest in slots:
+            url, err = resolved[digest]
+            if url:
+                urls.append(url)
+            elif err and err not in errors:
+                errors.append(err)
         reference_urls = "\n".join(urls)
         status = "Uploaded " + str(len(urls)) + " image(s)" if urls else "No images uploaded"
+        if urls:
+            status += f" ({len(pending) - joined} sent, {joined} shared in-flight, {cached} cached, {len(slots) - len(pending) - cached} duplicate)"
         if errors:
             status += "; " + "; ".join(errors[:3])
             if len(errors) > 3:
@@ -0,0 +1,230 @@
+"""
+Video decode: MP4/WebM (URL, local path or file-like) -> IMAGE frame batch (T,H,W,3) with frame-stride / max-frames sampling.
+Frames are decoded one at a time (PyAV, shipped with ComfyUI); only sampled frames are kept, so memory follows the
+sampled frame count rather than the clip length. URLs are streamed by ffmpeg (HTTP range reads), not downloaded first. Submit decodes while it downloads, reading a
+GrowingFile that the CDN fetch fills.
+"""
+import json
+import os
+import tempfile
+import threading
+from io import BytesIO
+
+from .blobstore import get_blob_store
+
+
+def _target_size(src_w, src_h, width, height):
+    """(w, h) for reformat; 0 keeps the source size, one side 0 keeps aspect ratio. Even sizes for yuv formats."""
+    if not width and not height:
+        return (src_w, src_h)
+    if not height:
+        height = round(src_h * width / float(src_w))
+    if not width:
+        width = round(src_w * height / float(src_h))
+    return (max(2, int(width) // 2 * 2), max(2, int(height) // 2 * 2))
+
+
+def decode_video_frames(source, stride=1, max_frames=0, width=0, height=0, timer=None):
+    """
+    Decode video frames into a float32 (T,H,W,3) tensor in 0-1.
+    stride: keep every Nth frame; max_frames: stop after this many kept frames (0 = all); width/height: target size (0 = source).
+    Returns (tensor, info) where info has fps (of the sampled frames), source_fps, frames, width, height, duration and audio streams.
+    Raises ImportError when PyAV is not installed and av errors for undecodable input.
+    """
+    import av
+    import numpy as np
+    import torch
+
+    stride = max(1, int(stride))
+    max_frames = max(0, int(max_frames))
+    if timer is not None:
+        timer.start("video_decode")
+    container = av.open(source, mode="r")
+    try:
+        vstream = container.streams.video[0]
+        vstream.thread_type = "AUTO"
+        source_fps = float(vstream.average_rate) if vstream.average_rate else 0.0
+        src_w, src_h = vstream.codec_context.width, vstream.codec_context.height
+        w, h = _target_size(src_w, src_h, width, height)
+        audio = []
+        for astream in container.streams.audio:
+            ctx = astream.codec_context
+            audio.append({
+                "codec": ctx.name,
+                "sample_rate": ctx.sample_rate,
+                "channels": getattr(ctx, "channels", None) or len(getattr(ctx.layout, "channels", ()) or ()),
+            })
+        duration = float(container.duration) / av.time_base if container.duration else None
+
+        kept = []  # uint8 (H,W,3) per sampled frame
+        for index, frame in enumerate(container.decode(vstream)):
+            if index % stride:
+                continue
+            kept.append(frame.to_ndarray(format="rgb24", width=w, height=h))
+            if max_frames and len(kept) >= max_frames:
+                break
+    finally:
+        container.close()
+        if timer is not None:
+            timer.stop("video_decode")
+
+    if not kept:
+        raise ValueError("No video frames decoded")
+    out = torch.empty((len(kept), h, w, 3), dtype=torch.float32)
+    for i, arr in enumerate(kept):
+        out[i].copy_(torch.from_numpy(np.ascontiguousarray(arr)))
+        kept[i] = None  # release each uint8 frame once copied
+    out.mul_(1.0 / 255.0)
+    info = {
+        "kind": "video",
+        "fps": round(source_fps / stride, 4) if source_fps else 0.0,
+        "source_fps": round(source_fps, 4),
+        "frames": out.shape[0],
+        "stride": stride,
+        "width": w,
+        "height": h,
+        "source_width": src_w,
+        "source_height": src_h,
+        "duration": round(duration, 3) if duration else None,
+        "audio": audio,
+    }
+    return out, info
+
+
+class GrowingFile:
+    """
+    Temp file filled by a download on one thread (the fetch_resumable sink: write / tell / seek / truncate) and read
+    by decoders on others (reader()). Reads past the written end wait for more bytes until finish() is called; a
+    download restarted from 0 rewrites the same bytes, so readers just wait for it to catch up.
+    """
+
+    def __init__(self, directory=None):
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(prefix=".airforce_", suffix=".part", dir=directory)
+        self._file = os.fdopen(fd, "w+b")
+        self._cond = threading.Condition()
+        self._pos = 0  # write position
+        self.size = 0
+        self.done = False
+
+    def write(self, data):
+        with self._cond:
+            self._file.seek(self._pos)
+            self._file.write(data)
+            self._pos += len(data)
+            self.size = max(self.size, self._pos)
+            self._cond.notify_all()
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        with self._cond:
+            self._pos = {os.SEEK_SET: 0, os.SEEK_CUR: self._pos, os.SEEK_END: self.size}[whence] + offset
+            return self._pos
+
+    def truncate(self, size=None):
+        with self._cond:
+            self.size = self._pos if size is None else size
+            self._file.truncate(self.size)
+            return self.size
+
+    def finish(self):
+        """The download ended (or failed): readers get EOF at the current size instead of waiting."""
+        with self._cond:
+            self.done = True
+            self._cond.notify_all()
+
+    def close(self):
+        self.finish()
+        with self._cond:
+            self._file.close()
+
+    def reader(self):
+        return _GrowingReader(self)
+
+    def _read_at(self, pos, n):
+        with self._cond:
+            while not self.done and (pos >= self.size or n < 0):
+                self._cond.wait()
+            end = self.size if n < 0 else min(self.size, pos + n)
+            if pos >= end:
+                return b""
+            self._file.seek(pos)
+            return self._file.read(end - pos)
+
+    def _final_size(self):
+        with self._cond:
+            while not self.done:
+                self._cond.wait()
+            return self.size
+
+
+class _GrowingReader:
+    """File-like view of a GrowingFile with its own position (what av.open reads from)."""
+
+    def __init__(self, growing):
+        self._growing = growing
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def read(self, n=-1):
+        data = self._growing._read_at(self._pos, -1 if n is None else n)
+        self._pos += len(data)
+        return data
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_END:
+            offset += self._growing._final_size()  # e.g. the MP4 index at the end: wait for the whole file
+        elif whence == os.SEEK_CUR:
+            offset += self._pos
+        self._pos = offset
+        return self._pos
+
+
+def open_video_source(source):
+    """Local path as-is; a URL already fetched by Submit comes from the blob store; other URLs are streamed by ffmpeg."""
+    source = str(source or "").strip()
+    if os.path.exists(source):
+        return source
+    data = get_blob_store().get(source)
+    if data is not None:
+        return BytesIO(data)
+    return source
+
+
+class AirforceVideoFrames:
+    """Decode a video (Submit url, Download path, or any local file / URL) into an IMAGE batch with fps and audio info."""
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "source": ("STRING", {"default": "", "forceInput": True}),
+            },
+            "optional": {
+                "stride": ("INT", {"default": 1, "min": 1, "max": 120, "tooltip": "Keep every Nth frame"}),
+                "max_frames": ("INT", {"default": 64, "min": 0, "max": 10000, "tooltip": "0 = all frames"}),
+                "width": ("INT", {"default": 0, "min": 0, "max": 4096, "step": 2, "tooltip": "0 = source width"}),
+                "height": ("INT", {"default": 0, "min": 0, "max": 4096, "step": 2, "tooltip": "0 = source height"}),
+            }
+        }
+
+    RETURN_TYPES = ("IMAGE", "FLOAT", "STRING")
+    RETURN_NAMES = ("frames", "fps", "media_info")
+    FUNCTION = "decode"
+    CATEGORY = "🚀Airforce/Modular"
+
+    def decode(self, source, stride=1, max_frames=64, width=0, height=0):
+        frames, info = decode_video_frames(open_video_source(source), stride, max_frames, width, height)
+        return (frames, float(info["fps"]), json.dumps(info, indent=2))
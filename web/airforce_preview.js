@@ -11,6 +11,11 @@ const DEFAULT_WIDGET_HEIGHT = 280;
 const NODE_TITLE_OFFSET = 50;
 const AF_NODE_ID_ATTR = "data-af-node-id";
 
+// Local media proxy route (cached on the ComfyUI server, supports Range) -> absolute URL for <video>
+function localMediaUrl(route) {
+    return route ? api.apiURL(route) : null;
+}
+
 function applyContentSize(node, contentW, contentH, resolutionDiv) {
     if (resolutionDiv) resolutionDiv.textContent = contentW + " x " + contentH;
     node.setDirtyCanvas(true, true);
@@ -52,7 +57,8 @@ function removeAllAfPlayerWidgets(node) {
     }
 }
 
-function applyVideoPreviewToNode(node, mediaUrl) {
+// mediaUrl: original CDN url (validity check, "open in new tab"); localSrc/posterSrc: proxy routes when available
+function applyVideoPreviewToNode(node, mediaUrl, localSrc, posterSrc) {
     if (!node) return;
     if (!node.widgets) node.widgets = [];
 
@@ -67,6 +73,7 @@ function applyVideoPreviewToNode(node, mediaUrl) {
     }
 
     node._af_preview_url = mediaUrl;
+    const src = localSrc || mediaUrl;
 
     // Clear any stale preview DOM in other layers (stacked below, not scaling with box)
     removeAllPreviewDomByNodeId(nodeId);
@@ -79,7 +86,9 @@ function applyVideoPreviewToNode(node, mediaUrl) {
         if (video) {
             if (resolutionDiv) resolutionDiv.textContent = "";
             video.pause();
-            video.src = mediaUrl;
+            if (posterSrc) video.poster = posterSrc;
+            else video.removeAttribute("poster");
+            video.src = src;
             video.load();
             video.play().catch(() => {});
         }
@@ -104,7 +113,9 @@ function applyVideoPreviewToNode(node, mediaUrl) {
     elem.controls = true;
     elem.autoplay = true;
     elem.loop = true;
-    elem.src = mediaUrl;
+    elem.preload = "metadata";
+    if (posterSrc) elem.poster = posterSrc;
+    elem.src = src;
     elem.addEventListener("loadedmetadata", function () {
         if (elem.videoWidth) applyContentSize(node, elem.videoWidth, elem.videoHeight, resolutionDiv);
     });
@@ -158,23 +169,76 @@ function findGraphNodeById(graph, nodeId) {
     return null;
 }
 
+// Live generation status from the SSE stream ("airforce.progress"), drawn under Submit / Batch Submit nodes
+const PROGRESS_NODE_TYPES = ["AirforceGeneratorModular", "AirforceBatchGenerator"];
+
+function formatProgress(detail) {
+    const parts = [];
+    if (detail.items > 1) parts.push((detail.item + 1) + "/" + detail.items);
+    if (detail.status) parts.push(detail.status);
+    if (detail.queue_position !== null && detail.queue_position !== undefined) parts.push("queue #" + detail.queue_position);
+    if (detail.value > 0) parts.push(detail.value + "%");
+    if (detail.first_frame_s === null || detail.first_frame_s === undefined) {
+        parts.push("waiting for first frame " + detail.since_keepalive_s + "s");
+    } else {
+        parts.push("first frame " + detail.first_frame_s + "s");
+        if (detail.since_keepalive_s >= 5) parts.push("last keepalive " + detail.since_keepalive_s + "s ago");
+    }
+    return parts.join(" · ");
+}
+
+function drawProgressText(node, ctx) {
+    if (!node._af_progress_text || node.flags?.collapsed) return;
+    ctx.save();
+    ctx.font = "11px sans-serif";
+    ctx.fillStyle = "#9ab";
+    ctx.textAlign = "left";
+    ctx.fillText(node._af_progress_text, 4, node.size[1] + 14);
+    ctx.restore();
+}
+
 app.registerExtension({
     name: "Airforce.Preview",
     setup() {
+        api.addEventListener("airforce.progress", function (ev) {
+            const detail = ev.detail;
+            const graph = app.graph;
+            if (!detail || !graph) return;
+            const node = findGraphNodeById(graph, detail.node);
+            if (!node) return;
+            node._af_progress_text = formatProgress(detail);
+            node.setDirtyCanvas(true, false);
+        });
+        api.addEventListener("execution_start", function () {
+            const graph = app.graph;
+            if (!graph || !graph._nodes) return;
+            graph._nodes.forEach(function (n) { n._af_progress_text = null; });
+        });
         api.addEventListener("executed", function (ev) {
             const detail = ev.detail;
             if (!detail || !detail.output) return;
             const list = detail.output.video_url;
             const mediaUrl = Array.isArray(list) && list.length > 0 ? list[0] : null;
+            const local = detail.output.media_url;
+            const poster = detail.output.poster_url;
+            const localSrc = localMediaUrl(Array.isArray(local) && local.length > 0 ? local[0] : null);
+            const posterSrc = localMediaUrl(Array.isArray(poster) && poster.length > 0 ? poster[0] : null);
             const graph = app.graph;
             if (!graph) return;
             const node = findGraphNodeById(graph, detail.node);
             const isPreview = node && (node.type === "AirforceVideoPreview" || node.comfyClass === "AirforceVideoPreview");
             if (!isPreview) return;
-            applyVideoPreviewToNode(node, mediaUrl);
+            applyVideoPreviewToNode(node, mediaUrl, localSrc, posterSrc);
         });
     },
     async beforeRegisterNodeDef(nodeType, nodeData, app) {
+        if (PROGRESS_NODE_TYPES.includes(nodeData.name)) {
+            const origDrawForeground = nodeType.prototype.onDrawForeground;
+            nodeType.prototype.onDrawForeground = function (ctx) {
+                origDrawForeground?.apply(this, arguments);
+                drawProgressText(this, ctx);
+            };
+        }
         if (nodeData.name === "AirforceVideoPreview") {
             const onExecuted = nodeType.prototype.onExecuted;
             nodeType.prototype.onExecuted = function (message) {